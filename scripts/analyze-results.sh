@@ -66,6 +66,10 @@ NC='\033[0m'
 
 mkdir -p "${REPORTS_DIR}"
 
+# Span tracing (no-op unless OLLAMA_TRACE_FILE is set, e.g. by run-tests.sh --trace)
+source scripts/tracing.sh
+trace_init "analyze-results.sh"
+
 echo -e "${GREEN}=== Ollama Test Results Analyzer v2.0 ===${NC}"
 echo ""
 
@@ -159,7 +163,7 @@ get_latest_test_info() {
         fi
         
         # Validate category
-        if [[ "$category" != "coding" && "$category" != "data" && "$category" != "all" ]]; then
+        if [[ "$category" != "coding" && "$category" != "data" && "$category" != "scaling" && "$category" != "all" ]]; then
             # Try fallback: get from JSON
             category=$(jq -r '.test_case.category' "$latest_file" 2>/dev/null || echo "unknown")
         fi
@@ -279,6 +283,7 @@ analyze_by_category() {
 
     local found_tests=false
     local test_count=0
+    local timeout_notes=()
     
     for result_file in "${RESULTS_DIR}"/${test_pattern}*"${latest_timestamp}".json; do
         if [[ -f "${result_file}" ]]; then
@@ -302,6 +307,9 @@ analyze_by_category() {
             result_status=$(jq -r '.overall_result // "unknown"' "${result_file}" 2>/dev/null || echo "unknown")
             
             echo "| ${test_id} | ${test_title} | ${duration} | ${tokens_per_sec} | ${result_status} |" >> "${report_file}"
+            if [[ "${result_status}" == "timeout" ]]; then
+                timeout_notes+=("$(jq -r '.generation as $g | "- **\(.test_case.id)** reached its deadline " + (if ($g.output_tokens // 0) > 0 then "after \($g.output_tokens) output tokens (TTFT \($g.ttft_ms) ms, \($g.decode_tokens_per_second // "N/A") tokens/sec)" else "before the first token" end)' "${result_file}" 2>/dev/null)")
+            fi
         fi
     done
     
@@ -311,6 +319,13 @@ analyze_by_category() {
         echo -e "${BLUE}[INFO]${NC} Found ${test_count} tests for pattern '${test_pattern}'" >&2
     fi
     
+    # Timed-out tests were still generating; show how far they got
+    if [[ ${#timeout_notes[@]} -gt 0 ]]; then
+        echo "" >> "${report_file}"
+        echo "*Timed out (partial output kept):*" >> "${report_file}"
+        printf '%s\n' "${timeout_notes[@]}" >> "${report_file}"
+    fi
+    
     echo "" >> "${report_file}"
 }
 
@@ -322,6 +337,9 @@ case "$category" in
     "data")
         analyze_by_category "dt" "Data Analysis Tests Results" "CSV processing, correlation, business intelligence, and reporting tests"
         ;;
+    "scaling")
+        analyze_by_category "sc" "Prompt Length Scaling Results" "Synthetic prompts from ~1k to ~32k tokens measuring TTFT, prefill and decode rates"
+        ;;
     "all")
         analyze_by_category "ct" "Coding Tests Results" "Algorithm implementation, optimization, debugging, and code quality tests"
         analyze_by_category "dt" "Data Analysis Tests Results" "CSV processing, correlation, business intelligence, and reporting tests"
@@ -362,31 +380,120 @@ else
 fi
 echo "" >> "${report_file}"
 
+# Summarize resource telemetry sampled during each test (peak memory, swap, CPU)
+echo -e "${BLUE}[INFO]${NC} Summarizing resource telemetry..."
+if resource_section=$(trace_run "telemetry-report" spawn python3 scripts/telemetry_sampler.py report --timestamp "${latest_timestamp}" --results-dir "${RESULTS_DIR}" --format markdown 2>/dev/null) \
+    && [[ -n "$resource_section" ]]; then
+    echo "$resource_section" >> "${report_file}"
+    echo "" >> "${report_file}"
+    echo -e "${GREEN}[SUCCESS]${NC} Resource telemetry summarized"
+else
+    echo -e "${YELLOW}[WARNING]${NC} Resource telemetry summary failed - continuing with standard analysis"
+fi
+
+# Model build details and throughput normalized by model size (tok/s per B params, GB/s)
+echo -e "${BLUE}[INFO]${NC} Summarizing model metadata..."
+if model_section=$(trace_run "model-metadata-report" spawn python3 scripts/model_metadata.py report --timestamp "${latest_timestamp}" --results-dir "${RESULTS_DIR}" --format markdown 2>/dev/null) \
+    && [[ -n "$model_section" ]]; then
+    echo "$model_section" >> "${report_file}"
+    echo "" >> "${report_file}"
+    echo -e "${GREEN}[SUCCESS]${NC} Model metadata summarized"
+else
+    echo -e "${YELLOW}[WARNING]${NC} Model metadata summary failed - continuing with standard analysis"
+fi
+
+# Cold vs warm model load times, if the run benchmarked them (run-tests.sh --load-benchmark N)
+if [[ -f "${REPORTS_DIR}/load_benchmark_${latest_timestamp}.json" ]]; then
+    echo -e "${BLUE}[INFO]${NC} Summarizing model load benchmark..."
+    if load_section=$(trace_run "load-benchmark-report" spawn python3 scripts/load_benchmark.py report --timestamp "${latest_timestamp}" --reports-dir "${REPORTS_DIR}" --format markdown 2>/dev/null) \
+        && [[ -n "$load_section" ]]; then
+        echo "$load_section" >> "${report_file}"
+        echo "" >> "${report_file}"
+        echo -e "${GREEN}[SUCCESS]${NC} Model load benchmark summarized"
+    else
+        echo -e "${YELLOW}[WARNING]${NC} Model load benchmark summary failed - continuing with standard analysis"
+    fi
+fi
+
+# Prefill tokens and TTFT saved by the shared_prefix prompt layout (prints nothing for other runs)
+if prefix_section=$(trace_run "prefix-report" spawn python3 scripts/prefix_report.py --timestamp "${latest_timestamp}" --results-dir "${RESULTS_DIR}" --format markdown 2>/dev/null) \
+    && [[ -n "$prefix_section" ]]; then
+    echo -e "${BLUE}[INFO]${NC} Summarizing prompt prefix sharing..."
+    echo "$prefix_section" >> "${report_file}"
+    echo "" >> "${report_file}"
+    echo -e "${GREEN}[SUCCESS]${NC} Prompt prefix sharing summarized"
+fi
+
+# Run deterministic code checks (extracted code run in a resource-limited subprocess)
+echo -e "${BLUE}[INFO]${NC} Running automated code checks..."
+if code_check_section=$(trace_run "code-checks" spawn python3 scripts/code_checker.py --timestamp "${latest_timestamp}" --results-dir "${RESULTS_DIR}" --format markdown 2>/dev/null) \
+    && [[ -n "$code_check_section" ]]; then
+    echo "$code_check_section" >> "${report_file}"
+    echo "" >> "${report_file}"
+    echo -e "${GREEN}[SUCCESS]${NC} Automated code checks completed"
+else
+    echo -e "${YELLOW}[WARNING]${NC} Automated code checks failed - continuing with standard analysis"
+fi
+
+# Verify data-analysis figures against values computed from the source data
+echo -e "${BLUE}[INFO]${NC} Running automated data verification..."
+if data_check_section=$(trace_run "data-verification" spawn python3 scripts/data_verifier.py --timestamp "${latest_timestamp}" --results-dir "${RESULTS_DIR}" --format markdown 2>/dev/null) \
+    && [[ -n "$data_check_section" ]]; then
+    echo "$data_check_section" >> "${report_file}"
+    echo "" >> "${report_file}"
+    echo -e "${GREEN}[SUCCESS]${NC} Automated data verification completed"
+else
+    echo -e "${YELLOW}[WARNING]${NC} Automated data verification failed - continuing with standard analysis"
+fi
+
+# Chart prefill/decode rates against prompt length for the scaling benchmark
+if [[ "$category" == "scaling" ]]; then
+    echo -e "${BLUE}[INFO]${NC} Building prompt length scaling curves..."
+    if scaling_section=$(trace_run "scaling-report" spawn python3 scripts/scaling_report.py --timestamp "${latest_timestamp}" --results-dir "${RESULTS_DIR}" --format markdown 2>/dev/null) \
+        && [[ -n "$scaling_section" ]]; then
+        echo "$scaling_section" >> "${report_file}"
+        echo "" >> "${report_file}"
+        echo -e "${GREEN}[SUCCESS]${NC} Scaling curves added"
+    else
+        echo -e "${YELLOW}[WARNING]${NC} Scaling report failed - continuing with standard analysis"
+    fi
+fi
+
+# Framework vs model time, if the run was traced (run-tests.sh --trace)
+trace_spans="${RESULTS_DIR}/.trace_${latest_timestamp}.ndjson"
+if [[ -f "$trace_spans" ]]; then
+    echo -e "${BLUE}[INFO]${NC} Summarizing framework overhead..."
+    if overhead_section=$(python3 scripts/tracing.py summary --spans "$trace_spans" --format markdown 2>/dev/null) \
+        && [[ -n "$overhead_section" ]]; then
+        echo "$overhead_section" >> "${report_file}"
+        echo "" >> "${report_file}"
+        echo -e "${GREEN}[SUCCESS]${NC} Framework overhead summarized"
+    else
+        echo -e "${YELLOW}[WARNING]${NC} Framework overhead summary failed - continuing with standard analysis"
+    fi
+fi
+
 # Run qualitative evaluation BEFORE writing the quality section (if requested)
 qualitative_scores=""
 if [[ "$QUALITATIVE_EVAL" == true ]]; then
     echo -e "${BLUE}[INFO]${NC} Running automated qualitative evaluation using Gemini 2.5 Flash Preview..."
     
-    # Create a consolidated results file for qualitative evaluation
-    main_result_file="${REPORTS_DIR}/consolidated_${latest_timestamp}.json"
+    # Create a consolidated NDJSON results file for qualitative evaluation:
+    # a session header line followed by one compact JSON line per test, so the
+    # evaluator can stream it instead of loading every output at once
+    main_result_file="${REPORTS_DIR}/consolidated_${latest_timestamp}.ndjson"
     if [[ ! -f "$main_result_file" ]]; then
         echo -e "${BLUE}[INFO]${NC} Creating consolidated results file for evaluation..."
         
-        # Use jq to properly construct the consolidated JSON
         {
-            echo "{"
-            echo "  \"test_session\": {"
-            echo "    \"timestamp\": \"${latest_timestamp}\","
-            echo "    \"model\": \"${model_name}\","
-            echo "    \"category\": \"${category}\""
-            echo "  },"
-            echo "  \"summary\": {"
-            echo "    \"total_tests\": $(ls ${RESULTS_DIR}/*${latest_timestamp}.json | grep -v "hardware_profile" | wc -l | xargs)"
-            echo "  },"
-            echo "  \"results\": {"
+            jq -nc \
+                --arg timestamp "${latest_timestamp}" \
+                --arg model "${model_name}" \
+                --arg category "${category}" \
+                --argjson total "$(ls ${RESULTS_DIR}/*${latest_timestamp}.json | grep -v "hardware_profile" | wc -l | xargs)" \
+                '{test_session: {timestamp: $timestamp, model: $model, category: $category}, summary: {total_tests: $total}}'
             
             # Process each test result file (exclude hardware profile)
-            first_file=true
             for result_file in "${RESULTS_DIR}"/*"${latest_timestamp}".json; do
                 # Skip hardware profile file
                 if [[ "$(basename "$result_file")" == "hardware_profile_${latest_timestamp}.json" ]]; then
@@ -396,46 +503,24 @@ if [[ "$QUALITATIVE_EVAL" == true ]]; then
                 if [[ -f "$result_file" ]]; then
                     test_id=$(jq -r '.test_case.id' "$result_file" 2>/dev/null || echo "unknown")
                     if [[ "$test_id" != "unknown" && "$test_id" != "null" ]]; then
-                        if [[ "$first_file" != true ]]; then
-                            echo ","
-                        fi
-                        
-                        # Extract fields using jq and properly escape JSON
-                        test_type=$(jq -r '.test_case.category' "$result_file" 2>/dev/null || echo "unknown")
-                        test_desc=$(jq -r '.test_case.description' "$result_file" 2>/dev/null || echo "unknown")
-                        test_prompt=$(jq -r '.input.prompt' "$result_file" 2>/dev/null || echo "")
-                        model_name_from_file=$(jq -r '.model.name' "$result_file" 2>/dev/null || echo "unknown")
-                        output_content=$(jq -r '.output.content' "$result_file" 2>/dev/null || echo "")
-                        
-                        # Build the test entry using jq to ensure proper JSON escaping
-                        echo -n "    \"$test_id\": "
-                        jq -n \
-                            --arg type "$test_type" \
-                            --arg prompt "$test_prompt" \
-                            --arg desc "$test_desc" \
-                            --arg model "$model_name_from_file" \
-                            --arg output "$output_content" \
-                            '{
+                        # Build the test entry in a single jq pass to ensure proper JSON escaping
+                        jq -c '{
+                                test_id: .test_case.id,
                                 test_config: {
-                                    type: $type,
-                                    prompt: $prompt,
-                                    description: $desc
+                                    type: .test_case.category,
+                                    prompt: .input.prompt,
+                                    description: .test_case.description
                                 },
-                                model: $model,
-                                output: $output
-                            }'
-                        
-                        first_file=false
+                                model: .model.name,
+                                output: .output.content
+                            }' "$result_file"
                     fi
                 fi
             done
-            
-            echo "  }"
-            echo "}"
         } > "$main_result_file"
         
-        # Validate the consolidated file
-        if [[ ! -f "$main_result_file" ]] || ! jq -e '.results' "$main_result_file" >/dev/null 2>&1; then
+        # Validate the consolidated file (header line must be present)
+        if [[ ! -f "$main_result_file" ]] || ! head -n 1 "$main_result_file" | jq -e '.test_session' >/dev/null 2>&1; then
             echo -e "${YELLOW}[WARNING]${NC} Failed to create consolidated results file"
             # Find the best result file to use as fallback
             result_files=("${RESULTS_DIR}"/*"${latest_timestamp}".json)
@@ -452,7 +537,7 @@ if [[ "$QUALITATIVE_EVAL" == true ]]; then
         # Run the qualitative evaluator
         qualitative_output_file="${REPORTS_DIR}/qualitative_${latest_timestamp}.json"
         
-        if python3 scripts/qualitative-evaluator.py "$main_result_file" --output "$qualitative_output_file" 2>/dev/null; then
+        if trace_run "qualitative-evaluation" spawn python3 scripts/qualitative-evaluator.py "$main_result_file" --output "$qualitative_output_file" 2>/dev/null; then
             echo -e "${GREEN}[SUCCESS]${NC} Qualitative evaluation completed"
             
             # Extract scores for integration into report
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Automated code checker for coding test outputs.
+
+Extracts Python code blocks from model responses and runs them against
+reference suites in a child process. The child runs in isolated mode
+(`python -I`), in its own session and a temporary working directory, with stdin
+closed, a minimal environment, and CPU, memory, file-size and wall-clock
+limits. This is not a security sandbox: the code can still read and write any
+path the user can and open network connections. Only check outputs on a
+machine where that is acceptable, or run the framework in a container.
+Results are attached to each result JSON under
+metrics.automated.code_execution, including measured speedup ratios for
+optimization tests. Deterministic, offline and free - no API calls.
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from config_loader import ConfigLoader, DataSourceProcessor
+from result_utils import attach_automated_metrics, iter_result_files, load_result, output_text
+
+HARNESS_PATH = script_dir / "sandbox_harness.py"
+CODE_BLOCK_RE = re.compile(r"```[ \t]*([\w+-]*)[ \t]*\n(.*?)```", re.DOTALL)
+PYTHON_LANGUAGES = ("", "python", "py", "python3")
+METRICS_KEY = "code_execution"
+
+
+def extract_code_blocks(text: str) -> List[str]:
+    """Return fenced code blocks that are Python or unlabelled."""
+    blocks = []
+    for match in CODE_BLOCK_RE.finditer(text):
+        if match.group(1).lower() in PYTHON_LANGUAGES:
+            blocks.append(match.group(2))
+    return blocks
+
+
+class SandboxLimits:
+    """Resource limits for every code check's child process.
+
+    CPU and memory limits travel in job.json and are applied by the harness
+    itself (preexec_fn is unsafe with the checker's worker threads); the
+    wall-clock limit is enforced here by killing the child's process group.
+    """
+
+    def __init__(self, cpu_seconds: int = 20, memory_mb: int = 1024, wall_timeout: float = 60.0):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_timeout = wall_timeout
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cpu_seconds": self.cpu_seconds,
+            "memory_mb": self.memory_mb,
+            "wall_timeout_s": self.wall_timeout,
+        }
+
+
+def kill_session(proc: subprocess.Popen) -> None:
+    """Kill every process in the child's session, not just the child itself."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass  # Group already gone
+
+
+class CodeChecker:
+    """Run configured code_execution checks for the results of a test run."""
+
+    def __init__(self, limits: Optional[SandboxLimits] = None, workers: int = 4):
+        self.limits = limits or SandboxLimits()
+        self.workers = workers
+        self.config_loader = ConfigLoader()
+        self.data_processor = DataSourceProcessor(registry=self.config_loader.registry)
+
+    def _test_config(self, category_id: str, test_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a test definition by category and test ID."""
+        return self.config_loader.get_test(category_id, test_id)
+
+    def _resolve_source(self, source_id: str) -> str:
+        """Resolve a data source by ID to its content."""
+        src = self.config_loader.registry.get_data_source(source_id)
+        if src:
+            return self.data_processor.process_data_source(src)
+        raise ValueError(f"Reference source not found: {source_id}")
+
+    def build_job(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a check job for a result, or None if the test has no code check."""
+        test_case = result.get("test_case", {})
+        test_config = self._test_config(test_case.get("category", ""), test_case.get("id", ""))
+        if not test_config:
+            return None
+        check = test_config.get("automated_check") or {}
+        if check.get("type") != METRICS_KEY:
+            return None
+
+        job = {
+            "suite": check["suite"],
+            "code_blocks": extract_code_blocks(output_text(result)),
+            "seed": check.get("seed", 0),
+        }
+        if "entry_point" in check:
+            job["entry_point"] = check["entry_point"]
+        if "benchmark_sizes" in check:
+            job["sizes"] = check["benchmark_sizes"]
+        if "reference_source" in check:
+            job["reference_code"] = self._resolve_source(check["reference_source"])
+        return job
+
+    def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a job in a resource-limited child process and return its report."""
+        if not job["code_blocks"]:
+            return {"status": "no_code_blocks", "cases_passed": 0, "cases_total": 0}
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="code-check-") as workdir:
+            with open(Path(workdir) / "job.json", "w", encoding="utf-8") as f:
+                json.dump(dict(job, limits=self.limits.to_dict()), f)
+
+            env = {"PATH": os.environ.get("PATH", ""), "PYTHONHASHSEED": "0", "HOME": workdir}
+            proc = subprocess.Popen(
+                [sys.executable, "-I", str(HARNESS_PATH.resolve())],
+                cwd=workdir, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, start_new_session=True,
+            )
+            try:
+                _, stderr = proc.communicate(timeout=self.limits.wall_timeout)
+            except subprocess.TimeoutExpired:
+                kill_session(proc)
+                proc.communicate()
+                report = {"status": "timeout", "cases_passed": 0, "cases_total": 0}
+            else:
+                kill_session(proc)  # Reap anything the candidate left running in the background
+                result_path = Path(workdir) / "result.json"
+                if result_path.exists():
+                    with open(result_path, "r", encoding="utf-8") as f:
+                        report = json.load(f)
+                else:
+                    # Killed by a resource limit before writing a result
+                    cpu_killed = proc.returncode == -getattr(signal, "SIGXCPU", 0)
+                    report = {
+                        "status": "cpu_limit_exceeded" if cpu_killed else "crashed",
+                        "returncode": proc.returncode,
+                        "stderr": stderr[-500:],
+                        "cases_passed": 0,
+                        "cases_total": 0,
+                    }
+
+        report["duration_s"] = round(time.perf_counter() - start, 3)
+        return report
+
+    def check_run(self, results_dir: str, timestamp: str) -> Dict[str, Dict[str, Any]]:
+        """Check every configured result of a run, attaching metrics to each file."""
+        jobs = {}
+        for path in iter_result_files(results_dir, timestamp):
+            try:
+                result = load_result(path)
+                job = self.build_job(result)
+            except (ValueError, json.JSONDecodeError) as e:
+                print(f"Warning: Skipping {path.name}: {e}", file=sys.stderr)
+                continue
+            if job:
+                job["test_id"] = result["test_case"]["id"]
+                jobs[path] = job
+
+        reports = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {path: pool.submit(self.run_job, job) for path, job in jobs.items()}
+            for path, future in futures.items():
+                report = future.result()
+                report["suite"] = jobs[path]["suite"]
+                report["code_blocks_found"] = len(jobs[path]["code_blocks"])
+                total = report.get("cases_total") or 0
+                report["pass_rate"] = round(report.get("cases_passed", 0) / total, 3) if total else 0.0
+                report["limits"] = self.limits.to_dict()
+                attach_automated_metrics(path, METRICS_KEY, report)
+                reports[jobs[path]["test_id"]] = report
+
+        return reports
+
+
+def format_for_report(reports: Dict[str, Dict[str, Any]]) -> str:
+    """Format code check results for inclusion in markdown reports."""
+    lines = [
+        "## Automated Code Checks",
+        "*Extracted code executed in a resource-limited subprocess against reference tests (no LLM involved)*",
+        "",
+        "| Test ID | Suite | Candidate | Tests Passed | Speedup | Status |",
+        "|---------|-------|-----------|--------------|---------|--------|",
+    ]
+    for test_id in sorted(reports):
+        r = reports[test_id]
+        passed = f"{r.get('cases_passed', 0)}/{r.get('cases_total', 0)}"
+        speedup = f"{r['speedup']}x" if r.get("speedup") else "-"
+        lines.append(f"| {test_id} | {r['suite']} | {r.get('candidate', '-')} | {passed} | {speedup} | {r['status']} |")
+    if not reports:
+        lines.append("| - | No tests with automated code checks | - | - | - | - |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sandboxed execution checks for coding test outputs')
+    parser.add_argument('--timestamp', required=True, help='Test run timestamp (e.g. 20250614_155309)')
+    parser.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+    parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format (default: json)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent check processes')
+    parser.add_argument('--cpu-seconds', type=int, default=20, help='CPU time limit per check')
+    parser.add_argument('--memory-mb', type=int, default=1024, help='Address space limit per check')
+    parser.add_argument('--wall-timeout', type=float, default=60.0, help='Wall-clock limit per check')
+
+    args = parser.parse_args()
+
+    checker = CodeChecker(SandboxLimits(args.cpu_seconds, args.memory_mb, args.wall_timeout), args.workers)
+    reports = checker.check_run(args.results_dir, args.timestamp)
+    print(f"Code checks completed for {len(reports)} tests", file=sys.stderr)
+
+    if args.format == 'markdown':
+        print(format_for_report(reports))
+    else:
+        print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
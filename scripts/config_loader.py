@@ -7,9 +7,245 @@ Uses only Python standard library and existing dependencies.
 import yaml
 import json
 import os
+import hashlib
+import pickle
+import re
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from content_cache import ContentCache, file_dependency
+from file_windows import read_window
+from preprocessing import run_pipeline
+from prompt_budget import BudgetPolicy, apply_budget, estimate_tokens
+from remote_sources import get_http_client, run_database_query
+from symbol_index import SymbolIndexCache
+from synthetic_data import generate_source
+from tracing import span, traced
+
+REGISTRY_CACHE_DIR = Path(".cache") / "config-registry"
+REGISTRY_CACHE_VERSION = 3
+DEFAULT_SOURCES_FILE = "common-sources.yaml"
+MODELS_FILE = "models.yaml"
+
+
+class ConfigRegistry:
+    """Id-indexed view of every YAML configuration file.
+
+    All category and data source files are parsed once into dictionaries keyed
+    by ID. The compiled registry is persisted to .cache/config-registry/ and
+    reused by later CLI invocations until any file's mtime or size changes, so
+    warm runs skip YAML parsing entirely.
+    """
+
+    _instances: Dict[str, "ConfigRegistry"] = {}
+
+    def __init__(self, config_root: str = "test-configs", use_cache: bool = True):
+        self.config_root = Path(config_root)
+        self.categories_dir = self.config_root / "categories"
+        self.data_sources_dir = self.config_root / "data-sources"
+        self.use_cache = use_cache
+
+        self.categories: Dict[str, Dict[str, Any]] = {}
+        self.category_files: Dict[str, str] = {}
+        self.category_errors: Dict[str, str] = {}
+        self.category_stems: Dict[str, str] = {}
+        self.tests: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.source_files: Dict[str, Dict[str, Any]] = {}
+        self.source_file_errors: Dict[str, str] = {}
+        self.sources: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.models: Dict[str, Any] = {}
+        self.models_error: Optional[str] = None
+        self.cache_hit = False
+
+        self._load()
+
+    @classmethod
+    def get(cls, config_root: str = "test-configs") -> "ConfigRegistry":
+        """Return the process-wide registry for a config root."""
+        key = str(Path(config_root).resolve())
+        if key not in cls._instances:
+            cls._instances[key] = cls(config_root)
+        return cls._instances[key]
+
+    def _config_files(self) -> List[Path]:
+        files = []
+        if self.categories_dir.exists():
+            files.extend(sorted(self.categories_dir.glob("*-tests.yaml")))
+        if self.data_sources_dir.exists():
+            files.extend(sorted(self.data_sources_dir.glob("*.yaml")))
+        if (self.config_root / MODELS_FILE).exists():
+            files.append(self.config_root / MODELS_FILE)
+        return files
+
+    def _fingerprint(self, files: List[Path]) -> List[Tuple[str, int, int]]:
+        fingerprint = []
+        for path in files:
+            stat = path.stat()
+            fingerprint.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return fingerprint
+
+    def _cache_file(self) -> Path:
+        root_key = hashlib.sha256(str(self.config_root.resolve()).encode()).hexdigest()[:16]
+        return REGISTRY_CACHE_DIR / f"{root_key}.pickle"
+
+    @traced("config.registry_load")
+    def _load(self) -> None:
+        files = self._config_files()
+        fingerprint = self._fingerprint(files)
+
+        if self.use_cache:
+            try:
+                with open(self._cache_file(), 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get("version") == REGISTRY_CACHE_VERSION and cached.get("fingerprint") == fingerprint:
+                    self._restore(cached["state"])
+                    self.cache_hit = True
+                    return
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+                pass
+
+        self._parse(files)
+
+        if self.use_cache:
+            self._save(fingerprint)
+
+    def _parse(self, files: List[Path]) -> None:
+        for path in files:
+            if path.parent == self.categories_dir:
+                try:
+                    with open(path, 'r') as f:
+                        config = yaml.safe_load(f)
+                except Exception as e:
+                    self.category_errors[path.name] = str(e)
+                    continue
+                if isinstance(config, dict) and 'category' in config and 'id' in config['category']:
+                    category_id = config['category']['id']
+                else:
+                    # Fallback to filename-based extraction
+                    category_id = path.stem.replace("-tests", "")
+                self.categories[category_id] = config
+                self.category_files[category_id] = str(path)
+            elif path.parent == self.config_root:
+                try:
+                    with open(path, 'r') as f:
+                        self.models = yaml.safe_load(f) or {}
+                except Exception as e:
+                    self.models_error = str(e)
+            else:
+                try:
+                    with open(path, 'r') as f:
+                        config = yaml.safe_load(f)
+                except Exception as e:
+                    self.source_file_errors[path.name] = str(e)
+                    continue
+                self.source_files[path.name] = config
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        self.category_stems = {Path(path).stem.replace("-tests", ""): category_id
+                               for category_id, path in self.category_files.items()}
+        self.tests = {}
+        for category_id, config in self.categories.items():
+            for test in (config or {}).get("tests", []) or []:
+                if isinstance(test, dict) and "id" in test:
+                    self.tests[(category_id, test["id"])] = test
+        self.sources = {}
+        for file_name, config in self.source_files.items():
+            self.sources[file_name] = {
+                src["id"]: src for src in (config or {}).get("data_sources", []) or []
+                if isinstance(src, dict) and "id" in src
+            }
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "categories": self.categories,
+            "category_files": self.category_files,
+            "category_errors": self.category_errors,
+            "source_files": self.source_files,
+            "source_file_errors": self.source_file_errors,
+            "models": self.models,
+            "models_error": self.models_error,
+        }
+
+    def _restore(self, state: Dict[str, Any]) -> None:
+        for key, value in state.items():
+            setattr(self, key, value)
+        self._build_indexes()
+
+    def _save(self, fingerprint: List[Tuple[str, int, int]]) -> None:
+        cache_file = self._cache_file()
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        except OSError:
+            return  # Caching is an optimisation; read-only checkouts still work
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({
+                    "version": REGISTRY_CACHE_VERSION,
+                    "fingerprint": fingerprint,
+                    "state": self._state(),
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_file)
+        except (OSError, pickle.PicklingError):
+            # Never leave a half-written pickle behind for the next process to trip over
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def shared_source_order(self) -> List[str]:
+        """Canonical data source order for the shared_prefix layout.
+        
+        Sources referenced by more tests come first (ties by ID), so the most
+        widely shared content forms the common start of the most prompts.
+        """
+        usage: Dict[str, int] = {}
+        for test in self.tests.values():
+            for source_id in set(PLACEHOLDER_RE.findall(test.get("prompt_template", ""))):
+                usage[source_id] = usage.get(source_id, 0) + 1
+        return sorted(usage, key=lambda s: (-usage[s], s))
+    
+    def prefix_sharing_order(self, category_id: str) -> List[str]:
+        """Test IDs of a category ordered so consecutive prompts share the longest prefixes.
+        
+        Each test is keyed by the canonical ranks of the sources it uses; sorting
+        the keys walks them like a trie, so tests whose source lists start the
+        same way run back to back. Ties keep file order.
+        """
+        rank = {source_id: i for i, source_id in enumerate(self.shared_source_order())}
+        tests = [t for t in (self.categories.get(category_id) or {}).get("tests", []) or []
+                 if isinstance(t, dict) and "id" in t]
+        def key(test: Dict[str, Any]) -> Tuple[int, ...]:
+            return tuple(sorted(rank[s] for s in set(PLACEHOLDER_RE.findall(test.get("prompt_template", "")))))
+        return [t["id"] for t in sorted(tests, key=key)]
+    
+    def category_ids(self) -> List[str]:
+        """All category IDs, including filename fallbacks for unparseable files."""
+        ids = set(self.categories)
+        ids.update(Path(name).stem.replace("-tests", "") for name in self.category_errors)
+        return sorted(ids)
+
+    def resolve_category_id(self, name: str) -> str:
+        """Declared category ID for a `<name>-tests.yaml` file, else the name itself.
+
+        Like the original file lookup, the filename wins, so `data-analysis`
+        finds data-analysis-tests.yaml whatever ID it declares.
+        """
+        return self.category_stems.get(name, name)
+
+    def get_test(self, category_id: str, test_id: str) -> Optional[Dict[str, Any]]:
+        """O(1) lookup of a test definition by category ID or filename."""
+        return self.tests.get((self.resolve_category_id(category_id), test_id))
+
+    def get_data_source(self, source_id: str, source_file: str = DEFAULT_SOURCES_FILE) -> Optional[Dict[str, Any]]:
+        """O(1) lookup of a data source definition by ID."""
+        return self.sources.get(source_file, {}).get(source_id)
+
 
 class ConfigLoader:
     """Load and validate test configurations from YAML files."""
@@ -19,77 +255,56 @@ class ConfigLoader:
         self.categories_dir = self.config_root / "categories"
         self.data_sources_dir = self.config_root / "data-sources"
         self.schemas_dir = self.config_root / "schemas"
+        self.registry = ConfigRegistry.get(config_root)
     
     def load_test_category(self, category_id: str) -> Dict[str, Any]:
         """Load a test category configuration."""
-        # First try the direct mapping
-        config_file = self.categories_dir / f"{category_id}-tests.yaml"
-        
-        # If direct mapping doesn't work, search for the correct file
-        if not config_file.exists():
-            config_file = self._find_category_file(category_id)
-            if not config_file:
-                raise FileNotFoundError(f"Test category config not found for ID: {category_id}")
+        config = self.registry.categories.get(self.registry.resolve_category_id(category_id))
         
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
+        if config is None:
+            error = self.registry.category_errors.get(f"{category_id}-tests.yaml")
+            if error:
+                raise ValueError(f"Invalid YAML in category config {category_id}: {error}")
+            raise FileNotFoundError(f"Test category config not found for ID: {category_id}")
         
         # Validate basic structure
         self._validate_category_config(config)
         return config
     
-    def _find_category_file(self, category_id: str) -> Optional[Path]:
-        """Find the YAML file that contains the given category ID."""
-        for yaml_file in self.categories_dir.glob("*-tests.yaml"):
-            try:
-                with open(yaml_file, 'r') as f:
-                    config = yaml.safe_load(f)
-                    if 'category' in config and 'id' in config['category']:
-                        if config['category']['id'] == category_id:
-                            return yaml_file
-            except Exception:
-                continue
-        return None
-    
-    def load_data_sources(self, source_file: str = "common-sources.yaml") -> Dict[str, Any]:
+    def get_test(self, category_id: str, test_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a single test definition by category and test ID."""
+        return self.registry.get_test(category_id, test_id)
+    
+    def load_data_sources(self, source_file: str = DEFAULT_SOURCES_FILE) -> Dict[str, Any]:
         """Load data source configurations."""
-        config_file = self.data_sources_dir / source_file
-        
-        if not config_file.exists():
-            raise FileNotFoundError(f"Data sources config not found: {config_file}")
-        
-        with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
+        if source_file not in self.registry.source_files:
+            error = self.registry.source_file_errors.get(source_file)
+            if error:
+                raise ValueError(f"Invalid YAML in data sources config {source_file}: {error}")
+            raise FileNotFoundError(f"Data sources config not found: {self.data_sources_dir / source_file}")
         
-        return config
+        return self.registry.source_files[source_file]
     
-    def get_available_categories(self) -> List[str]:
-        """Get list of available test categories."""
+    def get_available_categories(self, exclude_benchmarks: bool = False) -> List[str]:
+        """Get list of available test categories.
+        
+        Benchmark categories (`benchmark: true`) measure performance rather
+        than capability and can be left out of "all tests" runs.
+        """
         if not self.categories_dir.exists():
             return []
         
-        categories = []
-        for yaml_file in self.categories_dir.glob("*-tests.yaml"):
-            try:
-                # Load the YAML file to get the actual category ID
-                with open(yaml_file, 'r') as f:
-                    config = yaml.safe_load(f)
-                    if 'category' in config and 'id' in config['category']:
-                        category_id = config['category']['id']
-                        categories.append(category_id)
-                    else:
-                        # Fallback to filename-based extraction
-                        category_id = yaml_file.stem.replace("-tests", "")
-                        categories.append(category_id)
-            except Exception:
-                # If YAML loading fails, fall back to filename-based extraction
-                category_id = yaml_file.stem.replace("-tests", "")
-                categories.append(category_id)
-        
-        return sorted(categories)
+        categories = self.registry.category_ids()
+        if exclude_benchmarks:
+            categories = [c for c in categories
+                          if not self.registry.categories.get(c, {}).get("category", {}).get("benchmark")]
+        return categories
     
     def _validate_category_config(self, config: Dict[str, Any]) -> None:
         """Basic validation of category configuration."""
+        if not isinstance(config, dict):
+            raise ValueError("Category config must be a mapping")
+        
         required_fields = ["category", "tests"]
         for field in required_fields:
             if field not in config:
@@ -110,20 +325,61 @@ class ConfigLoader:
 class DataSourceProcessor:
     """Process data sources according to their type."""
     
-    def __init__(self, project_root: str = "."):
+    def __init__(self, project_root: str = ".", registry: Optional[ConfigRegistry] = None,
+                 content_cache: Optional[ContentCache] = None):
         self.project_root = Path(project_root)
+        self.registry = registry or ConfigRegistry.get()
+        self.content_cache = content_cache or ContentCache()
+        self.symbol_indexes = SymbolIndexCache(self.content_cache)
         self._cache = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+    
+    def _cache_key(self, source_config: Dict[str, Any]) -> str:
+        """Stable key for a source definition (hash() is randomised per process)."""
+        definition = json.dumps(source_config, sort_keys=True, default=str)
+        return f"{source_config['id']}:{hashlib.sha256(definition.encode()).hexdigest()[:16]}"
+    
+    def _dependencies(self, source_config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Files a source is derived from, or None if it should not be persisted."""
+        if "file" in source_config:
+            path = self.project_root / source_config["file"]
+        elif source_config["type"] == "database_query" and "path" in source_config.get("database", {}):
+            path = self.project_root / source_config["database"]["path"]
+        elif source_config["type"] in ("database_query", "api_call", "synthetic"):
+            return []  # Remote or generated data: expires by cache_ttl only
+        else:
+            return None
+        dependency = file_dependency(path)
+        return [dependency] if dependency else None
     
     def process_data_source(self, source_config: Dict[str, Any]) -> str:
         """Process a data source and return its content."""
-        source_id = source_config["id"]
-        source_type = source_config["type"]
-        
-        # Check cache first
-        cache_key = f"{source_id}_{hash(str(source_config))}"
+        # Check the in-process cache, then the persistent cache
+        cache_key = self._cache_key(source_config)
         if cache_key in self._cache:
             return self._cache[cache_key]
         
+        # Threads asking for the same source wait for one resolution
+        with self._locks_lock:
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+        with key_lock:
+            if cache_key in self._cache:
+                return self._cache[cache_key]
+            return self._resolve(source_config, cache_key)
+    
+    @traced("data_source.resolve", describe=lambda self, config, _key: {"id": config.get("id"), "type": config["type"]})
+    def _resolve(self, source_config: Dict[str, Any], cache_key: str) -> str:
+        source_type = source_config["type"]
+        ttl = source_config.get("cache_ttl", 0)
+        # multi_source results are cheap to reassemble from their cached parts
+        persist = ttl > 0 and source_type != "multi_source"
+        if persist:
+            content = self.content_cache.get(cache_key)
+            if content is not None:
+                self._cache[cache_key] = content
+                return content
+        
         content = ""
         
         if source_type == "file_content":
@@ -132,50 +388,69 @@ class DataSourceProcessor:
             content = self._extract_file_content(source_config)
         elif source_type == "multi_source":
             content = self._combine_multi_sources(source_config)
+        elif source_type == "database_query":
+            content = self._query_database(source_config)
+        elif source_type == "api_call":
+            content = self._call_api(source_config)
+        elif source_type == "synthetic":
+            content = generate_source(source_config)
         else:
             raise ValueError(f"Unknown data source type: {source_type}")
         
+        if source_config.get("preprocessing") and not content.startswith(("[FILE NOT FOUND", "[ERROR")):
+            content = self._preprocess(source_config, content)
+        
         # Cache the result
         self._cache[cache_key] = content
+        if persist and not content.startswith(("[FILE NOT FOUND", "[ERROR")):
+            dependencies = self._dependencies(source_config)
+            if dependencies is not None:
+                self.content_cache.put(cache_key, content, ttl, dependencies)
         return content
     
     def _load_file_content(self, config: Dict[str, Any]) -> str:
-        """Load complete file content."""
+        """Load complete file content, or a head/tail/sample row window of it."""
         file_path = self.project_root / config["file"]
         
         if not file_path.exists():
             return f"[FILE NOT FOUND: {config['file']}]"
         
         try:
+            if "window" in config:
+                return read_window(file_path, config["window"])
             with open(file_path, 'r') as f:
                 return f.read()
         except Exception as e:
             return f"[ERROR READING FILE: {config['file']} - {str(e)}]"
     
     def _extract_file_content(self, config: Dict[str, Any]) -> str:
-        """Extract specific content from file using sed-like patterns."""
+        """Extract specific content from file by symbol name or sed/grep pattern."""
         file_path = self.project_root / config["file"]
         
         if not file_path.exists():
             return f"[FILE NOT FOUND: {config['file']}]"
         
         try:
-            with open(file_path, 'r') as f:
-                lines = f.readlines()
-            
             extract_config = config["extract"]
             method = extract_config["method"]
-            pattern = extract_config["pattern"]
+            pattern = extract_config.get("pattern", "")
             
-            if method == "sed":
-                return self._sed_extract(lines, pattern)
+            if method == "symbol":
+                return self.symbol_indexes.get(file_path).extract(extract_config["symbol"])
+            elif method == "sed":
+                # Stream lines so reading stops as soon as the range ends
+                with open(file_path, 'r') as f:
+                    return self._sed_extract(f, pattern)
+            elif method == "grep":
+                with open(file_path, 'r') as f:
+                    return self._grep_extract(f, pattern)
             else:
                 raise ValueError(f"Unsupported extraction method: {method}")
                 
         except Exception as e:
             return f"[ERROR EXTRACTING FROM FILE: {config['file']} - {str(e)}]"
     
-    def _sed_extract(self, lines: List[str], pattern: str) -> str:
+    def _sed_extract(self, lines: Iterable[str], pattern: str) -> str:
         """Simulate sed pattern extraction using Python."""
         # Parse sed pattern like "/start/,/end/p"
         if pattern.endswith("/p") and ",/" in pattern:
@@ -201,26 +476,44 @@ class DataSourceProcessor:
         
         raise ValueError(f"Unsupported sed pattern: {pattern}")
     
+    def _preprocess(self, config: Dict[str, Any], content: str) -> str:
+        """Apply the source's preprocessing stages."""
+        try:
+            return run_pipeline(content, config["preprocessing"], self.content_cache, config.get("cache_ttl", 0))
+        except Exception as e:
+            return f"[ERROR PREPROCESSING: {config['id']} - {str(e)}]"
+    
+    def _grep_extract(self, lines: Iterable[str], pattern: str) -> str:
+        """Keep lines matching a regular expression, like grep -E."""
+        regex = re.compile(pattern)
+        return ''.join(line for line in lines if regex.search(line)).rstrip('\n')
+    
+    def _query_database(self, config: Dict[str, Any]) -> str:
+        """Run a database_query source through a pooled connection."""
+        try:
+            return run_database_query(config, self.project_root)
+        except Exception as e:
+            return f"[ERROR QUERYING DATABASE: {config['id']} - {str(e)}]"
+    
+    def _call_api(self, config: Dict[str, Any]) -> str:
+        """Fetch an api_call source over a keep-alive connection."""
+        try:
+            return get_http_client(self.content_cache).fetch(config)
+        except Exception as e:
+            return f"[ERROR CALLING API: {config['id']} - {str(e)}]"
+    
     def _combine_multi_sources(self, config: Dict[str, Any]) -> str:
         """Combine multiple data sources."""
         sources = config.get("sources", [])
         if not sources:
             return "[NO_SOURCES_SPECIFIED]"
         
-        # Load the common sources configuration
         try:
-            # Use ConfigLoader to load data sources
-            config_loader = ConfigLoader()
-            data_sources_config = config_loader.load_data_sources()
             combined_content = []
             
             for source_id in sources:
                 # Find the source config by ID
-                source_config = None
-                for src in data_sources_config.get("data_sources", []):
-                    if src["id"] == source_id:
-                        source_config = src
-                        break
+                source_config = self.registry.get_data_source(source_id)
                 
                 if source_config:
                     content = self.process_data_source(source_config)
@@ -232,72 +525,233 @@ class DataSourceProcessor:
         except Exception as e:
             return f"[ERROR_COMBINING_SOURCES: {str(e)}]"
 
+PLACEHOLDER_RE = re.compile(r"\{data_sources\.([A-Za-z0-9_-]+)\}")
+PROMPT_LAYOUTS = ("template", "shared_prefix")
+SHARED_BLOCK_HEADER = "=== DATA SOURCE: {source_id} ===\n"
+SHARED_REFERENCE = "[data source {source_id}, shown above]"
+
+
+class CompiledTemplate:
+    """A prompt template parsed once into literal text and placeholder segments."""
+    
+    def __init__(self, template: str):
+        self.template = template
+        self.segments: List[Tuple[bool, str]] = []  # (is_placeholder, text or source ID)
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(template):
+            if match.start() > position:
+                self.segments.append((False, template[position:match.start()]))
+            self.segments.append((True, match.group(1)))
+            position = match.end()
+        if position < len(template):
+            self.segments.append((False, template[position:]))
+        self.placeholders = [text for is_placeholder, text in self.segments if is_placeholder]
+    
+    @property
+    def literal_text(self) -> str:
+        return "".join(text for is_placeholder, text in self.segments if not is_placeholder)
+    
+    def occurrences(self, source_id: str) -> int:
+        return self.placeholders.count(source_id)
+    
+    def validate(self, source_ids: List[str]) -> Dict[str, List[str]]:
+        """Placeholders with no declared source, and declared sources never referenced."""
+        declared = set(source_ids)
+        used = set(self.placeholders)
+        return {
+            "unknown": sorted(used - declared),
+            "unused": [s for s in source_ids if s not in used],
+        }
+    
+    def render(self, contents: Dict[str, str]) -> str:
+        """Assemble the prompt in a single join; unknown placeholders are left as-is."""
+        return "".join(
+            contents.get(text, f"{{data_sources.{text}}}") if is_placeholder else text
+            for is_placeholder, text in self.segments
+        )
+    
+    def shared_prefix_literal(self, source_ids: List[str]) -> str:
+        """Literal text of the shared_prefix layout: block headers and source references."""
+        headers = "".join(SHARED_BLOCK_HEADER.format(source_id=s) + "\n\n" for s in source_ids)
+        body = "".join(SHARED_REFERENCE.format(source_id=text) if is_placeholder and text in source_ids
+                       else "" if is_placeholder else text for is_placeholder, text in self.segments)
+        return headers + body
+    
+    def render_shared_prefix(self, contents: Dict[str, str], order: List[str]) -> str:
+        """Data sources first, each once and in `order`, then the instructions referring to them.
+        
+        Prompts that use the same leading sources then start with identical
+        text, so the server can reuse its cached prompt prefix between tests.
+        """
+        used = set(self.placeholders)
+        blocks = [s for s in order if s in used and s in contents]
+        blocks += sorted(s for s in used if s in contents and s not in blocks)
+        prefix = "".join(SHARED_BLOCK_HEADER.format(source_id=s) + contents[s] + "\n\n" for s in blocks)
+        body = "".join(
+            (SHARED_REFERENCE.format(source_id=text) if text in contents else f"{{data_sources.{text}}}")
+            if is_placeholder else text
+            for is_placeholder, text in self.segments
+        )
+        return prefix + body
+
+
+_compiled_templates: Dict[str, CompiledTemplate] = {}
+
+
+def compile_template(template: str) -> CompiledTemplate:
+    """Compile a template, reusing earlier compilations of the same text."""
+    compiled = _compiled_templates.get(template)
+    if compiled is None:
+        compiled = _compiled_templates[template] = CompiledTemplate(template)
+    return compiled
+
+
+def _source_id(source_ref: Any) -> str:
+    return source_ref if isinstance(source_ref, str) else source_ref["id"]
+
+
 class PromptBuilder:
     """Build prompts from templates with data source substitution."""
     
-    def __init__(self, data_processor: DataSourceProcessor):
+    def __init__(self, data_processor: DataSourceProcessor, max_workers: int = 8):
         self.data_processor = data_processor
         self.config_loader = ConfigLoader()
+        self.max_workers = max_workers
+        self.last_budget_report: Optional[Dict[str, Any]] = None
+        self.last_template_issues: Dict[str, List[str]] = {"unknown": [], "unused": []}
     
-    def build_prompt(self, template: str, data_sources: List[Dict[str, Any]]) -> str:
-        """Build a prompt from template with data source substitution."""
-        prompt = template
+    def _resolve_source(self, source_ref: Any) -> str:
+        """Resolve one data source reference to its content."""
+        # Handle both string IDs and dict formats
+        if isinstance(source_ref, str):
+            source_id = source_ref
+            source_config = None
+        else:
+            source_id = source_ref["id"]
+            # For dict format, use as potential inline definition
+            source_config = source_ref
         
-        # Load common data sources config
-        try:
-            common_sources_config = self.config_loader.load_data_sources()
-            common_sources = common_sources_config.get("data_sources", [])
-        except Exception as e:
-            print(f"Warning: Could not load common data sources: {e}")
-            common_sources = []
+        # Find the full source config by ID - check common sources first
+        if not source_config or source_id != source_config.get("id"):
+            source_config = self.config_loader.registry.get_data_source(source_id) or source_config
         
-        # Process each data source and substitute in template
-        for source_ref in data_sources:
-            # Handle both string IDs and dict formats
-            if isinstance(source_ref, str):
-                source_id = source_ref
-                source_config = None
-            else:
-                source_id = source_ref["id"]
-                # For dict format, use as potential inline definition
-                source_config = source_ref
-            
-            # Find the full source config by ID - check common sources first
-            if not source_config or source_id != source_config.get("id"):
-                for src in common_sources:
-                    if src["id"] == source_id:
-                        source_config = src
-                        break
-            
-            # If not found in common sources and no inline definition, create placeholder
-            if not source_config:
-                content = f"[DATA_SOURCE_NOT_FOUND: {source_id}]"
-            else:
-                # Process the source (from common sources or inline)
-                content = self.data_processor.process_data_source(source_config)
-            
-            # Replace template variables like {data_sources.source_id}
-            template_var = f"{{data_sources.{source_id}}}"
-            prompt = prompt.replace(template_var, content)
+        # If not found in common sources and no inline definition, create placeholder
+        if not source_config:
+            return f"[DATA_SOURCE_NOT_FOUND: {source_id}]"
+        
+        # Process the source (from common sources or inline)
+        return self.data_processor.process_data_source(source_config)
+    
+    def build_prompt(self, template: str, data_sources: List[Dict[str, Any]],
+                     budget: Optional[BudgetPolicy] = None, layout: str = "template") -> str:
+        """Build a prompt from template with data source substitution.
         
+        Distinct sources are resolved concurrently. With a budget, sources are
+        trimmed so the prompt fits the model's context window; what was trimmed
+        is recorded in self.last_budget_report. The shared_prefix layout moves
+        the data sources ahead of the instructions (see render_shared_prefix).
+        """
+        prompt, self.last_template_issues, self.last_budget_report = self.build(template, data_sources, budget, layout)
         return prompt
+    
+    @traced("prompt.build")
+    def build(self, template: str, data_sources: List[Dict[str, Any]],
+              budget: Optional[BudgetPolicy] = None,
+              layout: str = "template") -> Tuple[str, Dict[str, List[str]], Optional[Dict[str, Any]]]:
+        """Thread-safe build_prompt: return (prompt, template issues, budget report)."""
+        if layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout: {layout} (expected one of {', '.join(PROMPT_LAYOUTS)})")
+        compiled = compile_template(template)
+        refs: Dict[str, Any] = {}
+        for source_ref in data_sources:
+            refs.setdefault(_source_id(source_ref), source_ref)
+        issues = compiled.validate(list(refs))
+        
+        contents: Dict[str, str] = {}
+        if len(refs) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(refs))) as pool:
+                futures = {source_id: pool.submit(self._resolve_source, ref) for source_id, ref in refs.items()}
+                contents = {source_id: future.result() for source_id, future in futures.items()}
+        else:
+            contents = {source_id: self._resolve_source(ref) for source_id, ref in refs.items()}
+        
+        report = None
+        if budget is not None:
+            occurrences = {source_id: compiled.occurrences(source_id) for source_id in contents}
+            literal_text = compiled.literal_text
+            if layout == "shared_prefix":
+                # Each source appears once, in its block
+                occurrences = {source_id: min(n, 1) for source_id, n in occurrences.items()}
+                literal_text = compiled.shared_prefix_literal([s for s in contents if occurrences[s]])
+            report = apply_budget(estimate_tokens(literal_text), contents, occurrences, budget)
+            report["layout"] = layout
+        
+        if layout == "shared_prefix":
+            return compiled.render_shared_prefix(contents, self.config_loader.registry.shared_source_order()), issues, report
+        return compiled.render(contents), issues, report
+
+def _parse_options(args: List[str], allowed: List[str]) -> Dict[str, str]:
+    """Parse trailing --name value pairs."""
+    options = {}
+    for name, value in zip(args[::2], args[1::2]):
+        if name not in allowed:
+            raise ValueError(f"Unknown option: {name}")
+        options[name] = value
+    if len(args) % 2:
+        raise ValueError(f"Missing value for option: {args[-1]}")
+    return options
+
+def _build_test_prompt(loader: ConfigLoader, prompt_builder: PromptBuilder, test_config: Dict[str, Any],
+                       options: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+    """Build one test's prompt fitted to the model's context; warnings go to stderr."""
+    budget = BudgetPolicy.resolve(
+        loader.registry.models, options.get("--model"),
+        int(options["--num-ctx"]) if "--num-ctx" in options else None, test_config)
+    
+    data_sources = test_config.get("data_sources", [])
+    prompt = prompt_builder.build_prompt(test_config["prompt_template"], data_sources, budget,
+                                         options.get("--layout", "template"))
+    
+    test_id = test_config.get("id")
+    for source_id in prompt_builder.last_template_issues["unknown"]:
+        print(f"Warning: {test_id}: Placeholder {{data_sources.{source_id}}} has no matching data source",
+              file=sys.stderr)
+    
+    report = prompt_builder.last_budget_report
+    if report["trimmed"]:
+        trimmed = ", ".join(f"{t['source']} ({t['kept_ratio']:.0%} kept)" for t in report["trimmed"])
+        print(f"Warning: {test_id}: Prompt trimmed to fit num_ctx={report['num_ctx']}: {trimmed}", file=sys.stderr)
+    return prompt, report
 
 def main():
     """CLI interface for configuration system."""
     if len(sys.argv) < 2:
         print("Usage: python config-loader.py <command> [args...]")
         print("Commands:")
-        print("  list-categories       - List available test categories")
+        print("  list-categories [--exclude-benchmarks]")
+        print("                        - List available test categories")
         print("  load-category <id>    - Load and validate a category config")
-        print("  build-prompt <cat> <test_id> - Build prompt for specific test")
+        print("  build-prompt <cat> <test_id> [--model M] [--num-ctx N] [--budget-report FILE] [--layout L]")
+        print("                        - Build prompt for specific test, fitted to the model's context")
+        print("                          (layout: template, or shared_prefix to put data sources first)")
+        print("  build-prompts <cat> --out-dir DIR [--suffix S] [--model M] [--num-ctx N] [--layout L]")
+        print("                        - Build every prompt of a category in one process, writing")
+        print("                          DIR/.prompt_<test_id>_<S>.txt and DIR/.prompt_budget_<test_id>_<S>.json")
+        print("  order-tests <cat>     - Test IDs ordered so consecutive shared_prefix prompts share prefixes")
+        print("  cache-stats           - Show data source content cache statistics")
+        print("  cache-clear           - Empty the data source content cache")
         sys.exit(1)
     
     command = sys.argv[1]
+    with span(f"config_loader.{command}"):
+        _run_command(command)
+
+def _run_command(command: str) -> None:
     loader = ConfigLoader()
     
     try:
         if command == "list-categories":
-            categories = loader.get_available_categories()
+            categories = loader.get_available_categories("--exclude-benchmarks" in sys.argv[2:])
             print("Available categories:")
             for cat in categories:
                 print(f"  - {cat}")
@@ -318,29 +772,72 @@ def main():
             
             category_id = sys.argv[2]
             test_id = sys.argv[3]
+            options = _parse_options(sys.argv[4:], ["--model", "--num-ctx", "--budget-report", "--layout"])
             
-            config = loader.load_test_category(category_id)
+            loader.load_test_category(category_id)
             
             # Find the specific test
-            test_config = None
-            for test in config["tests"]:
-                if test["id"] == test_id:
-                    test_config = test
-                    break
+            test_config = loader.get_test(category_id, test_id)
             
             if not test_config:
                 print(f"Error: Test {test_id} not found in category {category_id}")
                 sys.exit(1)
             
-            # Build the prompt
-            data_processor = DataSourceProcessor()
-            prompt_builder = PromptBuilder(data_processor)
-            
-            data_sources = test_config.get("data_sources", [])
-            prompt = prompt_builder.build_prompt(test_config["prompt_template"], data_sources)
+            prompt_builder = PromptBuilder(DataSourceProcessor(registry=loader.registry))
+            prompt, report = _build_test_prompt(loader, prompt_builder, test_config, options)
+            if "--budget-report" in options:
+                with open(options["--budget-report"], 'w') as f:
+                    json.dump(report, f, indent=2)
             
             print(prompt)
         
+        elif command == "build-prompts":
+            if len(sys.argv) < 3:
+                print("Error: Category ID required")
+                sys.exit(1)
+            
+            category_id = sys.argv[2]
+            options = _parse_options(sys.argv[3:], ["--out-dir", "--suffix", "--model", "--num-ctx", "--layout"])
+            if "--out-dir" not in options:
+                print("Error: --out-dir required")
+                sys.exit(1)
+            
+            config = loader.load_test_category(category_id)
+            out_dir = Path(options["--out-dir"])
+            suffix = options.get("--suffix", "prompt")
+            
+            # One process for the whole category, so DB pools and keep-alive
+            # connections are shared by every test that needs them
+            prompt_builder = PromptBuilder(DataSourceProcessor(registry=loader.registry))
+            for test_config in config.get("tests", []):
+                test_id = test_config["id"]
+                try:
+                    prompt, report = _build_test_prompt(loader, prompt_builder, test_config, options)
+                except Exception as e:
+                    print(f"Warning: Could not build prompt for {test_id}: {e}", file=sys.stderr)
+                    continue
+                with open(out_dir / f".prompt_budget_{test_id}_{suffix}.json", 'w') as f:
+                    json.dump(report, f, indent=2)
+                with open(out_dir / f".prompt_{test_id}_{suffix}.txt", 'w') as f:
+                    f.write(prompt)
+                print(test_id)
+        
+        elif command == "order-tests":
+            if len(sys.argv) < 3:
+                print("Error: Category ID required")
+                sys.exit(1)
+            
+            loader.load_test_category(sys.argv[2])
+            for test_id in loader.registry.prefix_sharing_order(sys.argv[2]):
+                print(test_id)
+        
+        elif command == "cache-stats":
+            print(json.dumps(ContentCache().stats(), indent=2))
+        
+        elif command == "cache-clear":
+            ContentCache().clear()
+            print("Content cache cleared")
+        
         else:
             print(f"Unknown command: {command}")
             sys.exit(1)
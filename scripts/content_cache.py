@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Persistent content cache for resolved data sources.
+
+Entries live in a single SQLite file under .cache/ so resolved sources survive
+across `config_loader.py` processes and test runs. Each entry honours the
+source's cache_ttl, is invalidated when any file it was derived from changes
+(mtime/size, confirmed by SHA-256), and the total size is bounded with
+least-recently-used eviction. Uses only the Python standard library.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_PATH = Path(".cache") / "content-cache.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+COUNTERS = ("hits", "misses", "expired", "invalidated", "evictions", "writes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    dependencies TEXT NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_dependency(path: Path) -> Optional[Dict[str, Any]]:
+    """Fingerprint of a file an entry was derived from, or None if missing."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return {
+        "path": str(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_sha256(path),
+    }
+
+
+class ContentCache:
+    """SQLite-backed TTL + LRU cache for data source content."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.session = {name: 0 for name in COUNTERS}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.available = True
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and self.available:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                self._conn = conn
+            except (OSError, sqlite3.Error):
+                self.available = False  # Caching is an optimisation; carry on without it
+        return self._conn
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        self.session[name] += 1
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def _dependencies_valid(self, conn: sqlite3.Connection, key: str, dependencies: List[Dict[str, Any]]) -> bool:
+        """Check stored fingerprints; a touched but unchanged file is re-stamped, not invalidated."""
+        refreshed = []
+        for dep in dependencies:
+            path = Path(dep["path"])
+            try:
+                stat = path.stat()
+            except OSError:
+                return False
+            if stat.st_mtime_ns == dep["mtime_ns"] and stat.st_size == dep["size"]:
+                refreshed.append(dep)
+                continue
+            if stat.st_size != dep["size"] or file_sha256(path) != dep["sha256"]:
+                return False
+            refreshed.append({**dep, "mtime_ns": stat.st_mtime_ns})
+        if refreshed != dependencies:
+            conn.execute("UPDATE entries SET dependencies = ? WHERE key = ?", (json.dumps(refreshed), key))
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached content, or None on miss, expiry or invalidation."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT content, dependencies, expires FROM entries WHERE key = ?", (key,)).fetchone()
+                    now = time.time()
+                    if row is None:
+                        self._count(conn, "misses")
+                        return None
+                    content, dependencies, expires = row
+                    if expires <= now:
+                        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        self._count(conn, "expired")
+                        self._count(conn, "misses")
+                        return None
+                    if not self._dependencies_valid(conn, key, json.loads(dependencies)):
+                        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        self._count(conn, "invalidated")
+                        self._count(conn, "misses")
+                        return None
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                    self._count(conn, "hits")
+                    return content
+            except sqlite3.Error:
+                return None
+
+    def put(self, key: str, content: str, ttl: float, dependencies: List[Dict[str, Any]]) -> None:
+        """Store content for ttl seconds, then evict least recently used entries over budget."""
+        size = len(content.encode('utf-8'))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            now = time.time()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, content, size, json.dumps(dependencies), now, now + ttl, now))
+                    self._count(conn, "writes")
+                    self._evict(conn)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count(conn, "evictions")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """Lifetime counters, this process's counters and current occupancy."""
+        with self._lock:
+            conn = self._connect()
+            lifetime = {name: 0 for name in COUNTERS}
+            entries, total = 0, 0
+            if conn is not None:
+                lifetime.update(dict(conn.execute("SELECT name, value FROM counters").fetchall()))
+                entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = lifetime["hits"] + lifetime["misses"]
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(lifetime["hits"] / lookups, 3) if lookups else 0.0,
+            "lifetime": lifetime,
+            "session": dict(self.session),
+        }
+
+    def clear(self) -> None:
+        """Drop all entries and counters."""
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM entries")
+                    conn.execute("DELETE FROM counters")
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Ground-truth verification for data-analysis test outputs.
+
+Computes the exact aggregates a prompt asks for (order counts, revenue,
+average order value, top customers, status breakdown) from the CSV data
+source, extracts the figures claimed in the model's report and scores each
+fact. The source is resolved by DataSourceProcessor exactly as for the prompt,
+so windows, preprocessing and synthetic generators are reflected in the ground
+truth. When the context budget trimmed the source for a run, the model never
+saw all of the data and the check is skipped with a note. Aggregates are
+computed in a single pass and cached by content digest. No API calls.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from config_loader import ConfigLoader, DataSourceProcessor
+from result_utils import attach_automated_metrics, iter_result_files, load_result, output_text, write_json_atomic
+
+METRICS_KEY = "data_facts"
+CACHE_DIR = Path(".cache") / "data-facts"
+CACHE_VERSION = 2
+
+DEFAULT_COLUMNS = {
+    "customer": "customer_name",
+    "quantity": "quantity",
+    "unit_price": "unit_price",
+    "status": "status",
+}
+CANCELLED_STATUSES = {"cancelled", "canceled", "refunded"}
+
+NUMBER_RE = re.compile(r"(?<![\w.])\$?\s?(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(?![\w])")
+HEADING_RE = re.compile(r"^\s*(#{1,6}\s|(\d+\.\s+)?\*\*[^*]+\*\*:?\s*$)")
+
+
+def compute_aggregates(lines: Iterable[str], columns: Dict[str, str]) -> Dict[str, Any]:
+    """Compute order aggregates from CSV lines in one pass; memory grows with distinct customers only."""
+    total_orders = 0
+    gross_revenue = 0.0
+    net_revenue = 0.0
+    net_orders = 0
+    status_counts: Counter = Counter()
+    gross_by_customer: Dict[str, float] = defaultdict(float)
+    net_by_customer: Dict[str, float] = defaultdict(float)
+
+    reader = csv.reader(lines)
+    header = next(reader, [])
+    missing = [name for name in columns.values() if name not in header]
+    if missing:
+        raise ValueError(f"Source is not an orders CSV (missing columns: {', '.join(missing)})")
+    index = {key: header.index(name) for key, name in columns.items()}
+    for row in reader:
+        if not row:
+            continue
+        value = float(row[index["quantity"]]) * float(row[index["unit_price"]])
+        customer = row[index["customer"]]
+        status = row[index["status"]].strip().lower()
+
+        total_orders += 1
+        gross_revenue += value
+        gross_by_customer[customer] += value
+        status_counts[status] += 1
+        if status not in CANCELLED_STATUSES:
+            net_orders += 1
+            net_revenue += value
+            net_by_customer[customer] += value
+
+    def top(by_customer: Dict[str, float], n: int = 3) -> List[List[Any]]:
+        ranked = sorted(by_customer.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+        return [[name, round(value, 2)] for name, value in ranked]
+
+    return {
+        "total_orders": total_orders,
+        "gross_revenue": round(gross_revenue, 2),
+        "net_orders": net_orders,
+        "net_revenue": round(net_revenue, 2),
+        "gross_average_order_value": round(gross_revenue / total_orders, 2) if total_orders else 0.0,
+        "net_average_order_value": round(net_revenue / net_orders, 2) if net_orders else 0.0,
+        "top_customers_gross": top(gross_by_customer),
+        "top_customers_net": top(net_by_customer),
+        "status_breakdown": dict(status_counts),
+    }
+
+
+def load_aggregates(content: str, columns: Dict[str, str]) -> Dict[str, Any]:
+    """Return aggregates for CSV content, reusing the on-disk cache keyed by content digest."""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    columns_key = hashlib.sha256(json.dumps(columns, sort_keys=True).encode()).hexdigest()[:12]
+    cache_file = CACHE_DIR / f"{digest}_{columns_key}.json"
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("version") == CACHE_VERSION:
+                return cached
+        except (json.JSONDecodeError, OSError):
+            pass
+
+    aggregates = compute_aggregates(io.StringIO(content, newline=""), columns)
+    aggregates["version"] = CACHE_VERSION
+    aggregates["digest"] = digest
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(cache_file, aggregates)
+    return aggregates
+
+
+def numbers_in(text: str) -> List[float]:
+    """Extract numeric values (commas, currency symbols and decimals allowed)."""
+    values = []
+    for integer, fraction in NUMBER_RE.findall(text):
+        values.append(float(integer.replace(',', '') + (fraction or '')))
+    return values
+
+
+def lines_mentioning(text: str, keywords: List[str]) -> List[str]:
+    """Lines containing all words of any one keyword phrase (case-insensitive)."""
+    matches = []
+    for line in text.splitlines():
+        lowered = line.lower()
+        if any(all(word in lowered for word in phrase.split()) for phrase in keywords):
+            matches.append(line)
+    return matches
+
+
+def section(text: str, keywords: List[str]) -> str:
+    """Text from the first heading mentioning keywords up to the next heading."""
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        lowered = line.lower()
+        if HEADING_RE.match(line) and all(word in lowered for word in keywords):
+            end = len(lines)
+            for j in range(i + 1, len(lines)):
+                if HEADING_RE.match(lines[j]):
+                    end = j
+                    break
+            return "\n".join(lines[i:end])
+    return text
+
+
+def close(claimed: float, expected: float, rel_tol: float = 0.005, abs_tol: float = 0.01) -> bool:
+    return abs(claimed - expected) <= max(abs_tol, rel_tol * abs(expected))
+
+
+def check_numeric(text: str, keywords: List[str], accepted: List[float], exact: bool = False) -> Dict[str, Any]:
+    """Score a numeric fact: correct if a keyword line states any accepted value."""
+    candidates = []
+    for line in lines_mentioning(text, keywords):
+        candidates.extend(numbers_in(line))
+    match = next((c for c in candidates if any(
+        (c == a) if exact else close(c, a) for a in accepted)), None)
+    return {
+        "expected": accepted[0] if len(accepted) == 1 else accepted,
+        "claimed": match if match is not None else (candidates[0] if candidates else None),
+        "score": 1.0 if match is not None else 0.0,
+    }
+
+
+def check_top_customers(text: str, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """Fraction of the top customers named in the report's top-customer section."""
+    scope = section(text, ["top", "customer"]).lower()
+    best = {"expected": [], "found": [], "score": 0.0}
+    for key in ("top_customers_gross", "top_customers_net"):
+        expected = [name for name, _ in aggregates[key]]
+        found = [name for name in expected if name.lower() in scope]
+        score = len(found) / len(expected) if expected else 0.0
+        if score > best["score"] or not best["expected"]:
+            best = {"expected": expected, "found": found, "score": round(score, 3)}
+    return best
+
+
+def check_status_breakdown(text: str, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """Fraction of statuses whose count is stated on a line naming that status."""
+    per_status = {}
+    for status, count in aggregates["status_breakdown"].items():
+        claimed = []
+        for line in lines_mentioning(text, [status]):
+            claimed.extend(numbers_in(line))
+        per_status[status] = {"expected": count, "correct": count in claimed}
+    correct = sum(1 for s in per_status.values() if s["correct"])
+    return {
+        "expected": aggregates["status_breakdown"],
+        "per_status": per_status,
+        "score": round(correct / len(per_status), 3) if per_status else 0.0,
+    }
+
+
+FACT_CHECKS = {
+    "total_orders": lambda text, agg: check_numeric(
+        text, ["total orders", "number of orders", "orders placed", "order count"],
+        [agg["total_orders"], agg["net_orders"]], exact=True),
+    "total_revenue": lambda text, agg: check_numeric(
+        text, ["revenue", "total sales", "sales total"], [agg["gross_revenue"], agg["net_revenue"]]),
+    "average_order_value": lambda text, agg: check_numeric(
+        text, ["average order", "aov", "avg order", "mean order"],
+        [agg["gross_average_order_value"], agg["net_average_order_value"]]),
+    "top_customers": check_top_customers,
+    "status_breakdown": check_status_breakdown,
+}
+
+
+class DataVerifier:
+    """Run configured data_facts checks for the results of a test run."""
+
+    def __init__(self, project_root: str = "."):
+        self.project_root = Path(project_root)
+        self.config_loader = ConfigLoader()
+        self.data_processor = DataSourceProcessor(project_root, registry=self.config_loader.registry)
+
+    def _test_config(self, category_id: str, test_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a test definition by category and test ID."""
+        return self.config_loader.get_test(category_id, test_id)
+
+    def _source_content(self, source_id: str, test_config: Dict[str, Any]) -> str:
+        """Resolve a source the way the prompt builder did (common sources first, then inline)."""
+        src = self.config_loader.registry.get_data_source(source_id)
+        if not src:
+            src = next((ref for ref in test_config.get("data_sources", [])
+                        if isinstance(ref, dict) and ref.get("id") == source_id), None)
+        if not src:
+            raise ValueError(f"Data source not found: {source_id}")
+        return self.data_processor.process_data_source(src)
+
+    def verify(self, result: Dict[str, Any], check: Dict[str, Any],
+               test_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Score every configured fact for one result."""
+        budget = result.get("input", {}).get("prompt_budget") or {}
+        trimmed = next((t for t in budget.get("trimmed") or [] if t.get("source") == check["source"]), None)
+        if trimmed:
+            # Facts about the full source cannot be expected from a partial view of it
+            return {
+                "source": check["source"],
+                "status": "skipped",
+                "note": f"source trimmed to fit the context window ({trimmed.get('kept_ratio', 0) * 100:.0f}% kept)",
+            }
+
+        content = self._source_content(check["source"], test_config or {})
+        columns = {**DEFAULT_COLUMNS, **check.get("columns", {})}
+        aggregates = load_aggregates(content, columns)
+        text = output_text(result)
+
+        facts = {}
+        for fact in check.get("facts", list(FACT_CHECKS)):
+            if fact not in FACT_CHECKS:
+                raise ValueError(f"Unknown fact: {fact}")
+            facts[fact] = FACT_CHECKS[fact](text, aggregates)
+
+        accuracy = sum(f["score"] for f in facts.values()) / len(facts) if facts else 0.0
+        return {
+            "source": check["source"],
+            "status": "checked",
+            "source_digest": aggregates["digest"],
+            "facts": facts,
+            "accuracy": round(accuracy, 3),
+        }
+
+    def verify_run(self, results_dir: str, timestamp: str) -> Dict[str, Dict[str, Any]]:
+        """Verify every configured result of a run, attaching metrics to each file."""
+        reports = {}
+        for path in iter_result_files(results_dir, timestamp):
+            try:
+                result = load_result(path)
+            except json.JSONDecodeError:
+                continue
+            test_case = result.get("test_case", {})
+            test_config = self._test_config(test_case.get("category", ""), test_case.get("id", ""))
+            check = (test_config or {}).get("automated_check") or {}
+            if check.get("type") != METRICS_KEY:
+                continue
+            try:
+                report = self.verify(result, check, test_config)
+            except (ValueError, OSError, KeyError) as e:
+                print(f"Warning: Data verification failed for {path.name}: {e}", file=sys.stderr)
+                continue
+            attach_automated_metrics(path, METRICS_KEY, report)
+            reports[test_case["id"]] = report
+        return reports
+
+
+def format_for_report(reports: Dict[str, Dict[str, Any]]) -> str:
+    """Format data verification results for inclusion in markdown reports."""
+    lines = [
+        "## Automated Data Verification",
+        "*Figures in the model output compared against values computed from the source data*",
+        "",
+        "| Test ID | Source | Fact Accuracy | Facts Correct |",
+        "|---------|--------|---------------|---------------|",
+    ]
+    for test_id in sorted(reports):
+        r = reports[test_id]
+        if r.get("status") == "skipped":
+            lines.append(f"| {test_id} | {r['source']} | - | skipped: {r['note']} |")
+            continue
+        correct = [name for name, fact in r["facts"].items() if fact["score"] >= 1.0]
+        lines.append(f"| {test_id} | {r['source']} | {r['accuracy'] * 100:.0f}% | "
+                     f"{', '.join(correct) if correct else 'none'} |")
+    if not reports:
+        lines.append("| - | No tests with automated data verification | - | - |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ground-truth verification for data-analysis outputs')
+    parser.add_argument('--timestamp', required=True, help='Test run timestamp (e.g. 20250615_081047)')
+    parser.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+    parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format (default: json)')
+
+    args = parser.parse_args()
+
+    reports = DataVerifier().verify_run(args.results_dir, args.timestamp)
+    print(f"Data verification completed for {len(reports)} tests", file=sys.stderr)
+
+    if args.format == 'markdown':
+        print(format_for_report(reports))
+    else:
+        print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory readers for large data source files.
+
+Row windows (head, tail, random sample) are taken from CSV and other
+line-oriented files without loading them: head streams from the start, tail
+scans a memory map backwards from the end, and sample uses seeded reservoir
+sampling in a single streaming pass. Memory is proportional to the window,
+not the file. Uses only the Python standard library.
+"""
+
+import mmap
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+WINDOW_MODES = ("head", "tail", "sample")
+
+
+def _open_text(path: Path):
+    return open(path, 'r', encoding='utf-8', errors='replace', newline='')
+
+
+def _ensure_newline(line: str) -> str:
+    return line if line.endswith('\n') else line + '\n'
+
+
+def read_head(path: Path, rows: int, header: bool = True) -> str:
+    """First `rows` data rows (plus the header line)."""
+    lines: List[str] = []
+    with _open_text(path) as f:
+        if header:
+            first = f.readline()
+            if first:
+                lines.append(first)
+        for line in f:
+            if rows <= 0:
+                break
+            lines.append(line)
+            rows -= 1
+    return ''.join(_ensure_newline(line) for line in lines)
+
+
+def read_tail(path: Path, rows: int, header: bool = True) -> str:
+    """Last `rows` data rows (plus the header line), found by scanning backwards."""
+    size = path.stat().st_size
+    if size == 0:
+        return ''
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_end = (mm.find(b'\n') + 1 or size) if header else 0
+        end = size - 1 if mm[size - 1:size] == b'\n' else size  # Ignore the final newline
+        body_start = size if rows <= 0 else header_end
+        for _ in range(max(rows, 0)):
+            newline = mm.rfind(b'\n', header_end, end)
+            if newline < 0:
+                body_start = header_end  # Fewer rows than requested
+                break
+            body_start = newline + 1
+            end = newline
+        head = mm[:header_end].decode('utf-8', errors='replace')
+        body = mm[body_start:size].decode('utf-8', errors='replace')
+    return (_ensure_newline(head) if head else '') + (_ensure_newline(body) if body else '')
+
+
+def read_sample(path: Path, rows: int, header: bool = True, seed: int = 0) -> str:
+    """Uniform random sample of `rows` data rows in file order (reservoir sampling)."""
+    rng = random.Random(seed)
+    reservoir: List[tuple] = []
+    first = ''
+    with _open_text(path) as f:
+        if header:
+            first = f.readline()
+        for index, line in enumerate(f):
+            if index < rows:
+                reservoir.append((index, line))
+            else:
+                slot = rng.randint(0, index)
+                if slot < rows:
+                    reservoir[slot] = (index, line)
+    reservoir.sort()
+    return ''.join(_ensure_newline(line) for line in ([first] if first else []) + [line for _, line in reservoir])
+
+
+def read_window(path: Path, window: Dict[str, Any]) -> str:
+    """Dispatch a `window` data source option to the matching reader."""
+    mode = window.get("mode", "head")
+    rows = int(window.get("rows", 100))
+    header = bool(window.get("header", True))
+    if mode == "head":
+        return read_head(path, rows, header)
+    if mode == "tail":
+        return read_tail(path, rows, header)
+    if mode == "sample":
+        return read_sample(path, rows, header, int(window.get("seed", 0)))
+    raise ValueError(f"Unsupported window mode: {mode} (expected one of {', '.join(WINDOW_MODES)})")
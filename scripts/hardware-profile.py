@@ -4,57 +4,88 @@
 Hardware Profile Script for Ollama Testing Framework
 Collects system hardware information for test environment documentation.
 Cross-platform support for macOS, Linux, and Windows.
+
+The external probes (nvidia-smi, lspci, system_profiler, ollama --version) run
+concurrently. Their results and the other static hardware fields are cached
+in .cache/hardware-profile.json, keyed by boot time and the installed probe
+binaries. Warm runs then refresh only the dynamic fields (available memory,
+disk usage, current CPU frequency).
 """
 
 import psutil
 import platform
 import json
+import shutil
 import sys
 import subprocess
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+PROFILE_CACHE_FILE = Path(".cache") / "hardware-profile.json"
+PROFILE_CACHE_VERSION = 1
+
+# External commands the profile is built from: name -> (command, timeout in seconds, platform or None for all)
+PROBES = {
+    "nvidia_smi": (['nvidia-smi', '--query-gpu=name,memory.total', '--format=csv,noheader,nounits'], 5, None),
+    "system_profiler": (['system_profiler', 'SPDisplaysDataType', '-json'], 10, "darwin"),
+    "lspci": (['lspci'], 5, "linux"),
+    "ollama_version": (['ollama', '--version'], 5, None),
+}
+
+
+def run_probe(command, timeout):
+    """Run a probe command; return its stdout, or None if it is missing or fails."""
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def run_probes():
+    """Run this platform's probes concurrently; wall time is the slowest probe, not the sum."""
+    system = platform.system().lower()
+    probes = {name: spec for name, spec in PROBES.items() if spec[2] in (None, system)}
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        futures = {name: pool.submit(run_probe, command, timeout)
+                   for name, (command, timeout, _) in probes.items()}
+        return {name: future.result() for name, future in futures.items()}
 
-def get_gpu_info():
+
+def get_gpu_info(probes):
     """
     Detect GPU information across different platforms and vendors.
+    Parses the output of the probe commands (see run_probes).
     Returns a list of detected GPUs with their properties.
     """
     gpus = []
     
     # Try different methods to detect GPUs
     try:
-        # Method 1: Try nvidia-smi for NVIDIA GPUs
-        try:
-            result = subprocess.run(['nvidia-smi', '--query-gpu=name,memory.total', '--format=csv,noheader,nounits'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                for line in lines:
-                    if line.strip():
-                        parts = line.split(', ')
-                        if len(parts) >= 2:
-                            gpus.append({
-                                "type": "discrete",
-                                "vendor": "NVIDIA",
-                                "name": parts[0].strip(),
-                                "memory_mb": int(parts[1].strip()),
-                                "driver": "CUDA"
-                            })
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError):
-            pass
+        # Method 1: nvidia-smi for NVIDIA GPUs
+        if probes.get("nvidia_smi"):
+            lines = probes["nvidia_smi"].strip().split('\n')
+            for line in lines:
+                if line.strip():
+                    parts = line.split(', ')
+                    if len(parts) >= 2:
+                        gpus.append({
+                            "type": "discrete",
+                            "vendor": "NVIDIA",
+                            "name": parts[0].strip(),
+                            "memory_mb": int(parts[1].strip()),
+                            "driver": "CUDA"
+                        })
         
         # Method 2: Platform-specific detection
         system = platform.system().lower()
         
         if system == "darwin":  # macOS
             try:
-                # Use system_profiler for macOS GPU detection
-                result = subprocess.run(['system_profiler', 'SPDisplaysDataType', '-json'], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    import json
-                    data = json.loads(result.stdout)
+                # system_profiler output for macOS GPU detection
+                if probes.get("system_profiler"):
+                    data = json.loads(probes["system_profiler"])
                     displays = data.get('SPDisplaysDataType', [])
                     
                     for display in displays:
@@ -120,10 +151,9 @@ def get_gpu_info():
                 
         elif system == "linux":
             try:
-                # Use lspci for Linux GPU detection
-                result = subprocess.run(['lspci'], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    lines = result.stdout.split('\n')
+                # lspci output for Linux GPU detection
+                if probes.get("lspci"):
+                    lines = probes["lspci"].split('\n')
                     for line in lines:
                         if 'VGA' in line or 'Display' in line:
                             # Parse GPU info from lspci output
@@ -161,7 +191,7 @@ def get_gpu_info():
     return gpus
 
 
-def get_ollama_info():
+def get_ollama_info(probes):
     """
     Detect Ollama installation and acceleration info.
     """
@@ -172,11 +202,10 @@ def get_ollama_info():
     }
     
     try:
-        # Check if ollama is installed
-        result = subprocess.run(['ollama', '--version'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
+        # Check if ollama is installed (`ollama --version` probe)
+        if probes.get("ollama_version") is not None:
             ollama_info["installed"] = True
-            ollama_info["version"] = result.stdout.strip()
+            ollama_info["version"] = probes["ollama_version"].strip()
             
             # Try to detect acceleration method
             system = platform.system().lower()
@@ -188,30 +217,98 @@ def get_ollama_info():
                 else:
                     ollama_info["acceleration"] = "CPU (Intel Mac)"
             elif system == "linux":
-                # On Linux, check for CUDA availability
-                try:
-                    cuda_result = subprocess.run(['nvidia-smi'], capture_output=True, timeout=3)
-                    if cuda_result.returncode == 0:
-                        ollama_info["acceleration"] = "CUDA (NVIDIA)"
-                    else:
-                        ollama_info["acceleration"] = "CPU"
-                except:
+                # On Linux, check for CUDA availability (nvidia-smi already ran as a GPU probe)
+                if probes.get("nvidia_smi") is not None:
+                    ollama_info["acceleration"] = "CUDA (NVIDIA)"
+                else:
                     ollama_info["acceleration"] = "CPU"
             else:
                 ollama_info["acceleration"] = "Unknown"
     
-    except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError):
+    except (AttributeError, TypeError):
         pass
     
     return ollama_info
 
 
-def get_hardware_profile():
+def _binary_fingerprint(name):
+    """Resolved path, size and mtime of an executable on PATH; changes when it is upgraded."""
+    path = shutil.which(name)
+    if not path:
+        return None
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def static_cache_key():
+    """Identity of the static profile: hardware and drivers change only across reboots or upgrades."""
+    return {
+        "version": PROFILE_CACHE_VERSION,
+        "boot_time": round(psutil.boot_time()),
+        "python": sys.version,
+        "binaries": {name: _binary_fingerprint(command[0]) for name, (command, _, _) in PROBES.items()},
+    }
+
+
+def collect_static_profile():
+    """Profile fields that do not change while the machine is up."""
+    probes = run_probes()
+    try:
+        cpu_freq = psutil.cpu_freq()
+    except Exception:
+        cpu_freq = None
+    return {
+        "system": {
+            "os": platform.system(),
+            "os_version": platform.version(),
+            "platform": platform.platform(),
+            "architecture": platform.machine(),
+            "processor": platform.processor(),
+            "python_version": platform.python_version()
+        },
+        "cpu": {
+            "physical_cores": psutil.cpu_count(logical=False),
+            "logical_cores": psutil.cpu_count(logical=True),
+            "max_frequency_mhz": round(cpu_freq.max, 1) if cpu_freq and cpu_freq.max else None
+        },
+        "memory_total_gb": round(psutil.virtual_memory().total / (1024**3), 2),
+        "gpu": get_gpu_info(probes),
+        "ollama": get_ollama_info(probes),
+    }
+
+
+def load_static_profile(use_cache=True, refresh=False):
+    """Static profile from the cache if it matches this boot and these binaries, else collected fresh."""
+    key = static_cache_key()
+    if use_cache and not refresh:
+        try:
+            with open(PROFILE_CACHE_FILE, 'r') as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                return cached["profile"]
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    static = collect_static_profile()
+    if use_cache:
+        try:
+            PROFILE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = PROFILE_CACHE_FILE.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"key": key, "profile": static}, f)
+            os.replace(tmp_path, PROFILE_CACHE_FILE)
+        except OSError:
+            pass
+    return static
+
+
+def get_hardware_profile(use_cache=True, refresh=False):
     """
     Collect comprehensive hardware information.
+    Static fields come from the profile cache; dynamic fields are always read live.
     """
-    # Collect GPU info first to determine messaging
-    gpu_info = get_gpu_info()
+    static = load_static_profile(use_cache, refresh)
+    gpu_info = static["gpu"]
     
     # Determine GPU detection level for console messaging
     gpu_detection_level = "basic"
@@ -230,44 +327,38 @@ def get_hardware_profile():
     else:
         print("Basic GPU detection only - detailed specs available for Apple Silicon and NVIDIA systems", file=sys.stderr)
     
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
     profile = {
         "timestamp": psutil.boot_time(),
-        "system": {
-            "os": platform.system(),
-            "os_version": platform.version(),
-            "platform": platform.platform(),
-            "architecture": platform.machine(),
-            "processor": platform.processor(),
-            "python_version": platform.python_version()
-        },
+        "system": static["system"],
         "cpu": {
-            "physical_cores": psutil.cpu_count(logical=False),
-            "logical_cores": psutil.cpu_count(logical=True),
+            "physical_cores": static["cpu"]["physical_cores"],
+            "logical_cores": static["cpu"]["logical_cores"],
             "current_frequency_mhz": None,
-            "max_frequency_mhz": None
+            "max_frequency_mhz": static["cpu"]["max_frequency_mhz"]
         },
         "memory": {
-            "total_gb": round(psutil.virtual_memory().total / (1024**3), 2),
-            "available_gb": round(psutil.virtual_memory().available / (1024**3), 2),
-            "used_gb": round(psutil.virtual_memory().used / (1024**3), 2),
-            "percentage_used": psutil.virtual_memory().percent
+            "total_gb": static["memory_total_gb"],
+            "available_gb": round(memory.available / (1024**3), 2),
+            "used_gb": round(memory.used / (1024**3), 2),
+            "percentage_used": memory.percent
         },
         "disk": {
-            "total_gb": round(psutil.disk_usage('/').total / (1024**3), 2),
-            "free_gb": round(psutil.disk_usage('/').free / (1024**3), 2),
-            "used_gb": round(psutil.disk_usage('/').used / (1024**3), 2)
+            "total_gb": round(disk.total / (1024**3), 2),
+            "free_gb": round(disk.free / (1024**3), 2),
+            "used_gb": round(disk.used / (1024**3), 2)
         },
         "gpu": gpu_info,
-        "ollama": get_ollama_info(),
+        "ollama": static["ollama"],
         "_gpu_detection_level": gpu_detection_level  # Store for report formatting
     }
     
-    # Try to get CPU frequency info
+    # Current CPU frequency is dynamic
     try:
         cpu_freq = psutil.cpu_freq()
-        if cpu_freq:
-            profile["cpu"]["current_frequency_mhz"] = round(cpu_freq.current, 1) if cpu_freq.current else None
-            profile["cpu"]["max_frequency_mhz"] = round(cpu_freq.max, 1) if cpu_freq.max else None
+        if cpu_freq and cpu_freq.current:
+            profile["cpu"]["current_frequency_mhz"] = round(cpu_freq.current, 1)
     except:
         pass
     
@@ -357,6 +448,8 @@ def main():
                        help='Output format (default: json)')
     parser.add_argument('--output', '-o', type=str, help='Output file path (optional)')
     parser.add_argument('--from-file', type=str, help='Read profile from existing JSON file instead of collecting new data')
+    parser.add_argument('--refresh', action='store_true', help='Re-probe the hardware and rewrite the profile cache')
+    parser.add_argument('--no-cache', action='store_true', help='Neither read nor write the profile cache')
     
     args = parser.parse_args()
     
@@ -369,7 +462,7 @@ def main():
             print(f"Error reading hardware profile from {args.from_file}: {e}", file=sys.stderr)
             sys.exit(1)
     else:
-        profile = get_hardware_profile()
+        profile = get_hardware_profile(use_cache=not args.no_cache, refresh=args.refresh)
     
     # Clean up internal fields before output
     if "_gpu_detection_level" in profile:
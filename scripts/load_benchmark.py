@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Cold-start vs warm-start model load benchmark.
+
+In a normal run the first test silently absorbs the model load and every later
+test runs warm. This benchmark measures both cases separately, per model and
+over N repetitions:
+
+  cold  every resident model is unloaded (keep_alive: 0) and /api/ps is polled
+        until nothing is resident, then a short request is timed
+  warm  the same request again while the model stays loaded
+
+For each request the server's load_duration and the client-side time to first
+token are recorded. Before each cold load, the share of the model's weights
+blob held in the OS page cache is also recorded. With a warm page cache a
+"cold" load reads from RAM, not disk. --drop-page-cache evicts the blob first
+so cold loads come from disk. Page-cache residency needs the blob to be on
+this host and uses mincore(2), so it is reported on Linux only.
+
+  run     Benchmark one or more models (run-tests.sh --load-benchmark N)
+  report  Markdown/JSON summary of a saved benchmark
+"""
+
+import argparse
+import ctypes
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, List, Optional
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from model_metadata import get_model_metadata
+from ollama_client import OllamaClient
+from result_utils import load_result, write_json_atomic
+
+PROBE_PROMPT = "Reply with OK."
+UNLOAD_TIMEOUT_S = 60.0
+POLL_INTERVAL_S = 0.25
+MODELFILE_FROM_RE = re.compile(r'^FROM\s+(/\S+)\s*$', re.MULTILINE)
+
+
+def resident_models(client: OllamaClient) -> List[str]:
+    return [m.get("name") or m.get("model") for m in client.request_json("/api/ps").get("models") or []]
+
+
+def unload_all(client: OllamaClient, timeout: float = UNLOAD_TIMEOUT_S) -> List[str]:
+    """Unload every resident model and wait until /api/ps is empty; return what was unloaded."""
+    unloaded = resident_models(client)
+    for name in unloaded:
+        client.request_json("/api/generate", {"model": name, "keep_alive": 0})
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = resident_models(client)
+        if not remaining:
+            return unloaded
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Models still resident after {timeout:.0f}s: {', '.join(remaining)}")
+        time.sleep(POLL_INTERVAL_S)
+
+
+def weights_blob(client: OllamaClient, model: str) -> Optional[Path]:
+    """Path of the model's weights blob (the FROM line of its Modelfile), if it is on this host."""
+    try:
+        modelfile = client.request_json("/api/show", {"model": model, "name": model}).get("modelfile") or ""
+    except Exception:
+        return None
+    match = MODELFILE_FROM_RE.search(modelfile)
+    if match and os.path.isfile(match.group(1)):
+        return Path(match.group(1))
+    return None
+
+
+def page_cache_residency(path: Optional[Path]) -> Optional[float]:
+    """Fraction of a file's pages in the OS page cache (Linux mincore), or None if unknown."""
+    if path is None or not sys.platform.startswith("linux"):
+        return None
+    try:
+        size = path.stat().st_size
+        if size == 0:
+            return None
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                              ctypes.c_long]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_char_p]
+        pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            address = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+            if address in (None, ctypes.c_void_p(-1).value):
+                return None
+            try:
+                vector = ctypes.create_string_buffer(pages)
+                if libc.mincore(address, size, vector) != 0:
+                    return None
+                return round(sum(b & 1 for b in vector.raw) / pages, 3)
+            finally:
+                libc.munmap(address, size)
+        finally:
+            os.close(fd)
+    except (OSError, AttributeError):
+        return None
+
+
+def drop_page_cache(path: Optional[Path]) -> bool:
+    """Ask the kernel to evict a file's cached pages (unmapped clean pages only)."""
+    if path is None or not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+        return True
+    except OSError:
+        return False
+
+
+def _probe(client: OllamaClient, model: str, num_predict: int) -> Dict[str, Any]:
+    metrics = client.generate(model, PROBE_PROMPT, {"num_predict": num_predict})["metrics"]
+    return {k: metrics.get(k) for k in ("load_duration_ms", "ttft_ms", "wall_ms", "total_duration_ms")}
+
+
+def _stats(samples: List[Dict[str, Any]], key: str) -> Optional[Dict[str, float]]:
+    values = [s[key] for s in samples if s.get(key) is not None]
+    if not values:
+        return None
+    return {"mean": round(mean(values), 1), "min": round(min(values), 1), "max": round(max(values), 1)}
+
+
+def benchmark_model(client: OllamaClient, model: str, repeats: int, num_predict: int,
+                    evict: bool) -> Dict[str, Any]:
+    """Alternate cold and warm requests for one model."""
+    metadata = get_model_metadata(model, client)
+    blob = weights_blob(client, model)
+    cold, warm = [], []
+    for repetition in range(1, repeats + 1):
+        unloaded = unload_all(client)
+        evicted = drop_page_cache(blob) if evict else False
+        residency = page_cache_residency(blob)
+        # Another client may load a model between the unload and the request
+        others = [name for name in resident_models(client) if name != model]
+        sample = dict(_probe(client, model, num_predict), repetition=repetition, unloaded=unloaded,
+                      page_cache_resident=residency, page_cache_dropped=evicted, valid=not others)
+        cold.append(sample)
+        warm.append(dict(_probe(client, model, num_predict), repetition=repetition))
+        print(f"  {model} #{repetition}: cold load {sample['load_duration_ms']} ms, "
+              f"warm load {warm[-1]['load_duration_ms']} ms", file=sys.stderr)
+
+    valid_cold = [s for s in cold if s["valid"]]
+    residencies = [s["page_cache_resident"] for s in valid_cold if s["page_cache_resident"] is not None]
+    summary = {
+        "cold": {"load_duration_ms": _stats(valid_cold, "load_duration_ms"), "ttft_ms": _stats(valid_cold, "ttft_ms")},
+        "warm": {"load_duration_ms": _stats(warm, "load_duration_ms"), "ttft_ms": _stats(warm, "ttft_ms")},
+        "page_cache_resident": round(mean(residencies), 3) if residencies else None,
+        "invalid_cold_samples": len(cold) - len(valid_cold),
+    }
+    cold_ttft, warm_ttft = summary["cold"]["ttft_ms"], summary["warm"]["ttft_ms"]
+    summary["cold_penalty_ms"] = round(cold_ttft["mean"] - warm_ttft["mean"], 1) if cold_ttft and warm_ttft else None
+    return {
+        "model": model,
+        "digest": metadata.get("digest"),
+        "size_bytes": metadata.get("size_bytes"),
+        "quantization_level": metadata.get("quantization_level"),
+        "blob": str(blob) if blob else None,
+        "repetitions": repeats,
+        "drop_page_cache": evict,
+        "summary": summary,
+        "cold": cold,
+        "warm": warm,
+    }
+
+
+def _cell(stats: Optional[Dict[str, float]]) -> str:
+    if not stats:
+        return "N/A"
+    return f"{stats['mean']:,.0f} ({stats['min']:,.0f}–{stats['max']:,.0f})"
+
+
+def format_for_report(benchmark: Dict[str, Any]) -> str:
+    """Format load benchmark results for inclusion in markdown reports."""
+    lines = [
+        "## Model Load Time (Cold vs Warm)",
+        f"*{benchmark['repetitions']} repetitions per model; cold = all models unloaded first"
+        f"{', page cache dropped' if benchmark['drop_page_cache'] else ''}. Mean (min–max) in ms*",
+        "",
+        "| Model | Size (GB) | Page Cache | Cold Load | Cold TTFT | Warm Load | Warm TTFT | Cold Penalty (s) |",
+        "|-------|-----------|------------|-----------|-----------|-----------|-----------|------------------|",
+    ]
+    notes = []
+    for entry in benchmark["models"]:
+        summary = entry["summary"]
+        size = f"{entry['size_bytes'] / 1e9:.1f}" if entry.get("size_bytes") else "N/A"
+        cache = f"{summary['page_cache_resident']:.0%}" if summary["page_cache_resident"] is not None else "N/A"
+        penalty = f"{summary['cold_penalty_ms'] / 1000:.2f}" if summary["cold_penalty_ms"] is not None else "N/A"
+        lines.append(f"| {entry['model']} | {size} | {cache} | {_cell(summary['cold']['load_duration_ms'])} | "
+                     f"{_cell(summary['cold']['ttft_ms'])} | {_cell(summary['warm']['load_duration_ms'])} | "
+                     f"{_cell(summary['warm']['ttft_ms'])} | {penalty} |")
+        if summary["invalid_cold_samples"]:
+            notes.append(f"- {entry['model']}: {summary['invalid_cold_samples']} cold sample(s) discarded "
+                         f"because another model was loaded concurrently")
+    lines += [
+        "",
+        "*Page Cache is the share of the weights blob cached in RAM before each cold load; near 100% means "
+        "\"cold\" loads were served from memory, not disk.*",
+    ]
+    if notes:
+        lines += [""] + notes
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start vs warm-start model load benchmark')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Benchmark cold and warm loads')
+    run.add_argument('--model', action='append', required=True,
+                     help='Model name as shown by `ollama list` (repeatable)')
+    run.add_argument('--repeats', type=int, default=3, help='Cold/warm pairs per model (default: 3)')
+    run.add_argument('--num-predict', type=int, default=8, help='Output tokens per probe request (default: 8)')
+    run.add_argument('--drop-page-cache', action='store_true',
+                     help='Evict the weights blob from the page cache before each cold load')
+    run.add_argument('--timeout', type=float, default=600.0, help='Request timeout in seconds')
+    run.add_argument('--output', help='Write benchmark JSON to this file')
+    run.add_argument('--format', choices=['json', 'markdown'], default='json',
+                     help='Output format (default: json)')
+
+    report = subparsers.add_parser('report', help='Summarize a saved benchmark')
+    report.add_argument('--timestamp', required=True, help='Test run timestamp')
+    report.add_argument('--reports-dir', default='reports', help='Directory containing load_benchmark_*.json')
+    report.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format (default: json)')
+
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        try:
+            benchmark = load_result(Path(args.reports_dir) / f"load_benchmark_{args.timestamp}.json")
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        client = OllamaClient(timeout=args.timeout)
+        try:
+            benchmark = {"repetitions": args.repeats, "drop_page_cache": args.drop_page_cache,
+                         "num_predict": args.num_predict,
+                         "models": [benchmark_model(client, model, args.repeats, args.num_predict,
+                                                    args.drop_page_cache) for model in args.model]}
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            client.close()
+        if args.output:
+            write_json_atomic(Path(args.output), benchmark)
+
+    if args.format == 'markdown':
+        print(format_for_report(benchmark))
+    else:
+        print(json.dumps(benchmark, indent=2))
+
+
+if __name__ == "__main__":
+    main()
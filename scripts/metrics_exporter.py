@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Live metrics and progress endpoint for a test run.
+
+The runner (started with --metrics-port) appends one JSON event per line to a
+progress file as the run advances: tests queued, test started, test finished
+(with the path of its result file). This server replays that file
+incrementally on every request and exposes:
+
+  /metrics   Prometheus / OpenMetrics text: latency and TTFT histograms per
+             model, tests by outcome (pass/fail/timeout) per model and
+             category, generated tokens, tests in flight, queue depth, and
+             the last latency of each test
+  /progress  JSON view of the run: counts, in-flight tests, recent results, ETA
+
+It binds to 127.0.0.1 by default and needs no external service: scrape it with
+Prometheus or `curl localhost:PORT/metrics`. Uses only the Python standard
+library.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from result_utils import load_result
+
+# Test latencies range from seconds (short prompts) to many minutes (32k-token benchmarks)
+LATENCY_BUCKETS = (1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+RECENT_RESULTS = 10
+
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            rows.append(("+Inf" if bound == float("inf") else _number(bound), total))
+        return rows
+
+
+def _number(value: float) -> str:
+    # OpenMetrics expects canonical floats, e.g. le="1.0" rather than le="1"
+    return repr(float(value))
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+class RunState:
+    """Run progress rebuilt from the runner's event file; read incrementally."""
+
+    def __init__(self, events_file: Path):
+        self.events_file = events_file
+        self._offset = 0
+        self._partial = ""
+        self._lock = threading.Lock()
+        self.run: Dict[str, Any] = {}
+        self.queued = 0
+        self.in_flight: Dict[str, Dict[str, Any]] = {}
+        self.outcomes: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.latency: Dict[str, Histogram] = {}
+        self.ttft: Dict[str, Histogram] = {}
+        self.tokens: Dict[str, int] = defaultdict(int)
+        self.last_latency: Dict[Tuple[str, str], float] = {}
+        self.recent: deque = deque(maxlen=RECENT_RESULTS)
+        self.completed = 0
+        self.latency_total = 0.0
+
+    def refresh(self) -> None:
+        """Apply events appended since the last call."""
+        with self._lock:
+            try:
+                with open(self.events_file, 'r', encoding='utf-8') as f:
+                    f.seek(self._offset)
+                    data = f.read()
+                    self._offset = f.tell()
+            except FileNotFoundError:
+                return
+            lines = (self._partial + data).split("\n")
+            self._partial = lines.pop()  # an event still being written
+            for line in lines:
+                if line.strip():
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        kind = event["event"]
+        if kind == "run_start":
+            self.run = dict(event, status="running")
+        elif kind == "run_end":
+            self.run["status"] = "finished"
+            self.run["finished_at"] = event.get("time")
+        elif kind == "queue":
+            self.queued += int(event["tests"])
+        elif kind == "test_start":
+            self.queued = max(0, self.queued - 1)
+            self.in_flight[event["test_id"]] = event
+        elif kind == "test_skip":
+            self.queued = max(0, self.queued - 1)
+        elif kind == "test_end":
+            started = self.in_flight.pop(event["test_id"], {})
+            self._record(event, started)
+
+    def _record(self, event: Dict[str, Any], started: Dict[str, Any]) -> None:
+        model = event.get("model") or started.get("model", "unknown")
+        category = event.get("category") or started.get("category", "unknown")
+        status = event.get("status", "unknown")
+        latency_s = ttft_s = None
+        tokens = 0
+        try:
+            result = load_result(Path(event["result"]))
+            latency_ms = result.get("metrics", {}).get("quantitative", {}).get("latency_ms")
+            latency_s = float(latency_ms) / 1000 if latency_ms is not None else None
+            ttft_ms = (result.get("generation") or {}).get("ttft_ms")
+            ttft_s = float(ttft_ms) / 1000 if ttft_ms is not None else None
+            tokens = int(result.get("output", {}).get("token_count") or 0)
+            status = result.get("overall_result", status)
+        except (KeyError, OSError, ValueError, TypeError):
+            pass
+        if latency_s is None and started.get("time") and event.get("time"):
+            latency_s = event["time"] - started["time"]
+
+        self.outcomes[(model, category, status)] += 1
+        self.completed += 1
+        self.tokens[model] += tokens
+        if latency_s is not None:
+            self.latency.setdefault(model, Histogram(LATENCY_BUCKETS)).observe(latency_s)
+            self.last_latency[(model, event["test_id"])] = latency_s
+            self.latency_total += latency_s
+        if ttft_s is not None:
+            self.ttft.setdefault(model, Histogram(TTFT_BUCKETS)).observe(ttft_s)
+        self.recent.appendleft({"test_id": event["test_id"], "model": model, "category": category,
+                                "status": status, "latency_s": round(latency_s, 2) if latency_s else None,
+                                "output_tokens": tokens})
+
+    def metrics_text(self, openmetrics: bool) -> str:
+        with self._lock:
+            lines: List[str] = []
+
+            def family(name: str, kind: str, help_text: str) -> str:
+                # OpenMetrics names counter families without the _total suffix
+                family_name = name[:-len("_total")] if openmetrics and kind == "counter" else name
+                lines.append(f"# HELP {family_name} {help_text}")
+                lines.append(f"# TYPE {family_name} {kind}")
+                return name
+
+            if self.run:
+                family("ollama_test_run_info", "gauge", "Test run being executed")
+                lines.append("ollama_test_run_info" + _labels(run_id=self.run.get("run_id", ""),
+                                                             model=self.run.get("model", ""),
+                                                             category=self.run.get("category", "")) + " 1")
+
+            for name, histograms, help_text in (
+                    ("ollama_test_latency_seconds", self.latency, "Wall-clock test latency"),
+                    ("ollama_test_ttft_seconds", self.ttft, "Time to first token")):
+                family(name, "histogram", help_text)
+                for model, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_labels(model=model, le=bound)} {count}")
+                    lines.append(f"{name}_count{_labels(model=model)} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(model=model)} {_number(round(histogram.sum, 3))}")
+
+            family("ollama_test_last_latency_seconds", "gauge", "Latency of the most recent run of each test")
+            for (model, test_id), value in sorted(self.last_latency.items()):
+                lines.append(f"ollama_test_last_latency_seconds{_labels(model=model, test_id=test_id)} "
+                             f"{_number(round(value, 3))}")
+
+            name = family("ollama_tests_total", "counter", "Tests finished, by outcome")
+            for (model, category, status), count in sorted(self.outcomes.items()):
+                lines.append(f"{name}{_labels(model=model, category=category, status=status)} {count}")
+
+            name = family("ollama_generated_tokens_total", "counter", "Output tokens generated")
+            for model, count in sorted(self.tokens.items()):
+                lines.append(f"{name}{_labels(model=model)} {count}")
+
+            family("ollama_tests_in_flight", "gauge", "Tests currently executing")
+            lines.append(f"ollama_tests_in_flight {len(self.in_flight)}")
+            family("ollama_test_queue_depth", "gauge", "Tests waiting to start")
+            lines.append(f"ollama_test_queue_depth {self.queued}")
+
+            if openmetrics:
+                lines.append("# EOF")
+            return "\n".join(lines) + "\n"
+
+    def progress(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            passed = sum(n for (_, _, status), n in self.outcomes.items() if status == "pass")
+            timed_out = sum(n for (_, _, status), n in self.outcomes.items() if status == "timeout")
+            average = self.latency_total / self.completed if self.completed else None
+            remaining = self.queued + len(self.in_flight)
+            started_at = self.run.get("time")
+            return {
+                "run": {k: v for k, v in self.run.items() if k not in ("event", "time")},
+                "elapsed_s": round(now - started_at, 1) if started_at else None,
+                "completed": self.completed,
+                "passed": passed,
+                "timed_out": timed_out,
+                "failed": self.completed - passed - timed_out,
+                "queued": self.queued,
+                "in_flight": [{"test_id": test_id, "model": e.get("model"), "category": e.get("category"),
+                               "running_s": round(now - e["time"], 1) if e.get("time") else None}
+                              for test_id, e in self.in_flight.items()],
+                "average_latency_s": round(average, 2) if average is not None else None,
+                "eta_s": round(average * remaining, 1) if average is not None else None,
+                "recent": list(self.recent),
+            }
+
+
+def make_handler(state: RunState):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.refresh()
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                self._send(state.metrics_text(openmetrics), OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+            elif path in ("/progress", "/"):
+                self._send(json.dumps(state.progress(), indent=2) + "\n", "application/json")
+            else:
+                self._send("Not found: try /metrics or /progress\n", "text/plain", status=404)
+
+        def _send(self, body: str, content_type: str, status: int = 200) -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *_args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live metrics and progress endpoint for a test run')
+    parser.add_argument('--events', required=True, help='Progress event file written by the runner')
+    parser.add_argument('--port', type=int, required=True, help='Port to listen on')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+
+    args = parser.parse_args()
+
+    state = RunState(Path(args.events))
+    try:
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    except OSError as e:
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Serving metrics on http://{args.host}:{args.port}/metrics and /progress", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Ollama model metadata and throughput normalized by model size.
+
+The runner records which exact model build was tested: parameter count,
+quantization level, context length and digest from /api/show and /api/tags,
+and the CPU/GPU memory split of the loaded model from /api/ps. The static part
+is cached in .cache/model-metadata/ by model digest, so each model is only
+described once however many runs use it. The report divides decode throughput
+by model size: tokens/sec per billion parameters, and bytes of weights streamed
+per generated token (every decode step reads all weights of a dense model), as
+an effective memory bandwidth. Uses only the Python standard library.
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from ollama_client import OllamaClient
+from result_utils import iter_result_files, load_result, write_json_atomic
+
+METADATA_CACHE_DIR = Path(".cache") / "model-metadata"
+PARAMETER_SIZE_RE = re.compile(r'^\s*([\d.]+)\s*([KMBT])\s*$', re.IGNORECASE)
+PARAMETER_SCALE = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def _find_model(entries: List[Dict[str, Any]], model: str) -> Optional[Dict[str, Any]]:
+    """Entry for a model in /api/tags or /api/ps output; a bare name means the `latest` tag."""
+    names = {model, f"{model}:latest"}
+    for entry in entries:
+        if entry.get("name") in names or entry.get("model") in names:
+            return entry
+    return None
+
+
+def parse_parameter_size(value: Optional[str]) -> Optional[int]:
+    """Parameter count from Ollama's rounded label, e.g. "7.6B" -> 7600000000."""
+    match = PARAMETER_SIZE_RE.match(value or "")
+    if not match:
+        return None
+    return int(float(match.group(1)) * PARAMETER_SCALE[match.group(2).upper()])
+
+
+def describe_model(client: OllamaClient, model: str, tag: Dict[str, Any]) -> Dict[str, Any]:
+    """Static metadata for one model build from /api/show."""
+    show = client.request_json("/api/show", {"model": model, "name": model})
+    details = show.get("details") or {}
+    model_info = show.get("model_info") or {}
+    architecture = model_info.get("general.architecture")
+
+    parameter_count = model_info.get("general.parameter_count") or parse_parameter_size(details.get("parameter_size"))
+    size_bytes = tag.get("size")
+    return {
+        "digest": tag.get("digest"),
+        "family": details.get("family"),
+        "format": details.get("format"),
+        "architecture": architecture,
+        "parameter_size": details.get("parameter_size"),
+        "parameter_count": parameter_count,
+        "quantization_level": details.get("quantization_level"),
+        "context_length": model_info.get(f"{architecture}.context_length") if architecture else None,
+        "embedding_length": model_info.get(f"{architecture}.embedding_length") if architecture else None,
+        "expert_count": model_info.get(f"{architecture}.expert_count") if architecture else None,
+        "size_bytes": size_bytes,
+        "bits_per_weight": round(size_bytes * 8 / parameter_count, 2) if size_bytes and parameter_count else None,
+    }
+
+
+def runtime_placement(client: OllamaClient, model: str) -> Optional[Dict[str, Any]]:
+    """Memory footprint and CPU/GPU split of the model if it is currently loaded (/api/ps)."""
+    entry = _find_model(client.request_json("/api/ps").get("models") or [], model)
+    if entry is None:
+        return None
+    size = entry.get("size") or 0
+    vram = entry.get("size_vram") or 0
+    gpu_fraction = round(vram / size, 3) if size else None
+    return {
+        "memory_bytes": size,
+        "vram_bytes": vram,
+        "gpu_fraction": gpu_fraction,
+        "processor": _processor_label(gpu_fraction),
+        "context_length": entry.get("context_length"),
+    }
+
+
+def _processor_label(gpu_fraction: Optional[float]) -> Optional[str]:
+    """Same wording as the PROCESSOR column of `ollama ps`."""
+    if gpu_fraction is None:
+        return None
+    if gpu_fraction <= 0:
+        return "100% CPU"
+    if gpu_fraction >= 1:
+        return "100% GPU"
+    gpu = round(gpu_fraction * 100)
+    return f"{100 - gpu}%/{gpu}% CPU/GPU"
+
+
+def get_model_metadata(model: str, client: Optional[OllamaClient] = None,
+                       use_cache: bool = True) -> Dict[str, Any]:
+    """Metadata for a model: static fields (cached by digest) plus its current placement."""
+    client = client or OllamaClient(timeout=30)
+    tag = _find_model(client.request_json("/api/tags").get("models") or [], model)
+    if tag is None or not tag.get("digest"):
+        raise RuntimeError(f"Model not found in /api/tags: {model}")
+
+    cache_file = METADATA_CACHE_DIR / f"{tag['digest'].replace(':', '-')}.json"
+    static = None
+    if use_cache and cache_file.exists():
+        try:
+            static = load_result(cache_file)
+        except (OSError, json.JSONDecodeError):
+            static = None
+    if static is None:
+        static = describe_model(client, model, tag)
+        if use_cache:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(cache_file, static)
+
+    return dict(static, name=model, runtime=runtime_placement(client, model))
+
+
+def normalized_metrics(metadata: Dict[str, Any], decode_tps: Optional[float]) -> Dict[str, Any]:
+    """Decode throughput normalized by model size."""
+    params = metadata.get("parameter_count")
+    size = metadata.get("size_bytes")
+    return {
+        "tokens_per_second_per_billion_params": round(decode_tps / (params / 1e9), 3) if decode_tps and params else None,
+        "weights_gb_per_token": round(size / 1e9, 3) if size else None,
+        "effective_bandwidth_gbps": round(decode_tps * size / 1e9, 2) if decode_tps and size else None,
+    }
+
+
+def collect_models(results_dir: str, timestamp: str) -> Dict[str, Dict[str, Any]]:
+    """Per-model metadata and normalized decode throughput for one test run."""
+    rates: Dict[str, List[float]] = defaultdict(list)
+    metadata: Dict[str, Dict[str, Any]] = {}
+    for path in iter_result_files(results_dir, timestamp):
+        try:
+            result = load_result(path)
+        except (OSError, json.JSONDecodeError):
+            continue
+        model = result.get("model", {})
+        if not model.get("metadata"):
+            continue
+        name = model.get("name", "unknown")
+        meta = metadata.setdefault(name, dict(model["metadata"]))
+        if not meta.get("runtime") and model["metadata"].get("runtime"):
+            meta["runtime"] = model["metadata"]["runtime"]
+        rate = (result.get("generation") or {}).get("decode_tokens_per_second")
+        if rate:
+            rates[name].append(rate)
+
+    models = {}
+    for name, meta in metadata.items():
+        decode_tps = round(sum(rates[name]) / len(rates[name]), 2) if rates[name] else None
+        models[name] = dict(meta, tests_measured=len(rates[name]), decode_tokens_per_second=decode_tps,
+                            normalized=normalized_metrics(meta, decode_tps))
+    return models
+
+
+def _fmt(value: Any, suffix: str = "") -> str:
+    return f"{value}{suffix}" if value is not None else "-"
+
+
+def format_for_report(models: Dict[str, Dict[str, Any]]) -> str:
+    """Format model metadata and normalized throughput for inclusion in markdown reports."""
+    lines = [
+        "## Model Metadata",
+        "*From the Ollama API (/api/show, /api/ps); decode rate is the average over tests with server-side counters*",
+        "",
+    ]
+    if not models:
+        lines.append("*No model metadata recorded for this run.*")
+        return "\n".join(lines)
+
+    lines += [
+        "| Model | Digest | Parameters | Quantization | Bits/Weight | Context | Placement |",
+        "|-------|--------|------------|--------------|-------------|---------|-----------|",
+    ]
+    for name in sorted(models):
+        m = models[name]
+        runtime = m.get("runtime") or {}
+        digest = (m.get("digest") or "").split(":")[-1][:12] or "-"
+        context = runtime.get("context_length") or m.get("context_length")
+        lines.append(
+            f"| {name} | {digest} | {_fmt(m.get('parameter_size'))} | {_fmt(m.get('quantization_level'))} | "
+            f"{_fmt(m.get('bits_per_weight'))} | {_fmt(context)} | {_fmt(runtime.get('processor'))} |")
+
+    lines += [
+        "",
+        "### Normalized Throughput",
+        "",
+        "| Model | Decode tok/s | tok/s per B Params | Weights Read per Token (GB) | Effective Bandwidth (GB/s) |",
+        "|-------|--------------|--------------------|-----------------------------|----------------------------|",
+    ]
+    for name in sorted(models):
+        m = models[name]
+        n = m["normalized"]
+        lines.append(
+            f"| {name} | {_fmt(m['decode_tokens_per_second'])} | {_fmt(n['tokens_per_second_per_billion_params'])} | "
+            f"{_fmt(n['weights_gb_per_token'])} | {_fmt(n['effective_bandwidth_gbps'])} |")
+    if any(m.get("expert_count") for m in models.values()):
+        lines += ["", "*Mixture-of-experts models read only the active experts per token; "
+                      "their bandwidth figures are upper bounds.*"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ollama model metadata and size-normalized throughput')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show = subparsers.add_parser('show', help='Print metadata JSON for a model')
+    show.add_argument('--model', required=True, help='Model name as shown by `ollama list`')
+    show.add_argument('--no-cache', action='store_true', help='Query /api/show even if the digest is cached')
+
+    report = subparsers.add_parser('report', help='Normalized throughput for a test run')
+    report.add_argument('--timestamp', required=True, help='Test run timestamp')
+    report.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+    report.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format (default: json)')
+
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        try:
+            metadata = get_model_metadata(args.model, use_cache=not args.no_cache)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(metadata, separators=(",", ":")))
+    else:
+        models = collect_models(args.results_dir, args.timestamp)
+        if args.format == 'markdown':
+            print(format_for_report(models))
+        else:
+            print(json.dumps(models, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Streaming client for the Ollama HTTP API.
+
+Replaces `ollama run` in the test runner: the response is streamed from
+/api/generate and written to the output file as it arrives (no terminal escape
+codes), and the server's own counters are recorded instead of word counts -
+prompt and output token counts, load time, time to first token (TTFT),
+prefill (prompt evaluation) rate and decode rate.
+
+Generation can be bounded per test: max_output_tokens and stop sequences are
+passed to Ollama as num_predict and stop, and an early-stop hook (e.g.
+first_code_block) ends the stream client-side. The metrics record whether and
+why the output was truncated. When the stream is cut short, token counts and
+the decode rate are taken from the chunks received.
+
+A deadline bounds the whole generation: when it passes, the request is
+cancelled by closing the connection. The partial output is kept and the
+metrics get status "timeout", with the tokens received, TTFT and decode rate up
+to the cutoff. The CLI then exits with EXIT_TIMEOUT, which deliberately differs
+from coreutils timeout's 124 so a client killed by an outer timeout wrapper is
+never mistaken for a deadline it handled itself.
+Uses only the Python standard library.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import re
+import socket
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from tracing import traced
+
+DEFAULT_HOST = "http://127.0.0.1:11434"
+NS_PER_SECOND = 1e9
+EXIT_TIMEOUT = 3  # Not 124: that is what an outer coreutils timeout reports
+FENCED_BLOCK_RE = re.compile(r'```[^\n]*\n.*?\n\s*```', re.DOTALL)
+
+
+class FirstCodeBlock:
+    """Early-stop hook: true once the first fenced code block has been closed."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def __call__(self, text: str) -> bool:
+        self._chunks.append(text)
+        # Only a chunk containing a backtick can complete a fence
+        return "`" in text and FENCED_BLOCK_RE.search("".join(self._chunks)) is not None
+
+
+EARLY_STOP_HOOKS: Dict[str, Callable[[], Callable[[str], bool]]] = {
+    "first_code_block": FirstCodeBlock,
+}
+
+
+def ollama_host() -> str:
+    """Server URL from OLLAMA_HOST (which may omit the scheme or port), as the ollama CLI reads it."""
+    host = os.environ.get("OLLAMA_HOST", DEFAULT_HOST)
+    if "://" not in host:
+        host = f"http://{host}"
+    parts = urlsplit(host)
+    if parts.port is None:
+        host = f"{parts.scheme}://{parts.hostname}:11434"
+    return host.rstrip("/")
+
+
+def _rate(tokens: Optional[int], duration_ns: Optional[int]) -> Optional[float]:
+    if not tokens or not duration_ns:
+        return None
+    return round(tokens / (duration_ns / NS_PER_SECOND), 2)
+
+
+def _ms(duration_ns: Optional[int]) -> Optional[float]:
+    return round(duration_ns / 1e6, 1) if duration_ns is not None else None
+
+
+class OllamaClient:
+    """Minimal keep-alive client for the endpoints the framework uses."""
+
+    def __init__(self, host: Optional[str] = None, timeout: float = 300.0):
+        parts = urlsplit(host or ollama_host())
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self.netloc, timeout=timeout)
+        self._conn.timeout = timeout
+        if self._conn.sock is not None:
+            self._conn.sock.settimeout(timeout)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]],
+                 timeout: float) -> http.client.HTTPResponse:
+        conn = self._connection(timeout)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # Stale keep-alive connection: reconnect once
+            self.close()
+            conn = self._connection(timeout)
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+        if response.status != 200:
+            detail = response.read().decode("utf-8", errors="replace")
+            raise RuntimeError(f"Ollama {path} returned HTTP {response.status}: {detail[:300]}")
+        return response
+
+    def _post(self, path: str, payload: Dict[str, Any], timeout: float) -> http.client.HTTPResponse:
+        return self._request("POST", path, payload, timeout)
+
+    def request_json(self, path: str, payload: Optional[Dict[str, Any]] = None,
+                     timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Non-streaming request returning the decoded JSON body (GET when there is no payload)."""
+        method = "POST" if payload is not None else "GET"
+        response = self._request(method, path, payload, timeout or self.timeout)
+        return json.loads(response.read().decode("utf-8"))
+
+    def _cancel(self, response: Optional[http.client.HTTPResponse]) -> None:
+        # Ollama cancels a generation when its client disconnects
+        if response is not None:
+            response.close()
+        self.close()
+
+    @traced("ollama.generate", cat="model", describe=lambda self, model, *_args, **_kwargs: {"model": model})
+    def generate(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None,
+                 on_text: Optional[Callable[[str], None]] = None, timeout: Optional[float] = None,
+                 keep_alive: Optional[Any] = None, early_stop: Optional[str] = None,
+                 deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Stream a completion, calling on_text for each chunk; return content and metrics.
+
+        early_stop names a hook from EARLY_STOP_HOOKS; when it fires the
+        connection is dropped, which makes Ollama cancel the generation.
+        deadline is a limit in seconds on the whole request, including the
+        model load and prefill. When it passes, the request is cancelled the
+        same way and the metrics get status "timeout".
+        """
+        should_stop = EARLY_STOP_HOOKS[early_stop]() if early_stop else None
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        timeout = timeout or self.timeout
+        start = time.perf_counter()
+        expires_at = start + deadline if deadline else None
+        chunks = []
+        first_token_at = last_token_at = None
+        final: Dict[str, Any] = {}
+        stopped_by = None
+        timed_out = False
+        response = None
+        try:
+            response = self._post("/api/generate", payload,
+                                  min(timeout, deadline) if deadline else timeout)
+        except (socket.timeout, TimeoutError):
+            if expires_at is None or time.perf_counter() < expires_at:
+                raise
+            timed_out = True
+        while response is not None and not timed_out:
+            if expires_at is not None:
+                remaining = expires_at - time.perf_counter()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                # Wake up at the deadline even if the server sends nothing
+                if self._conn is not None and self._conn.sock is not None:
+                    self._conn.sock.settimeout(min(timeout, remaining))
+            try:
+                line = response.readline()
+            except (socket.timeout, TimeoutError):
+                if expires_at is None or time.perf_counter() < expires_at:
+                    raise
+                timed_out = True
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if "error" in message:
+                raise RuntimeError(f"Ollama error: {message['error']}")
+            text = message.get("response", "")
+            if text:
+                last_token_at = time.perf_counter()
+                if first_token_at is None:
+                    first_token_at = last_token_at
+                chunks.append(text)
+                if on_text:
+                    on_text(text)
+            if message.get("done"):
+                final = message
+                break
+            if text and should_stop and should_stop(text):
+                stopped_by = early_stop
+                self._cancel(response)
+                break
+        if timed_out:
+            self._cancel(response)
+        wall = time.perf_counter() - start
+
+        stream = {
+            "chunks": len(chunks),
+            "decode_s": last_token_at - first_token_at if first_token_at is not None else None,
+            "stopped_by": stopped_by,
+            "timed_out": timed_out,
+        }
+        return {
+            "content": "".join(chunks),
+            "metrics": self.summarize(final, wall, first_token_at - start if first_token_at else None, stream),
+        }
+
+    @staticmethod
+    def summarize(final: Dict[str, Any], wall_s: float, ttft_s: Optional[float],
+                  stream: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Normalize the final stream message's counters into result metrics.
+
+        Without a final message (the stream was cut short), output tokens are
+        the chunks received (Ollama streams one token per chunk) and the decode
+        rate is measured between the first and last of them.
+        """
+        stream = stream or {}
+        done = bool(final.get("done"))
+        if done:
+            status = "ok"
+        elif stream.get("timed_out"):
+            status = "timeout"
+        elif stream.get("stopped_by"):
+            status = "stopped"
+        else:
+            status = "incomplete"
+        truncation_reason = None
+        if final.get("done_reason") == "length":
+            truncation_reason = "max_output_tokens"
+        elif not done and stream.get("timed_out"):
+            truncation_reason = "timeout"
+        elif stream.get("stopped_by"):
+            truncation_reason = f"early_stop:{stream['stopped_by']}"
+        output_tokens = final.get("eval_count")
+        decode_rate = _rate(final.get("eval_count"), final.get("eval_duration"))
+        if not done and stream.get("chunks"):
+            output_tokens = stream["chunks"]
+            if stream.get("decode_s"):
+                decode_rate = round((stream["chunks"] - 1) / stream["decode_s"], 2)
+        return {
+            "status": status,
+            "done_reason": final.get("done_reason"),
+            "truncated": truncation_reason is not None,
+            "truncation_reason": truncation_reason,
+            "prompt_tokens": final.get("prompt_eval_count"),
+            "output_tokens": output_tokens,
+            "wall_ms": round(wall_s * 1000, 1),
+            "ttft_ms": round(ttft_s * 1000, 1) if ttft_s is not None else None,
+            "load_duration_ms": _ms(final.get("load_duration")),
+            "prompt_eval_duration_ms": _ms(final.get("prompt_eval_duration")),
+            "eval_duration_ms": _ms(final.get("eval_duration")),
+            "total_duration_ms": _ms(final.get("total_duration")),
+            "prefill_tokens_per_second": _rate(final.get("prompt_eval_count"), final.get("prompt_eval_duration")),
+            "decode_tokens_per_second": decode_rate,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming Ollama client used by the test runner')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help='Stream a completion to a file and record metrics')
+    generate.add_argument('--model', required=True, help='Model name as shown by `ollama list`')
+    generate.add_argument('--prompt-file', default='-', help='File containing the prompt (default: stdin)')
+    generate.add_argument('--output', required=True, help='File the response is streamed to')
+    generate.add_argument('--metrics', help='Write generation metrics JSON to this file')
+    generate.add_argument('--timeout', type=float, default=300.0, help='Socket timeout in seconds')
+    generate.add_argument('--deadline', type=float,
+                          help='Wall-clock limit in seconds; on expiry the request is cancelled, the partial '
+                               f'output kept and the exit code is {EXIT_TIMEOUT}')
+    generate.add_argument('--num-ctx', type=int, help='Context window to run the model with')
+    generate.add_argument('--options', type=json.loads, default={},
+                          help='Generation options JSON, e.g. a tuned runtime profile (--num-ctx takes precedence)')
+    generate.add_argument('--early-stop', choices=sorted(EARLY_STOP_HOOKS),
+                          help='End generation client-side when this hook fires')
+
+    args = parser.parse_args()
+
+    if args.prompt_file == '-':
+        prompt = sys.stdin.read()
+    else:
+        with open(args.prompt_file, 'r', encoding='utf-8') as f:
+            prompt = f.read()
+
+    options = dict(args.options)
+    if args.num_ctx:
+        options["num_ctx"] = args.num_ctx
+    client = OllamaClient(timeout=args.timeout)
+    with open(args.output, 'w', encoding='utf-8') as out:
+        def write(text: str) -> None:
+            out.write(text)
+            out.flush()
+
+        try:
+            result = client.generate(args.model, prompt, options or None, on_text=write, early_stop=args.early_stop,
+                                     deadline=args.deadline)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            client.close()
+
+    if args.metrics:
+        metrics = dict(result["metrics"], options=options, deadline_s=args.deadline)
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+
+    status = result["metrics"]["status"]
+    if status == "timeout":
+        sys.exit(EXIT_TIMEOUT)
+    sys.exit(0 if status in ("ok", "stopped") else 1)
+
+
+if __name__ == "__main__":
+    main()
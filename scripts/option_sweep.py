@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Runtime option sweep: tune Ollama generation options per model.
+
+The runner otherwise leaves num_thread, num_batch and friends at the server's
+defaults. This script runs a representative subset of the YAML tests under
+each combination of an option grid and measures decode and prefill rates and
+time to first token from the server's own counters. The best setting for the
+chosen objective is written to test-configs/runtime-profiles.yaml, which
+run-tests.sh applies automatically to later runs of that model.
+
+  run      Sweep an option grid for one or more models; --strategy halving
+           runs successive halving (every setting on a few tests, the best
+           half on twice as many, ...) instead of the full grid
+  profile  Print the tuned options of a model as JSON (used by the runner)
+
+Every setting is preceded by an unmeasured one-token warm-up request, so
+reloading the model for load-time options (num_ctx, num_batch, num_thread)
+is not charged to the first test. The server defaults are always measured
+as a baseline.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+import yaml
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from config_loader import ConfigLoader, DataSourceProcessor, PromptBuilder
+from model_metadata import get_model_metadata
+from ollama_client import OllamaClient
+from prompt_budget import BudgetPolicy, estimate_tokens
+
+RUNTIME_PROFILES_FILE = Path("test-configs") / "runtime-profiles.yaml"
+PROFILES_HEADER = """\
+# Tuned Ollama generation options per model, written by scripts/option_sweep.py.
+# run-tests.sh passes a model's options to every request (disable with
+# --no-runtime-profile). Thread counts depend on the host the sweep ran on;
+# re-run the sweep after moving to different hardware.
+
+"""
+
+# Objective name -> (metric, higher is better)
+OBJECTIVES = {
+    "decode": ("decode_tokens_per_second", True),
+    "prefill": ("prefill_tokens_per_second", True),
+    "ttft": ("ttft_ms", False),
+    "latency": ("wall_ms", False),
+}
+MEASURED = ("decode_tokens_per_second", "prefill_tokens_per_second", "ttft_ms", "wall_ms")
+DEFAULT_NUM_PREDICT = 128
+WARMUP_PROMPT = "Reply with OK."
+
+
+def _parse_value(text: str) -> Any:
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    return text
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    """Parse --grid name=v1,v2 arguments into {option: [values]}."""
+    grid: Dict[str, List[Any]] = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not name.strip() or not values.strip():
+            raise ValueError(f"Invalid --grid '{spec}' (expected option=value1,value2,...)")
+        grid[name.strip()] = [_parse_value(v.strip()) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def default_grid() -> Dict[str, List[Any]]:
+    """Thread counts around the core count and three batch sizes."""
+    physical = psutil.cpu_count(logical=False) or 1
+    logical = psutil.cpu_count(logical=True) or physical
+    threads = sorted({max(1, physical // 2), physical, logical})
+    return {"num_thread": threads, "num_batch": [256, 512, 1024]}
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the grid, preceded by the server defaults ({})."""
+    names = sorted(grid)
+    settings = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    return [{}] + [s for s in settings if s]
+
+
+def _label(options: Dict[str, Any]) -> str:
+    return ", ".join(f"{k}={v}" for k, v in sorted(options.items())) or "server defaults"
+
+
+def build_workload(loader: ConfigLoader, model: str, test_refs: Optional[List[str]],
+                   sample: int) -> List[Dict[str, Any]]:
+    """Prompts for the tests to sweep with, fitted to the model's context like the runner does.
+
+    Without explicit tests, `sample` tests are picked from the non-benchmark
+    categories at evenly spaced prompt sizes, so short and long prompts are
+    both represented.
+    """
+    if test_refs:
+        refs = []
+        for ref in test_refs:
+            category, sep, test_id = ref.partition(":")
+            if not sep:
+                raise ValueError(f"Invalid test reference '{ref}' (expected category:TEST-ID)")
+            refs.append((category, test_id))
+    else:
+        refs = [(category, test["id"]) for category in loader.get_available_categories(exclude_benchmarks=True)
+                for test in loader.load_test_category(category)["tests"]]
+
+    builder = PromptBuilder(DataSourceProcessor(registry=loader.registry))
+    workload = []
+    for category, test_id in refs:
+        loader.load_test_category(category)
+        test = loader.get_test(category, test_id)
+        if test is None:
+            raise ValueError(f"Test {test_id} not found in category {category}")
+        budget = BudgetPolicy.resolve(loader.registry.models, model, None, test)
+        prompt = builder.build_prompt(test["prompt_template"], test.get("data_sources", []), budget)
+        workload.append({"category": category, "test_id": test_id, "prompt": prompt,
+                         "estimated_tokens": estimate_tokens(prompt), "num_ctx": budget.num_ctx})
+
+    if test_refs or len(workload) <= sample:
+        return workload
+    workload.sort(key=lambda t: t["estimated_tokens"])
+    if sample <= 1:
+        return [workload[len(workload) // 2]]
+    picks = sorted({round(i * (len(workload) - 1) / (sample - 1)) for i in range(sample)})
+    return [workload[i] for i in picks]
+
+
+class Sweep:
+    """Measurements of option settings on a workload for one model."""
+
+    def __init__(self, client: OllamaClient, model: str, workload: List[Dict[str, Any]],
+                 settings: List[Dict[str, Any]], objective: str, num_predict: int, repeats: int):
+        self.client = client
+        self.model = model
+        self.workload = workload
+        self.settings = settings
+        self.metric, self.higher_is_better = OBJECTIVES[objective]
+        self.objective = objective
+        self.num_predict = num_predict
+        self.repeats = repeats
+        # Runs use the context window the prompts were fitted to unless a setting overrides it
+        self.base_options = {"num_ctx": max(t["num_ctx"] for t in workload)}
+        self.trials: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(settings))}
+        self.warmups: Dict[int, Optional[float]] = {}
+        self.errors: Dict[int, str] = {}
+
+    def _options(self, index: int) -> Dict[str, Any]:
+        options = dict(self.base_options, num_predict=self.num_predict)
+        options.update(self.settings[index])
+        return options
+
+    def measure(self, index: int, tests: int) -> None:
+        """Run setting `index` on the first `tests` workload entries not measured yet."""
+        if index in self.errors:
+            return
+        options = self._options(index)
+        try:
+            if index not in self.warmups:
+                warmup = self.client.generate(self.model, WARMUP_PROMPT, dict(options, num_predict=1))
+                self.warmups[index] = warmup["metrics"]["load_duration_ms"]
+            for test in self.workload[len(self.trials[index]):tests]:
+                runs = [self.client.generate(self.model, test["prompt"], options)["metrics"]
+                        for _ in range(self.repeats)]
+                trial = {"category": test["category"], "test_id": test["test_id"],
+                         "prompt_tokens": runs[0].get("prompt_tokens"),
+                         "output_tokens": runs[0].get("output_tokens")}
+                for name in MEASURED:
+                    values = [r[name] for r in runs if r.get(name) is not None]
+                    trial[name] = round(sum(values) / len(values), 2) if values else None
+                self.trials[index].append(trial)
+        except Exception as e:
+            self.errors[index] = str(e)
+            print(f"  {_label(self.settings[index])}: {e}", file=sys.stderr)
+
+    def score(self, index: int, tests: Optional[int] = None) -> Optional[float]:
+        """Mean objective metric over the first `tests` measured tests."""
+        if index in self.errors:
+            return None
+        trials = self.trials[index][:tests]
+        values = [t[self.metric] for t in trials]
+        if not trials or any(v is None for v in values):
+            return None
+        return sum(values) / len(values)
+
+    def rank(self, indexes: List[int], tests: Optional[int] = None) -> List[int]:
+        """Indexes ordered best first; failed or unscored settings last."""
+        def key(index: int) -> Tuple[int, float]:
+            value = self.score(index, tests)
+            if value is None:
+                return (1, 0.0)
+            return (0, -value if self.higher_is_better else value)
+        return sorted(indexes, key=key)
+
+    def run_grid(self) -> None:
+        for index in range(len(self.settings)):
+            print(f"  [{index + 1}/{len(self.settings)}] {_label(self.settings[index])}", file=sys.stderr)
+            self.measure(index, len(self.workload))
+
+    def run_halving(self, eta: int, min_tests: int) -> None:
+        """Successive halving: keep the best 1/eta of the settings and multiply the tests by eta."""
+        active = list(range(len(self.settings)))
+        tests = min(min_tests, len(self.workload))
+        while True:
+            print(f"  Rung: {len(active)} settings x {tests} tests", file=sys.stderr)
+            for index in active:
+                self.measure(index, tests)
+            ranked = self.rank(active, tests)
+            if len(active) == 1 or (tests == len(self.workload) and len(active) <= eta):
+                return
+            active = ranked[:max(1, len(active) // eta)]
+            tests = min(len(self.workload), tests * eta)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """One row per setting, best first; settings measured on more tests rank ahead."""
+        order = sorted(self.rank(list(range(len(self.settings)))),
+                       key=lambda i: -len(self.trials[i]) if i not in self.errors else 0)
+        rows = []
+        for index in order:
+            trials = self.trials[index]
+            row = {"options": self.settings[index], "tests": len(trials), "score": self.score(index),
+                   "warmup_load_ms": self.warmups.get(index), "error": self.errors.get(index), "trials": trials}
+            for name in MEASURED:
+                values = [t[name] for t in trials if t.get(name) is not None]
+                row[name] = round(sum(values) / len(values), 2) if values else None
+            if row["score"] is not None:
+                row["score"] = round(row["score"], 2)
+            rows.append(row)
+        return rows
+
+    def best(self) -> Optional[Dict[str, Any]]:
+        """Winning setting, with its gain over the server defaults on the tests both ran."""
+        rows = self.results()
+        if not rows or rows[0]["score"] is None:
+            return None
+        winner = rows[0]
+        shared = min(len(self.trials[0]), winner["tests"])
+        baseline = self.score(0, shared) if shared else None
+        challenger = self.score(self.settings.index(winner["options"]), shared) if shared else None
+        gain = None
+        if baseline and challenger:
+            ratio = challenger / baseline if self.higher_is_better else baseline / challenger
+            gain = round((ratio - 1) * 100, 1)
+        return {"options": winner["options"], "score": winner["score"],
+                "baseline_score": round(baseline, 2) if baseline is not None else None,
+                "gain_percent": gain, "tests": winner["tests"]}
+
+
+def load_profiles(path: Path = RUNTIME_PROFILES_FILE) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return (yaml.safe_load(f) or {}).get("models") or {}
+
+
+def save_profile(model: str, profile: Dict[str, Any], path: Path = RUNTIME_PROFILES_FILE) -> None:
+    """Store a model's tuned options, keeping other models' profiles."""
+    profiles = load_profiles(path)
+    profiles[model] = profile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(PROFILES_HEADER)
+        yaml.safe_dump({"models": profiles}, f, sort_keys=True, default_flow_style=False)
+
+
+def sweep_model(client: OllamaClient, loader: ConfigLoader, model: str, args: argparse.Namespace,
+                grid: Dict[str, List[Any]]) -> Dict[str, Any]:
+    workload = build_workload(loader, model, args.tests, args.sample)
+    if not workload:
+        raise ValueError("No tests to sweep with")
+    fitted_ctx = max(t["num_ctx"] for t in workload)
+    too_small = [v for v in grid.get("num_ctx", []) if not isinstance(v, int) or v < fitted_ctx]
+    if too_small:
+        # Smaller windows would trim the test data and look faster for the wrong reason
+        raise ValueError(f"num_ctx values {too_small} are below the prompt budget ({fitted_ctx}); "
+                         f"lower num_ctx in test-configs/models.yaml instead")
+
+    settings = expand_grid(grid)
+    print(f"Sweeping {model}: {len(settings)} settings on "
+          f"{', '.join(t['test_id'] for t in workload)} ({args.strategy})", file=sys.stderr)
+    sweep = Sweep(client, model, workload, settings, args.objective, args.num_predict, args.repeats)
+    if args.strategy == "halving":
+        sweep.run_halving(args.eta, args.min_tests)
+    else:
+        sweep.run_grid()
+
+    best = sweep.best()
+    digest = None
+    try:
+        digest = get_model_metadata(model, client).get("digest")
+    except Exception:
+        pass
+    return {
+        "model": model,
+        "digest": digest,
+        "objective": args.objective,
+        "strategy": args.strategy,
+        "num_predict": args.num_predict,
+        "tests": [f"{t['category']}:{t['test_id']}" for t in workload],
+        "best": best,
+        "settings": sweep.results(),
+    }
+
+
+def make_profile(sweep: Dict[str, Any]) -> Dict[str, Any]:
+    best = sweep["best"]
+    return {
+        "options": best["options"],
+        "objective": sweep["objective"],
+        "score": best["score"],
+        "baseline_score": best["baseline_score"],
+        "gain_percent": best["gain_percent"],
+        "tests": sweep["tests"],
+        "digest": sweep["digest"].split(":")[-1][:12] if sweep["digest"] else None,
+        "host": platform.node(),
+        "logical_cores": psutil.cpu_count(logical=True),
+        "tuned_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _fmt(value: Any, digits: int = 1) -> str:
+    return "N/A" if value is None else f"{value:,.{digits}f}"
+
+
+def format_for_report(sweeps: List[Dict[str, Any]]) -> str:
+    """Format sweep results as markdown."""
+    lines = ["## Runtime Option Sweep", ""]
+    for sweep in sweeps:
+        metric, higher = OBJECTIVES[sweep["objective"]]
+        lines += [
+            f"### {sweep['model']}",
+            f"*Objective: {metric} ({'higher' if higher else 'lower'} is better), {sweep['strategy']}, "
+            f"num_predict={sweep['num_predict']}; tests: {', '.join(sweep['tests'])}*",
+            "",
+        ]
+        best = sweep["best"]
+        if best is None:
+            lines += ["*No setting completed the sweep.*", ""]
+            continue
+        gain = f" ({best['gain_percent']:+.1f}% vs server defaults)" if best["gain_percent"] is not None else ""
+        lines += [
+            f"**Best:** {_label(best['options'])}{gain}",
+            "",
+            "| Options | Tests | Decode (tok/s) | Prefill (tok/s) | TTFT (ms) | Wall (ms) | Reload (ms) |",
+            "|---------|-------|----------------|-----------------|-----------|-----------|-------------|",
+        ]
+        for row in sweep["settings"]:
+            options = _label(row["options"]) + (" (failed)" if row["error"] else "")
+            lines.append(f"| {options} | {row['tests']} | {_fmt(row['decode_tokens_per_second'])} | "
+                         f"{_fmt(row['prefill_tokens_per_second'])} | {_fmt(row['ttft_ms'], 0)} | "
+                         f"{_fmt(row['wall_ms'], 0)} | {_fmt(row['warmup_load_ms'], 0)} |")
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune Ollama runtime options per model')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Sweep an option grid and save the best setting')
+    run.add_argument('--model', action='append', required=True,
+                     help='Model name as shown by `ollama list` (repeatable)')
+    run.add_argument('--grid', action='append', default=[], metavar='OPTION=V1,V2',
+                     help='Option values to try (repeatable; default: num_thread around the '
+                          'core count x num_batch 256,512,1024)')
+    run.add_argument('--strategy', choices=['grid', 'halving'], default='grid',
+                     help='Measure every setting on every test, or successive halving (default: grid)')
+    run.add_argument('--eta', type=int, default=2, help='Halving: keep 1/eta of the settings per rung')
+    run.add_argument('--min-tests', type=int, default=1, help='Halving: tests per setting in the first rung')
+    run.add_argument('--tests', type=lambda s: [t for t in s.split(",") if t], metavar='CAT:ID,...',
+                     help='Tests to sweep with (default: a size-spread sample)')
+    run.add_argument('--sample', type=int, default=3, help='Number of tests to sample (default: 3)')
+    run.add_argument('--objective', choices=sorted(OBJECTIVES), default='decode',
+                     help='Metric to optimize (default: decode tokens/sec)')
+    run.add_argument('--num-predict', type=int, default=DEFAULT_NUM_PREDICT,
+                     help=f'Output token cap per request unless swept (default: {DEFAULT_NUM_PREDICT})')
+    run.add_argument('--repeats', type=int, default=1, help='Requests per test and setting (default: 1)')
+    run.add_argument('--timeout', type=float, default=300.0, help='Request timeout in seconds')
+    run.add_argument('--profiles', type=Path, default=RUNTIME_PROFILES_FILE,
+                     help=f'Profile file to update (default: {RUNTIME_PROFILES_FILE})')
+    run.add_argument('--no-save', action='store_true', help='Report only; do not update the profile file')
+    run.add_argument('--output', help='Also write the full sweep results JSON to this file')
+    run.add_argument('--format', choices=['json', 'markdown'], default='markdown',
+                     help='Output format (default: markdown)')
+
+    profile = subparsers.add_parser('profile', help="Print a model's tuned options as JSON")
+    profile.add_argument('--model', required=True, help='Model name as shown by `ollama list`')
+    profile.add_argument('--profiles', type=Path, default=RUNTIME_PROFILES_FILE,
+                         help=f'Profile file (default: {RUNTIME_PROFILES_FILE})')
+
+    args = parser.parse_args()
+
+    if args.command == 'profile':
+        entry = load_profiles(args.profiles).get(args.model)
+        if not entry or not entry.get("options"):
+            sys.exit(1)
+        if entry.get("host") and entry["host"] != platform.node():
+            print(f"Warning: runtime profile for {args.model} was tuned on {entry['host']}", file=sys.stderr)
+        print(json.dumps(entry["options"], separators=(",", ":"), sort_keys=True))
+        return
+
+    try:
+        grid = parse_grid(args.grid) if args.grid else default_grid()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    loader = ConfigLoader()
+    client = OllamaClient(timeout=args.timeout)
+    sweeps = []
+    try:
+        for model in args.model:
+            try:
+                sweeps.append(sweep_model(client, loader, model, args, grid))
+            except (ValueError, FileNotFoundError) as e:
+                print(f"Error: {model}: {e}", file=sys.stderr)
+                sys.exit(1)
+    finally:
+        client.close()
+
+    for sweep in sweeps:
+        if sweep["best"] is None:
+            print(f"Warning: no setting completed for {sweep['model']}; profile not updated", file=sys.stderr)
+        elif not args.no_save:
+            save_profile(sweep["model"], make_profile(sweep), args.profiles)
+            print(f"Saved {_label(sweep['best']['options'])} for {sweep['model']} to {args.profiles}",
+                  file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(sweeps, f, indent=2)
+    if args.format == 'markdown':
+        print(format_for_report(sweeps))
+    else:
+        print(json.dumps(sweeps, indent=2))
+    if any(sweep["best"] is None for sweep in sweeps):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
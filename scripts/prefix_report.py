@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Prompt prefix sharing report for runs with --prompt-layout shared_prefix.
+
+Ollama keeps the previous request's prompt in its KV cache and only prefills
+the part of a new prompt after the longest common prefix. The shared_prefix
+layout puts data sources first in a canonical order and the runner orders
+tests so consecutive prompts share as much as possible. This report measures
+the effect. For each test it shows the estimated tokens shared with the
+previous prompt, the prompt tokens Ollama actually evaluated, and the TTFT.
+It compares these with a baseline run of the same model and tests in the
+default layout and order: the latest such run, or --baseline TIMESTAMP.
+Prints nothing for runs that did not use the shared_prefix layout.
+Uses only the Python standard library.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, List, Optional
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from prompt_budget import estimate_tokens
+from result_utils import NON_TEST_PREFIXES, iter_result_files, load_result
+
+SHARED_LAYOUT = "shared_prefix"
+
+
+def _run_timestamp(path: Path) -> str:
+    # <test id>_<YYYYmmdd>_<HHMMSS>.json
+    return "_".join(path.stem.rsplit("_", 2)[-2:])
+
+
+def load_run(results_dir: str, timestamp: str) -> List[Dict[str, Any]]:
+    """Tests of a run in execution order, with the prefix each shares with its predecessor."""
+    results = []
+    for path in iter_result_files(results_dir, timestamp):
+        try:
+            results.append(load_result(path))
+        except (OSError, json.JSONDecodeError):
+            continue
+    results.sort(key=lambda r: (r.get("test_case", {}).get("sequence") or 0, r.get("timestamp", "")))
+
+    rows = []
+    previous = ""
+    for result in results:
+        prompt = result.get("input", {}).get("prompt") or ""
+        generation = result.get("generation") or {}
+        shared = os.path.commonprefix([previous, prompt])
+        rows.append({
+            "test_id": result.get("test_case", {}).get("id"),
+            "model": result.get("model", {}).get("name"),
+            "layout": result.get("input", {}).get("prompt_layout", "template"),
+            "prompt_tokens_estimated": estimate_tokens(prompt),
+            "shared_prefix_tokens_estimated": estimate_tokens(shared) if shared else 0,
+            "prompt_tokens_evaluated": generation.get("prompt_tokens"),
+            "ttft_ms": generation.get("ttft_ms"),
+        })
+        previous = prompt
+    return rows
+
+
+def find_baseline(results_dir: str, timestamp: str, model: str, test_ids: List[str]) -> Optional[str]:
+    """Other run of the model in the default layout sharing the most tests with this one (latest on ties)."""
+    candidates: Dict[str, int] = {}
+    for path in Path(results_dir).glob("*.json"):
+        if path.name.startswith(NON_TEST_PREFIXES):
+            continue
+        run = _run_timestamp(path)
+        if run == timestamp:
+            continue
+        try:
+            result = load_result(path)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if (result.get("model", {}).get("name") == model
+                and result.get("input", {}).get("prompt_layout", "template") != SHARED_LAYOUT
+                and result.get("test_case", {}).get("id") in test_ids
+                and (result.get("generation") or {}).get("prompt_tokens") is not None):
+            candidates[run] = candidates.get(run, 0) + 1
+    if not candidates:
+        return None
+    # Most shared tests first, then most recent
+    return max(candidates, key=lambda run: (candidates[run], run))
+
+
+def compare(rows: List[Dict[str, Any]], baseline_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals for the run and, on the tests both runs share, savings against the baseline."""
+    baseline = {row["test_id"]: row for row in baseline_rows}
+    for row in rows:
+        base = baseline.get(row["test_id"])
+        row["baseline_prompt_tokens_evaluated"] = base["prompt_tokens_evaluated"] if base else None
+        row["baseline_ttft_ms"] = base["ttft_ms"] if base else None
+
+    matched = [r for r in rows if r["prompt_tokens_evaluated"] is not None
+               and r["baseline_prompt_tokens_evaluated"] is not None]
+    timed = [r for r in matched if r["ttft_ms"] is not None and r["baseline_ttft_ms"] is not None]
+    summary: Dict[str, Any] = {
+        "prompt_tokens_estimated": sum(r["prompt_tokens_estimated"] for r in rows),
+        "shared_prefix_tokens_estimated": sum(r["shared_prefix_tokens_estimated"] for r in rows),
+        "baseline_shared_prefix_tokens_estimated": sum(r["shared_prefix_tokens_estimated"] for r in baseline_rows),
+        "matched_tests": len(matched),
+        "prefill_tokens_saved": None,
+        "mean_ttft_ms": None,
+        "baseline_mean_ttft_ms": None,
+        "ttft_reduction_percent": None,
+    }
+    if matched:
+        summary["prefill_tokens_saved"] = sum(r["baseline_prompt_tokens_evaluated"] - r["prompt_tokens_evaluated"]
+                                              for r in matched)
+    if timed:
+        current = mean(r["ttft_ms"] for r in timed)
+        base = mean(r["baseline_ttft_ms"] for r in timed)
+        summary["mean_ttft_ms"] = round(current, 1)
+        summary["baseline_mean_ttft_ms"] = round(base, 1)
+        summary["ttft_reduction_percent"] = round((1 - current / base) * 100, 1) if base else None
+    return summary
+
+
+def _fmt(value: Any) -> str:
+    return "N/A" if value is None else f"{value:,.0f}"
+
+
+def format_for_report(report: Dict[str, Any]) -> str:
+    """Format the prefix sharing comparison for inclusion in markdown reports."""
+    summary = report["summary"]
+    rows = report["tests"]
+    shared_share = (summary["shared_prefix_tokens_estimated"] / summary["prompt_tokens_estimated"] * 100
+                    if summary["prompt_tokens_estimated"] else 0)
+    lines = [
+        "## Prompt Prefix Sharing",
+        "*shared_prefix layout: data sources first, tests ordered to reuse the server's cached prompt prefix*",
+        "",
+        f"- **Test order:** {' → '.join(r['test_id'] for r in rows)}",
+        f"- **Prefix shared with the previous prompt (est.):** {summary['shared_prefix_tokens_estimated']:,} "
+        f"of {summary['prompt_tokens_estimated']:,} prompt tokens ({shared_share:.0f}%)",
+    ]
+    if report["baseline"]:
+        lines.append(f"- **Baseline:** run {report['baseline']} (template layout, file order), "
+                     f"{summary['matched_tests']} matching tests; it shared "
+                     f"{summary['baseline_shared_prefix_tokens_estimated']:,} prefix tokens (est.)")
+        if summary["prefill_tokens_saved"] is not None:
+            lines.append(f"- **Prefill tokens saved:** {summary['prefill_tokens_saved']:,} "
+                         f"(prompt tokens evaluated by Ollama, baseline minus this run)")
+        if summary["ttft_reduction_percent"] is not None:
+            lines.append(f"- **Mean TTFT:** {summary['mean_ttft_ms']:,.0f} ms vs "
+                         f"{summary['baseline_mean_ttft_ms']:,.0f} ms ({summary['ttft_reduction_percent']:.1f}% "
+                         f"reduction)")
+    else:
+        lines.append("- **Baseline:** none found; run the same tests once without --prompt-layout to compare")
+
+    lines += [
+        "",
+        "| # | Test ID | Prompt Tokens (est.) | Shared Prefix (est.) | Evaluated | TTFT (ms) "
+        "| Baseline Evaluated | Baseline TTFT (ms) |",
+        "|---|---------|----------------------|----------------------|-----------|-----------"
+        "|--------------------|--------------------|",
+    ]
+    for i, row in enumerate(rows, 1):
+        lines.append(f"| {i} | {row['test_id']} | {_fmt(row['prompt_tokens_estimated'])} | "
+                     f"{_fmt(row['shared_prefix_tokens_estimated'])} | {_fmt(row['prompt_tokens_evaluated'])} | "
+                     f"{_fmt(row['ttft_ms'])} | {_fmt(row['baseline_prompt_tokens_evaluated'])} | "
+                     f"{_fmt(row['baseline_ttft_ms'])} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prompt prefix sharing (KV cache reuse) report')
+    parser.add_argument('--timestamp', required=True, help='Test run timestamp')
+    parser.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+    parser.add_argument('--baseline', help='Timestamp of the default-layout run to compare against '
+                                           '(default: latest matching run)')
+    parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format (default: json)')
+
+    args = parser.parse_args()
+
+    rows = load_run(args.results_dir, args.timestamp)
+    if not any(row["layout"] == SHARED_LAYOUT for row in rows):
+        return
+
+    test_ids = [row["test_id"] for row in rows]
+    baseline = args.baseline or find_baseline(args.results_dir, args.timestamp, rows[0]["model"], test_ids)
+    baseline_rows = [row for row in load_run(args.results_dir, baseline) if row["test_id"] in test_ids] if baseline else []
+    report = {"timestamp": args.timestamp, "baseline": baseline, "tests": rows,
+              "summary": compare(rows, baseline_rows)}
+
+    if args.format == 'markdown':
+        print(format_for_report(report))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Streaming preprocessing pipeline for data source content.
+
+Each data source may declare a list of `preprocessing` stages. Stages are
+generator transforms over lines, chained so that content flows through the
+whole pipeline row by row:
+
+- trim:               strip each line and drop leading/trailing blank lines
+- normalize_whitespace / compact_whitespace:
+                      collapse runs of spaces/tabs and repeated blank lines
+- remove_comments:    drop lines starting with a comment prefix (default "#")
+- select_columns:     keep named CSV columns, in the given order
+- filter_rows:        keep CSV rows matching a condition on one column
+- dedup:              drop repeated rows (optionally by key columns)
+- sample:             deterministic row sample (hash-based fraction, or seeded
+                      reservoir of N rows in original order)
+- csv_to_markdown:    render CSV as a markdown table
+
+Stage outputs are cached by (input digest, stage config): the key of stage N
+chains the key of stage N-1 with its own configuration, so a pipeline sharing
+a prefix with another reuses the prefix's output. Uses only the Python
+standard library.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from content_cache import ContentCache
+
+Stage = Callable[[Iterable[str], Dict[str, Any]], Iterator[str]]
+
+
+def _csv_rows(lines: Iterable[str]) -> Iterator[List[str]]:
+    return csv.reader(lines)
+
+
+def _csv_line(row: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(row)
+    return buffer.getvalue()
+
+
+def _column_index(header: List[str], column: str) -> int:
+    try:
+        return header.index(column)
+    except ValueError:
+        raise ValueError(f"Column not found: {column} (available: {', '.join(header)})")
+
+
+def stage_trim(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    pending_blanks = 0
+    started = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            pending_blanks += started
+            continue
+        yield "\n" * pending_blanks + stripped + "\n"
+        pending_blanks = 0
+        started = True
+
+
+def stage_compact_whitespace(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    previous_blank = False
+    for line in lines:
+        compacted = re.sub(r"[ \t]+", " ", line.rstrip())
+        blank = not compacted.strip()
+        if blank and previous_blank:
+            continue
+        previous_blank = blank
+        yield compacted + "\n"
+
+
+def stage_remove_comments(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    prefix = config.get("prefix", "#")
+    for line in lines:
+        if not line.lstrip().startswith(prefix):
+            yield line
+
+
+def stage_select_columns(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    rows = _csv_rows(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    indexes = [_column_index(header, c) for c in config["columns"]]
+    yield _csv_line([header[i] for i in indexes])
+    for row in rows:
+        yield _csv_line([row[i] if i < len(row) else "" for i in indexes])
+
+
+def _row_predicate(header: List[str], config: Dict[str, Any]) -> Callable[[List[str]], bool]:
+    index = _column_index(header, config["column"])
+
+    def value(row: List[str]) -> str:
+        return row[index] if index < len(row) else ""
+
+    if "equals" in config:
+        return lambda row: value(row) == str(config["equals"])
+    if "not_equals" in config:
+        return lambda row: value(row) != str(config["not_equals"])
+    if "in" in config:
+        allowed = {str(v) for v in config["in"]}
+        return lambda row: value(row) in allowed
+    if "not_in" in config:
+        excluded = {str(v) for v in config["not_in"]}
+        return lambda row: value(row) not in excluded
+    if "matches" in config:
+        regex = re.compile(config["matches"])
+        return lambda row: bool(regex.search(value(row)))
+    if "min" in config or "max" in config:
+        low = float(config.get("min", float("-inf")))
+        high = float(config.get("max", float("inf")))
+
+        def in_range(row: List[str]) -> bool:
+            try:
+                return low <= float(value(row)) <= high
+            except ValueError:
+                return False
+        return in_range
+    raise ValueError("filter_rows needs one of: equals, not_equals, in, not_in, matches, min/max")
+
+
+def stage_filter_rows(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    rows = _csv_rows(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    keep = _row_predicate(header, config)
+    yield _csv_line(header)
+    for row in rows:
+        if keep(row):
+            yield _csv_line(row)
+
+
+def stage_dedup(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    seen = set()
+    key_columns = config.get("key")
+    if not key_columns:
+        for line in lines:
+            digest = hashlib.blake2b(line.encode(), digest_size=16).digest()
+            if digest not in seen:
+                seen.add(digest)
+                yield line
+        return
+    rows = _csv_rows(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    indexes = [_column_index(header, c) for c in key_columns]
+    yield _csv_line(header)
+    for row in rows:
+        key = tuple(row[i] if i < len(row) else "" for i in indexes)
+        if key not in seen:
+            seen.add(key)
+            yield _csv_line(row)
+
+
+def stage_sample(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    iterator = iter(lines)
+    if config.get("header", True):
+        first = next(iterator, None)
+        if first is None:
+            return
+        yield first
+    seed = str(config.get("seed", 0))
+    if "fraction" in config:
+        # Hash-based: the same row is always kept or dropped, independent of position
+        threshold = float(config["fraction"]) * 2 ** 64
+        for line in iterator:
+            digest = hashlib.blake2b((seed + line).encode(), digest_size=8).digest()
+            if int.from_bytes(digest, "big") < threshold:
+                yield line
+        return
+    rows = int(config["rows"])
+    rng = random.Random(seed)
+    reservoir = []
+    for index, line in enumerate(iterator):
+        if index < rows:
+            reservoir.append((index, line))
+        else:
+            slot = rng.randint(0, index)
+            if slot < rows:
+                reservoir[slot] = (index, line)
+    for _, line in sorted(reservoir):
+        yield line
+
+
+def stage_csv_to_markdown(lines: Iterable[str], config: Dict[str, Any]) -> Iterator[str]:
+    rows = _csv_rows(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+
+    def cell(value: str) -> str:
+        return value.replace("|", "\\|").replace("\n", " ")
+
+    yield "| " + " | ".join(cell(c) for c in header) + " |\n"
+    yield "|" + "---|" * len(header) + "\n"
+    for row in rows:
+        yield "| " + " | ".join(cell(c) for c in row) + " |\n"
+
+
+STAGES: Dict[str, Stage] = {
+    "trim": stage_trim,
+    "normalize_whitespace": stage_compact_whitespace,
+    "compact_whitespace": stage_compact_whitespace,
+    "remove_comments": stage_remove_comments,
+    "select_columns": stage_select_columns,
+    "filter_rows": stage_filter_rows,
+    "dedup": stage_dedup,
+    "sample": stage_sample,
+    "csv_to_markdown": stage_csv_to_markdown,
+}
+
+
+def _stage_config(stage: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage configuration relevant to its output (descriptions do not affect the key)."""
+    return {k: v for k, v in stage.items() if k != "description"}
+
+
+def _chain_key(previous: str, stage: Dict[str, Any]) -> str:
+    encoded = json.dumps(_stage_config(stage), sort_keys=True, default=str)
+    return hashlib.sha256(f"{previous}\n{encoded}".encode()).hexdigest()
+
+
+class _Collector:
+    """Pass lines through while keeping a copy for the stage cache."""
+
+    def __init__(self, lines: Iterable[str]):
+        self.lines = lines
+        self.collected: List[str] = []
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self.lines:
+            self.collected.append(line)
+            yield line
+
+
+def run_pipeline(content: str, stages: List[Dict[str, Any]], cache: Optional[ContentCache] = None,
+                 ttl: float = 0) -> str:
+    """Apply preprocessing stages to content, reusing cached stage outputs."""
+    for stage in stages:
+        if stage.get("type") not in STAGES:
+            raise ValueError(f"Unsupported preprocessing stage: {stage.get('type')} "
+                             f"(expected one of {', '.join(sorted(STAGES))})")
+
+    use_cache = cache is not None and ttl > 0
+    keys = []
+    previous = hashlib.sha256(content.encode()).hexdigest()
+    for stage in stages:
+        previous = _chain_key(previous, stage)
+        keys.append(f"stage:{previous}")
+
+    # Resume after the longest prefix of stages whose output is cached
+    start, text = 0, content
+    if use_cache:
+        for i in range(len(stages) - 1, -1, -1):
+            cached = cache.get(keys[i])
+            if cached is not None:
+                start, text = i + 1, cached
+                break
+    if start == len(stages):
+        return text
+
+    stream: Iterable[str] = io.StringIO(text)
+    collectors = []
+    for stage in stages[start:]:
+        stream = STAGES[stage["type"]](stream, stage)
+        if use_cache:
+            stream = _Collector(stream)
+            collectors.append(stream)
+    result = "".join(stream)
+
+    for key, collector in zip(keys[start:], collectors):
+        cache.put(key, "".join(collector.collected), ttl, [])
+    return result
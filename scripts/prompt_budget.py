@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Context-window-aware budgeting for substituted data sources.
+
+Ollama silently truncates prompts longer than the model's num_ctx, which wastes
+the prefill and produces answers to a mangled prompt. PromptBuilder uses this
+module to estimate the token cost of each substituted source and, when the
+prompt would not fit, trim sources according to a budget policy:
+
+- proportional: every source keeps the same fraction of its tokens (truncated)
+- sample_rows:  like proportional, but tabular sources (CSV/TSV) keep their
+                header plus evenly spaced rows instead of being cut off
+- priority:     sources are kept whole in priority order; the lowest-priority
+                sources are truncated or dropped first
+
+Token counts are estimates (no tokenizer dependency); CHARS_PER_TOKEN is
+deliberately conservative so estimates err towards fitting.
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+CHARS_PER_TOKEN = 3.5
+DEFAULT_NUM_CTX = 4096  # Ollama's default when num_ctx is not set
+DEFAULT_RESERVE_OUTPUT_TOKENS = 512
+POLICIES = ("proportional", "sample_rows", "priority")
+TRUNCATION_MARKER = "\n[... {removed} of {original} estimated tokens omitted to fit the context window ...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for budgeting purposes."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Keep roughly the first `tokens` tokens, cutting at a line boundary when possible."""
+    limit = max(int(tokens * CHARS_PER_TOKEN), 0)
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    return text[:cut if cut > limit // 2 else limit]
+
+
+def _is_tabular(lines: List[str]) -> bool:
+    """Heuristic: a delimited header and delimited leading rows (CSV/TSV)."""
+    delimiter = "," if "," in lines[0] else "\t" if "\t" in lines[0] else None
+    return delimiter is not None and all(delimiter in line for line in lines[1:21] if line.strip())
+
+
+def sample_rows_to_tokens(text: str, tokens: int) -> Optional[str]:
+    """Keep the header and evenly spaced rows; None if the text is not tabular."""
+    lines = text.splitlines()
+    if len(lines) < 3 or not _is_tabular(lines):
+        return None
+    header, rows = lines[0], lines[1:]
+    limit = tokens * CHARS_PER_TOKEN - len(header) - 1
+    average = sum(len(row) + 1 for row in rows) / len(rows)
+    keep = int(limit // average) if average else 0
+    if keep <= 0:
+        return header
+    if keep >= len(rows):
+        return text
+    step = len(rows) / keep
+    return "\n".join([header] + [rows[int(i * step)] for i in range(keep)])
+
+
+class BudgetPolicy:
+    """Resolved budget settings for one prompt."""
+
+    def __init__(self, num_ctx: int = DEFAULT_NUM_CTX, reserve_output_tokens: int = DEFAULT_RESERVE_OUTPUT_TOKENS,
+                 policy: str = "proportional", priority: Optional[List[str]] = None,
+                 num_ctx_explicit: bool = False):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown budget policy: {policy} (expected one of {', '.join(POLICIES)})")
+        self.num_ctx = num_ctx
+        # Only an explicit num_ctx (per model, per test or from the caller) is
+        # sent to Ollama; the global default just sizes the budget
+        self.num_ctx_explicit = num_ctx_explicit
+        self.reserve_output_tokens = reserve_output_tokens
+        self.policy = policy
+        self.priority = priority or []
+
+    @property
+    def prompt_tokens(self) -> int:
+        return max(self.num_ctx - self.reserve_output_tokens, 0)
+
+    @classmethod
+    def resolve(cls, models_config: Optional[Dict[str, Any]], model: Optional[str] = None,
+                num_ctx: Optional[int] = None, test_config: Optional[Dict[str, Any]] = None) -> "BudgetPolicy":
+        """Combine defaults, models.yaml, per-test prompt_budget and an explicit num_ctx."""
+        models_config = models_config or {}
+        settings = dict(models_config.get("prompt_budget") or {})
+        model_settings = (models_config.get("models") or {}).get(model or "") or {}
+        test_settings = (test_config or {}).get("prompt_budget") or {}
+        settings.update({k: v for k, v in model_settings.items() if k in ("num_ctx", "reserve_output_tokens", "policy")})
+        settings.update(test_settings)
+        if num_ctx:
+            settings["num_ctx"] = num_ctx
+        return cls(
+            num_ctx=int(settings.get("num_ctx", DEFAULT_NUM_CTX)),
+            reserve_output_tokens=int(settings.get("reserve_output_tokens", DEFAULT_RESERVE_OUTPUT_TOKENS)),
+            policy=settings.get("policy", "proportional"),
+            priority=settings.get("priority"),
+            num_ctx_explicit=bool(num_ctx) or "num_ctx" in model_settings or "num_ctx" in test_settings,
+        )
+
+
+def apply_budget(template_tokens: int, contents: Dict[str, str], occurrences: Dict[str, int],
+                 budget: BudgetPolicy) -> Dict[str, Any]:
+    """Trim source contents in place so the prompt fits; return a report of what changed."""
+    # Sources the template never references cost nothing
+    sizes = {source_id: estimate_tokens(text) for source_id, text in contents.items()
+             if occurrences.get(source_id, 1) > 0}
+    demand = sum(sizes[s] * occurrences.get(s, 1) for s in sizes)
+    available = max(budget.prompt_tokens - template_tokens, 0)
+    report = {
+        "num_ctx": budget.num_ctx,
+        "num_ctx_explicit": budget.num_ctx_explicit,
+        "reserve_output_tokens": budget.reserve_output_tokens,
+        "policy": budget.policy,
+        "template_tokens": template_tokens,
+        "source_tokens": demand,
+        "estimated_prompt_tokens": template_tokens + demand,
+        "trimmed": [],
+    }
+    if demand <= available:
+        report["fits"] = True
+        return report
+
+    allowances: Dict[str, int] = {}
+    if budget.policy == "priority":
+        ranked = [s for s in budget.priority if s in sizes] + [s for s in sizes if s not in budget.priority]
+        remaining = available
+        for source_id in ranked:
+            cost = sizes[source_id] * occurrences.get(source_id, 1)
+            granted = min(cost, remaining)
+            allowances[source_id] = granted // occurrences.get(source_id, 1)
+            remaining -= granted
+    else:
+        fraction = available / demand
+        allowances = {s: int(sizes[s] * fraction) for s in sizes}
+
+    marker_tokens = estimate_tokens(TRUNCATION_MARKER.format(removed=10 ** 6, original=10 ** 6))
+    for source_id, allowance in allowances.items():
+        original = sizes[source_id]
+        if allowance >= original:
+            continue
+        target = max(allowance - marker_tokens, 0)
+        method = "truncate"
+        trimmed = None
+        if budget.policy == "sample_rows":
+            trimmed = sample_rows_to_tokens(contents[source_id], target)
+            method = "sample_rows" if trimmed is not None else method
+        if trimmed is None:
+            trimmed = truncate_to_tokens(contents[source_id], target)
+        if trimmed == contents[source_id]:
+            continue  # Already within the target once measured row by row; nothing was removed
+        kept = estimate_tokens(trimmed)
+        contents[source_id] = trimmed + TRUNCATION_MARKER.format(removed=original - kept, original=original)
+        report["trimmed"].append({
+            "source": source_id,
+            "method": method,
+            "original_tokens": original,
+            "kept_tokens": kept,
+            "kept_ratio": round(kept / original, 3) if original else 0.0,
+        })
+
+    final = sum(estimate_tokens(contents[s]) * occurrences.get(s, 1) for s in sizes)
+    report["estimated_prompt_tokens"] = template_tokens + final
+    report["fits"] = template_tokens + final <= budget.prompt_tokens
+    return report
@@ -18,12 +18,14 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from tracing import span
+
 # Load environment variables
 load_dotenv()
 
@@ -112,7 +114,8 @@ Ensure scores are integers from 0-10. Be objective and consistent with the rubri
             message = HumanMessage(content=prompt)
             
             # Get evaluation from Gemini
-            response = self.llm.invoke([message])
+            with span("gemini.evaluate", cat="external"):
+                response = self.llm.invoke([message])
             
             # Extract and parse JSON response
             response_text = response.content.strip()
@@ -188,103 +191,212 @@ Ensure scores are integers from 0-10. Be objective and consistent with the rubri
                 }
             }
     
-    def evaluate_test_results(self, results_file: str) -> Dict:
-        """Evaluate all test results in a results file"""
-        # Load the results file
-        with open(results_file, 'r', encoding='utf-8') as f:
-            results_data = json.load(f)
-        
-        # Initialize qualitative results structure
-        qualitative_results = {
-            'test_session': results_data.get('test_session', {}),
-            'quantitative_summary': results_data.get('summary', {}),
-            'qualitative_evaluations': {},
-            'qualitative_summary': {
+    def evaluate_test_results(self, results_file: str, output_file: str, resume: bool = True) -> Dict:
+        """Evaluate all test results, checkpointing each judgement as it completes.
+
+        Results are consumed as a stream and every evaluation is appended to a
+        checkpoint file (<output_file>.partial.ndjson) immediately, so a crash
+        loses at most the test in flight. On restart, already-judged test ids
+        are skipped; fallback judgements (API or parse errors) are retried and
+        never count towards the averages. The final report is assembled from
+        the checkpoint, which is kept while any evaluation is still failing.
+        """
+        checkpoint_file = Path(f"{output_file}.partial.ndjson")
+        if not resume and checkpoint_file.exists():
+            checkpoint_file.unlink()
+
+        scores = RunningScores()
+        for test_id, evaluation in iter_checkpoint(checkpoint_file):
+            scores.add(test_id, evaluation)
+        if scores.count or scores.failed_ids:
+            print(f"Resuming: {scores.count} tests already evaluated, "
+                  f"{len(scores.failed_ids)} failed evaluations to retry")
+
+        header = {}
+        with open(checkpoint_file, 'a', encoding='utf-8') as checkpoint:
+            for record in iter_results(results_file):
+                if 'test_session' in record:
+                    header = record
+                    continue
+
+                test_name = record['test_id']
+                if test_name in scores.evaluated_ids:
+                    continue
+
+                print(f"Evaluating {test_name}...")
+                if not record['output']:
+                    print(f"Warning: No output found for {test_name}")
+                    continue
+
+                evaluation = self.evaluate_output(record['test_info'], record['output'])
+
+                # Persist before moving on so a crash never loses a finished judgement
+                checkpoint.write(json.dumps({'test_id': test_name, 'evaluation': evaluation},
+                                            ensure_ascii=False) + '\n')
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+                scores.add(test_name, evaluation)
+
+        summary = {
+            'test_session': header.get('test_session', {}),
+            'quantitative_summary': header.get('summary', {}),
+            'qualitative_summary': scores.summary()
+        }
+        write_report(output_file, summary, checkpoint_file)
+        if scores.failed_ids:
+            print(f"Warning: {len(scores.failed_ids)} evaluations failed; "
+                  f"re-run to retry them (checkpoint kept at {checkpoint_file})")
+        else:
+            checkpoint_file.unlink()
+        return summary
+
+
+class RunningScores:
+    """Incrementally maintained score totals for the summary averages."""
+
+    def __init__(self):
+        self.total_correctness = 0
+        self.total_completeness = 0
+        self.total_quality = 0
+        self.count = 0
+        self.evaluated_ids = set()
+        self.failed_ids = set()
+
+    def add(self, test_id: str, evaluation: Dict) -> None:
+        if test_id in self.evaluated_ids:
+            return
+        if evaluation_failed(evaluation):
+            # Fallback scores are placeholders: keep them out of the averages
+            # and leave the test eligible for another attempt
+            self.failed_ids.add(test_id)
+            return
+        self.failed_ids.discard(test_id)
+        self.evaluated_ids.add(test_id)
+        self.total_correctness += evaluation['correctness']['score']
+        self.total_completeness += evaluation['completeness']['score']
+        self.total_quality += evaluation['quality']['score']
+        self.count += 1
+
+    def summary(self) -> Dict:
+        if self.count == 0:
+            return {
                 'avg_correctness': 0.0,
                 'avg_completeness': 0.0,
                 'avg_quality': 0.0,
-                'total_tests_evaluated': 0
+                'total_tests_evaluated': 0,
+                'failed_evaluations': len(self.failed_ids)
             }
+        return {
+            'avg_correctness': round(self.total_correctness / self.count, 2),
+            'avg_completeness': round(self.total_completeness / self.count, 2),
+            'avg_quality': round(self.total_quality / self.count, 2),
+            'total_tests_evaluated': self.count,
+            'failed_evaluations': len(self.failed_ids)
         }
-        
-        total_correctness = 0
-        total_completeness = 0
-        total_quality = 0
-        evaluated_count = 0
-        
-        # Check if this is a consolidated file with multiple results or a single test file
-        if 'results' in results_data:
-            # Consolidated format: multiple tests
-            for test_name, test_data in results_data.get('results', {}).items():
-                print(f"Evaluating {test_name}...")
-                
-                # Extract test information
-                test_info = {
-                    'test_type': test_data.get('test_config', {}).get('type', 'Unknown'),
-                    'model': test_data.get('model', 'Unknown'),
-                    'prompt': test_data.get('test_config', {}).get('prompt', 'Not available'),
-                    'description': test_data.get('test_config', {}).get('description', '')
-                }
-                
-                # Get the output content
-                output_content = test_data.get('output', '')
-                
-                if not output_content:
-                    print(f"Warning: No output found for {test_name}")
+
+
+def evaluation_failed(evaluation: Dict) -> bool:
+    """True for the fallback entries evaluate_output returns on API or parse errors."""
+    return 'error' in evaluation.get('_metadata', {})
+
+
+def iter_results(results_file: str) -> Iterator[Dict]:
+    """Yield a session header followed by one record per test result.
+
+    NDJSON consolidated files (one JSON object per line, header first) are
+    streamed line by line. Legacy consolidated JSON and single-test result
+    files are still accepted and loaded whole.
+    """
+    if results_file.endswith('.ndjson'):
+        with open(results_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
                     continue
-                
-                # Evaluate this test
-                evaluation = self.evaluate_output(test_info, output_content)
-                
-                # Store the evaluation
-                qualitative_results['qualitative_evaluations'][test_name] = evaluation
-                
-                # Update running totals
-                total_correctness += evaluation['correctness']['score']
-                total_completeness += evaluation['completeness']['score']
-                total_quality += evaluation['quality']['score']
-                evaluated_count += 1
-        else:
-            # Single test file format
-            test_id = results_data.get('test_case', {}).get('id', 'unknown')
-            print(f"Evaluating {test_id}...")
-            
-            # Extract test information from single test format
-            test_info = {
+                data = json.loads(line)
+                if 'test_session' in data:
+                    yield data
+                else:
+                    yield _consolidated_record(data['test_id'], data)
+        return
+
+    with open(results_file, 'r', encoding='utf-8') as f:
+        results_data = json.load(f)
+
+    yield {'test_session': results_data.get('test_session', {}), 'summary': results_data.get('summary', {})}
+
+    if 'results' in results_data:
+        # Consolidated format: multiple tests
+        for test_name, test_data in results_data.get('results', {}).items():
+            yield _consolidated_record(test_name, test_data)
+    else:
+        # Single test file format
+        yield {
+            'test_id': results_data.get('test_case', {}).get('id', 'unknown'),
+            'test_info': {
                 'test_type': results_data.get('test_case', {}).get('category', 'Unknown'),
                 'model': results_data.get('model', {}).get('name', 'Unknown'),
                 'prompt': results_data.get('input', {}).get('prompt', 'Not available'),
                 'description': results_data.get('test_case', {}).get('description', '')
-            }
-            
-            # Get the output content
-            output_content = results_data.get('output', {}).get('content', '')
-            
-            if not output_content:
-                print(f"Warning: No output found for {test_id}")
-            else:
-                # Evaluate this test
-                evaluation = self.evaluate_output(test_info, output_content)
-                
-                # Store the evaluation
-                qualitative_results['qualitative_evaluations'][test_id] = evaluation
-                
-                # Update running totals
-                total_correctness += evaluation['correctness']['score']
-                total_completeness += evaluation['completeness']['score']
-                total_quality += evaluation['quality']['score']
-                evaluated_count += 1
-        
-        # Calculate averages
-        if evaluated_count > 0:
-            qualitative_results['qualitative_summary'] = {
-                'avg_correctness': round(total_correctness / evaluated_count, 2),
-                'avg_completeness': round(total_completeness / evaluated_count, 2),
-                'avg_quality': round(total_quality / evaluated_count, 2),
-                'total_tests_evaluated': evaluated_count
-            }
-        
-        return qualitative_results
+            },
+            'output': results_data.get('output', {}).get('content', '')
+        }
+
+
+def _consolidated_record(test_name: str, test_data: Dict) -> Dict:
+    """Normalise a consolidated-format entry into an evaluation record."""
+    return {
+        'test_id': test_name,
+        'test_info': {
+            'test_type': test_data.get('test_config', {}).get('type', 'Unknown'),
+            'model': test_data.get('model', 'Unknown'),
+            'prompt': test_data.get('test_config', {}).get('prompt', 'Not available'),
+            'description': test_data.get('test_config', {}).get('description', '')
+        },
+        'output': test_data.get('output', '')
+    }
+
+
+def iter_checkpoint(checkpoint_file: Path) -> Iterator[Tuple[str, Dict]]:
+    """Yield (test_id, evaluation) pairs from a checkpoint, ignoring a torn final line."""
+    if not checkpoint_file.exists():
+        return
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from an interrupted run
+            yield entry['test_id'], entry['evaluation']
+
+
+def write_report(output_file: str, summary: Dict, checkpoint_file: Path) -> None:
+    """Stream the final report from the checkpoint without holding all evaluations.
+
+    A test that failed and was later retried successfully appears twice in the
+    checkpoint; the successful judgement wins, otherwise the first one does.
+    """
+    tmp_file = Path(f"{output_file}.tmp")
+    succeeded = {test_id for test_id, evaluation in iter_checkpoint(checkpoint_file)
+                 if not evaluation_failed(evaluation)}
+    seen = set()
+    with open(tmp_file, 'w', encoding='utf-8') as out:
+        out.write('{\n')
+        out.write(f'  "test_session": {json.dumps(summary["test_session"], ensure_ascii=False)},\n')
+        out.write(f'  "quantitative_summary": {json.dumps(summary["quantitative_summary"], ensure_ascii=False)},\n')
+        out.write('  "qualitative_evaluations": {')
+        first = True
+        for test_id, evaluation in iter_checkpoint(checkpoint_file):
+            if test_id in seen or (test_id in succeeded and evaluation_failed(evaluation)):
+                continue
+            seen.add(test_id)
+            out.write('' if first else ',')
+            out.write(f'\n    {json.dumps(test_id)}: {json.dumps(evaluation, ensure_ascii=False)}')
+            first = False
+        out.write('\n  },\n')
+        out.write(f'  "qualitative_summary": {json.dumps(summary["qualitative_summary"])}\n')
+        out.write('}\n')
+    os.replace(tmp_file, output_file)
 
 
 def main():
@@ -293,6 +405,8 @@ def main():
     parser.add_argument('results_file', help='Path to the test results JSON file')
     parser.add_argument('--output', '-o', help='Output file for qualitative evaluation results')
     parser.add_argument('--api-key', help='Google API key (or use GOOGLE_API_KEY env var)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Discard any checkpoint from an interrupted run and re-evaluate all tests')
     
     args = parser.parse_args()
     
@@ -314,13 +428,10 @@ def main():
         print("Initializing Gemini 2.5 Flash Preview evaluator...")
         evaluator = QualitativeEvaluator(api_key=args.api_key)
         
-        # Perform evaluation
+        # Perform evaluation (results are checkpointed as each test completes)
         print(f"Evaluating results from {args.results_file}...")
-        qualitative_results = evaluator.evaluate_test_results(args.results_file)
-        
-        # Save results
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(qualitative_results, f, indent=2, ensure_ascii=False)
+        qualitative_results = evaluator.evaluate_test_results(
+            args.results_file, str(output_file), resume=not args.restart)
         
         # Print summary
         summary = qualitative_results['qualitative_summary']
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Database and HTTP data source processors.
+
+database_query sources run a query through a pooled DB-API connection (sqlite3
+built in; any other DB-API driver by module name) and render the rows as CSV,
+markdown or JSON. api_call sources fetch a URL over keep-alive connections with
+timeouts and conditional requests: the ETag/Last-Modified validators and body
+of every response are kept in the on-disk content cache, so a 304 reuses the
+stored body, also in later processes. Connection pools and keep-alive
+connections are per process and shared by every DataSourceProcessor;
+run-tests.sh builds all prompts of a category with one `config_loader.py
+build-prompts` process so a run opens each connection once. Uses only the
+Python standard library.
+"""
+
+import csv
+import http.client
+import importlib
+import io
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+
+from content_cache import ContentCache
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_ROWS = 1000
+VALIDATOR_TTL = 30 * 24 * 3600  # Keep ETags long after the content TTL expires
+OUTPUT_FORMATS = ("csv", "markdown", "json")
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections for one database."""
+
+    def __init__(self, driver: str, connect_args: Tuple, connect_kwargs: Dict[str, Any],
+                 size: int = DEFAULT_POOL_SIZE):
+        self.driver = importlib.import_module(driver)
+        self.connect_args = connect_args
+        self.connect_kwargs = connect_kwargs
+        self.size = size
+        self.opened = 0
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _open(self):
+        connection = self.driver.connect(*self.connect_args, **self.connect_kwargs)
+        self.opened += 1
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a connection, opening one only if none is idle and the pool has room."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self.opened < self.size
+                conn = self._open() if can_open else None
+            if conn is None:
+                conn = self._idle.get()
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database: Dict[str, Any], project_root: Path) -> ConnectionPool:
+    """Process-wide pool for a database configuration."""
+    driver = database.get("driver", "sqlite3")
+    if driver == "sqlite3":
+        path = str(project_root / database["path"])
+        # Read-only URI: prompt building must never modify the database
+        connect_args = (f"file:{path}?mode=ro",)
+        connect_kwargs = {"uri": True, "check_same_thread": False}
+    else:
+        connect_args = tuple(database.get("connect_args", []))
+        connect_kwargs = {k: os.path.expandvars(v) if isinstance(v, str) else v
+                          for k, v in database.get("connect_kwargs", {}).items()}
+        if "dsn" in database:
+            connect_args = (os.path.expandvars(database["dsn"]),) + connect_args
+
+    key = (driver, connect_args, tuple(sorted((k, str(v)) for k, v in connect_kwargs.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(driver, connect_args, connect_kwargs,
+                                         database.get("pool_size", DEFAULT_POOL_SIZE))
+        return _pools[key]
+
+
+def format_rows(columns: Sequence[str], rows: List[Sequence[Any]], output_format: str) -> str:
+    """Render query results for inclusion in a prompt."""
+    if output_format == "json":
+        return json.dumps([dict(zip(columns, row)) for row in rows], indent=2, default=str)
+    if output_format == "markdown":
+        lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+        lines += ["| " + " | ".join("" if v is None else str(v) for v in row) + " |" for row in rows]
+        return "\n".join(lines)
+    if output_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+        return buffer.getvalue().rstrip("\n")
+    raise ValueError(f"Unsupported output format: {output_format} (expected one of {', '.join(OUTPUT_FORMATS)})")
+
+
+def run_database_query(config: Dict[str, Any], project_root: Path) -> str:
+    """Execute a database_query source and return formatted rows."""
+    pool = get_pool(config["database"], project_root)
+    max_rows = config.get("max_rows", DEFAULT_MAX_ROWS)
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(config["query"], config.get("params", []))
+            columns = [d[0] for d in cursor.description or []]
+            rows = cursor.fetchmany(max_rows + 1)
+        finally:
+            cursor.close()
+    truncated = len(rows) > max_rows
+    content = format_rows(columns, rows[:max_rows], config.get("format", "csv"))
+    if truncated:
+        content += f"\n[... results truncated to {max_rows} rows ...]"
+    return content
+
+
+class HttpClient:
+    """Keep-alive HTTP(S) connections with ETag/Last-Modified revalidation.
+
+    Each thread keeps its own connection per (scheme, host, timeout), so
+    concurrent fetches never wait on one another's network round trips.
+    """
+
+    def __init__(self, validator_cache: Optional[ContentCache] = None):
+        self.validator_cache = validator_cache
+        self.connections_opened = 0
+        self._local = threading.local()
+        self._open: Set[http.client.HTTPConnection] = set()
+        self._lock = threading.Lock()  # Guards connections_opened and _open only
+
+    def _connections(self) -> Dict[Tuple[str, str, float], http.client.HTTPConnection]:
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _connection(self, scheme: str, netloc: str, timeout: float) -> http.client.HTTPConnection:
+        connections = self._connections()
+        key = (scheme, netloc, timeout)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connections[key] = cls(netloc, timeout=timeout)
+            with self._lock:
+                self._open.add(connections[key])
+                self.connections_opened += 1
+        return connections[key]
+
+    def _discard(self, key: Tuple[str, str, float]) -> None:
+        conn = self._connections().pop(key, None)
+        if conn is not None:
+            conn.close()
+            with self._lock:
+                self._open.discard(conn)
+
+    def _request(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes],
+                 timeout: float) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        key = (parts.scheme, parts.netloc, timeout)
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    self._discard(key)
+                return response.status, {k.lower(): v for k, v in response.getheaders()}, data
+            except (http.client.HTTPException, ConnectionError, BrokenPipeError):
+                # Server closed an idle keep-alive connection: reconnect once
+                self._discard(key)
+                if attempt:
+                    raise
+        raise RuntimeError("unreachable")
+
+    def fetch(self, config: Dict[str, Any]) -> str:
+        """Fetch an api_call source, revalidating a stored copy when one exists."""
+        url = os.path.expandvars(config["url"])
+        method = config.get("method", "GET").upper()
+        timeout = float(config.get("timeout", DEFAULT_TIMEOUT))
+        headers = {k: os.path.expandvars(str(v)) for k, v in config.get("headers", {}).items()}
+        body = config.get("body")
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers.setdefault("Content-Type", "application/json")
+        payload = body.encode("utf-8") if isinstance(body, str) else None
+
+        validator_key = f"http:{method}:{url}"
+        stored = None
+        if self.validator_cache is not None and method == "GET":
+            cached = self.validator_cache.get(validator_key)
+            stored = json.loads(cached) if cached else None
+            if stored and stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored and stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        status, response_headers, data = self._request(method, url, headers, payload, timeout)
+
+        if status == 304 and stored:
+            text = stored["body"]
+        elif 200 <= status < 300:
+            text = data.decode("utf-8", errors="replace")
+            validators = {k: response_headers.get(h) for k, h in (("etag", "etag"), ("last_modified", "last-modified"))}
+            if self.validator_cache is not None and method == "GET" and any(validators.values()):
+                self.validator_cache.put(validator_key, json.dumps({**validators, "body": text}), VALIDATOR_TTL, [])
+        else:
+            raise RuntimeError(f"HTTP {status} from {url}")
+
+        return select_json(text, config["json_path"]) if "json_path" in config else text
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._open:
+                conn.close()  # A later request on it simply reconnects
+            self._open.clear()
+        self._connections().clear()
+
+
+def select_json(text: str, path: str) -> str:
+    """Select part of a JSON response with a dotted path (e.g. "data.items")."""
+    value: Any = json.loads(text)
+    for part in filter(None, path.split(".")):
+        value = value[int(part)] if isinstance(value, list) else value[part]
+    return value if isinstance(value, str) else json.dumps(value, indent=2)
+
+
+_http_client: Optional[HttpClient] = None
+
+
+def get_http_client(validator_cache: Optional[ContentCache] = None) -> HttpClient:
+    """Process-wide HTTP client."""
+    global _http_client
+    if _http_client is None:
+        _http_client = HttpClient(validator_cache)
+    return _http_client
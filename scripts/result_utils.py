@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for reading and enriching per-test result JSON files.
+Uses only the Python standard library.
+"""
+
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+# Terminal control sequences written by `ollama run` (cursor moves, spinner, colours)
+ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+SPINNER_RE = re.compile(r'[⠀-⣿]')
+
+# Files in results/ that share the timestamp suffix but are not test results
+NON_TEST_PREFIXES = ("hardware_profile_", "test_summary_", "test_execution_")
+
+
+def strip_terminal_codes(text: str) -> str:
+    """Remove terminal escape codes while preserving indentation.
+
+    clean-outputs.sh strips leading whitespace for readability, which breaks
+    Python code blocks, so automated checkers clean the raw output themselves.
+    """
+    text = ANSI_ESCAPE_RE.sub('', text)
+    text = SPINNER_RE.sub('', text)
+    return text.replace('\r', '')
+
+
+def iter_result_files(results_dir: str, timestamp: str) -> Iterator[Path]:
+    """Yield per-test result files for a given run timestamp."""
+    for path in sorted(Path(results_dir).glob(f"*_{timestamp}.json")):
+        if path.name.startswith(NON_TEST_PREFIXES):
+            continue
+        yield path
+
+
+def load_result(path: Path) -> Dict[str, Any]:
+    """Load a single test result file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON to a temporary file and rename it into place."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def update_result(path: Path, updater: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """Load a result file, apply an in-place updater and write it back."""
+    result = load_result(path)
+    updater(result)
+    write_json_atomic(path, result)
+    return result
+
+
+def attach_automated_metrics(path: Path, key: str, payload: Dict[str, Any]) -> None:
+    """Store an automated check payload under metrics.automated.<key>."""
+    def _update(result: Dict[str, Any]) -> None:
+        metrics = result.setdefault("metrics", {})
+        metrics.setdefault("automated", {})[key] = payload
+
+    update_result(path, _update)
+
+
+def output_text(result: Dict[str, Any]) -> str:
+    """Return the cleaned model output stored in a result file."""
+    return strip_terminal_codes(result.get("output", {}).get("content", "") or "")
+
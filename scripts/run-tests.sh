@@ -6,13 +6,36 @@
 
 set -e
 
-# Configuration
-TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
+# Configuration (a driver such as variant_compare.py may fix the run timestamp)
+TIMESTAMP="${OLLAMA_TEST_TIMESTAMP:-$(date +"%Y%m%d_%H%M%S")}"
 OUTPUT_DIR="outputs"
 RESULTS_DIR="results"
 REPORTS_DIR="reports"
 LOG_FILE="${RESULTS_DIR}/test_execution_${TIMESTAMP}.log"
 CONFIG_LOADER="scripts/config_loader.py"
+OLLAMA_CLIENT="scripts/ollama_client.py"
+TELEMETRY_SAMPLER="scripts/telemetry_sampler.py"
+TELEMETRY_INTERVAL="1"
+MODEL_METADATA_SCRIPT="scripts/model_metadata.py"
+MODEL_METADATA="null"
+METRICS_EXPORTER="scripts/metrics_exporter.py"
+METRICS_PORT=""
+PROGRESS_FILE=""
+METRICS_PID=""
+TRACE=false
+OPTION_SWEEP="scripts/option_sweep.py"
+RUNTIME_PROFILE=true
+RUNTIME_OPTIONS=""
+RUNTIME_NUM_CTX=""
+LOAD_BENCHMARK_SCRIPT="scripts/load_benchmark.py"
+LOAD_BENCHMARK_REPEATS=""
+PROMPT_LAYOUT="template"
+TEST_SEQUENCE=0
+# Tests end at their deadline inside the client; the process is only killed if it overruns by this much
+CLIENT_KILL_GRACE=30
+CLIENT_TIMEOUT_EXIT=3  # ollama_client.py EXIT_TIMEOUT; 124/137 mean the outer timeout killed it
+MODEL=""
+CATEGORY=""
 
 # Colors for output
 RED='\033[0;31m'
@@ -28,16 +51,87 @@ mkdir -p "${OUTPUT_DIR}" "${RESULTS_DIR}" "${REPORTS_DIR}"
 
 # Parse command line arguments
 HELP=false
+USAGE_ERROR=false
 
 while [[ $# -gt 0 ]]; do
+    # A value flag given last would make `shift 2` fail and, under set -e, exit silently
+    if [[ "$1" =~ ^--(model|category|telemetry-interval|metrics-port|prompt-layout|load-benchmark)$ && $# -lt 2 ]]; then
+        echo "Missing value for $1"
+        HELP=true
+        USAGE_ERROR=true
+        break
+    fi
     case $1 in
         --help|-h)
             HELP=true
             shift
             ;;
+        --model)
+            if [[ -z "$2" || "$2" == --* ]]; then
+                echo "Missing value for --model"
+                HELP=true
+                USAGE_ERROR=true
+            fi
+            MODEL="$2"
+            shift 2
+            ;;
+        --category)
+            if [[ -z "$2" || "$2" == --* ]]; then
+                echo "Missing value for --category"
+                HELP=true
+                USAGE_ERROR=true
+            fi
+            CATEGORY="$2"
+            shift 2
+            ;;
+        --telemetry-interval)
+            if [[ ! "$2" =~ ^[0-9]+(\.[0-9]+)?$ ]]; then
+                echo "Invalid --telemetry-interval: $2"
+                HELP=true
+                USAGE_ERROR=true
+            fi
+            TELEMETRY_INTERVAL="$2"
+            shift 2
+            ;;
+        --metrics-port)
+            if [[ ! "$2" =~ ^[0-9]+$ ]]; then
+                echo "Invalid --metrics-port: $2"
+                HELP=true
+                USAGE_ERROR=true
+            fi
+            METRICS_PORT="$2"
+            shift 2
+            ;;
+        --trace)
+            TRACE=true
+            shift
+            ;;
+        --no-runtime-profile)
+            RUNTIME_PROFILE=false
+            shift
+            ;;
+        --prompt-layout)
+            if [[ "$2" != "template" && "$2" != "shared_prefix" ]]; then
+                echo "Invalid --prompt-layout: $2"
+                HELP=true
+                USAGE_ERROR=true
+            fi
+            PROMPT_LAYOUT="$2"
+            shift 2
+            ;;
+        --load-benchmark)
+            if [[ ! "$2" =~ ^[1-9][0-9]*$ ]]; then
+                echo "Invalid --load-benchmark: $2"
+                HELP=true
+                USAGE_ERROR=true
+            fi
+            LOAD_BENCHMARK_REPEATS="$2"
+            shift 2
+            ;;
         *)
             echo "Unknown option: $1"
             HELP=true
+            USAGE_ERROR=true
             shift
             ;;
     esac
@@ -56,12 +150,22 @@ if [[ "$HELP" == true ]]; then
     echo ""
     echo "Options:"
     echo "  --help, -h                 Show this help message"
+    echo "  --model NAME               Test this model instead of choosing interactively"
+    echo "  --category NAME            Run this category (or \"all\") instead of choosing interactively"
+    echo "  --telemetry-interval SEC   Resource sampling interval during tests (default: 1, 0 disables)"
+    echo "  --metrics-port PORT        Serve live Prometheus metrics and JSON progress on localhost:PORT"
+    echo "  --trace                    Trace framework overhead (Chrome trace JSON in reports/)"
+    echo "  --no-runtime-profile       Ignore tuned options from test-configs/runtime-profiles.yaml"
+    echo "  --load-benchmark N         Time N cold (all models unloaded) and warm model loads before testing"
+    echo "  --prompt-layout LAYOUT     template (default), or shared_prefix: data sources first and tests"
+    echo "                             ordered so the server can reuse cached prompt prefixes"
     echo ""
     echo "Features:"
     echo "  • Dynamic model selection from locally available Ollama models"
     echo "  • Category-based testing (coding, data analysis, or all tests)"
     echo "  • Configuration-driven test execution via YAML files"
     echo "  • Automated timing and performance metrics"
+    echo "  • Per-test CPU, memory, swap and Ollama process telemetry"
     echo "  • JSON-structured result files"
     echo "  • Comprehensive logging and reporting"
     echo ""
@@ -73,6 +177,9 @@ if [[ "$HELP" == true ]]; then
     echo "Examples:"
     echo "  $0                         Launch interactive test runner"
     echo "  $0 --help                  Show this help message"
+    echo "  $0 --metrics-port 9464     Watch progress: curl localhost:9464/progress"
+    echo "  $0 --model qwen2.5-coder:7b --category coding"
+    echo "                             Run without prompts (compare variants: scripts/variant_compare.py)"
     echo ""
     echo "Output Files:"
     echo "  • outputs/*.out            Raw model responses"
@@ -90,9 +197,19 @@ if [[ "$HELP" == true ]]; then
     echo "  • At least one model pulled (e.g., ollama pull qwen2.5-coder:7b)"
     echo "  • Python 3.x for YAML configuration processing"
     echo "  • jq and bc utilities"
+    if [[ "$USAGE_ERROR" == true ]]; then
+        exit 1
+    fi
     exit 0
 fi
 
+# Span tracing (no-op unless OLLAMA_TRACE_FILE is set)
+source scripts/tracing.sh
+if [[ "$TRACE" == true ]]; then
+    export OLLAMA_TRACE_FILE="${RESULTS_DIR}/.trace_${TIMESTAMP}.ndjson"
+    trace_init "run-tests.sh"
+fi
+
 # Logging function
 log() {
     echo "$(date '+%Y-%m-%d %H:%M:%S') - $1" | tee -a "${LOG_FILE}"
@@ -213,6 +330,98 @@ select_test_category() {
     fi
 }
 
+# Start the resource telemetry sampler for a test in the background; sets TELEMETRY_PID
+start_telemetry() {
+    local telemetry_file="$1"
+    TELEMETRY_PID=""
+    if [[ "${TELEMETRY_INTERVAL}" =~ ^0*(\.0*)?$ ]]; then
+        return
+    fi
+    python3 "${TELEMETRY_SAMPLER}" record --interval "${TELEMETRY_INTERVAL}" --output "${telemetry_file}" \
+        >> "${LOG_FILE}" 2>&1 &
+    TELEMETRY_PID=$!
+}
+
+# Append a progress event for the metrics exporter (no-op unless --metrics-port is set).
+# Extra jq arguments become event fields, e.g. emit_progress test_start --arg test_id "${test_id}"
+emit_progress() {
+    [[ -n "${PROGRESS_FILE}" ]] || return 0
+    local event="$1"
+    shift
+    jq -nc --arg event "${event}" --arg time "$(date +%s.%N)" "$@" \
+        '$ARGS.named | .time |= tonumber' >> "${PROGRESS_FILE}" 2>/dev/null || true
+}
+
+# Serve /metrics and /progress for this run in the background
+start_metrics_exporter() {
+    [[ -n "${METRICS_PORT}" ]] || return 0
+    PROGRESS_FILE="${RESULTS_DIR}/.progress_${TIMESTAMP}.ndjson"
+    : > "${PROGRESS_FILE}"
+    python3 "${METRICS_EXPORTER}" --events "${PROGRESS_FILE}" --port "${METRICS_PORT}" >> "${LOG_FILE}" 2>&1 &
+    METRICS_PID=$!
+    trap stop_metrics_exporter EXIT
+    echo -e "${BLUE}[INFO]${NC} Live metrics: http://127.0.0.1:${METRICS_PORT}/metrics (progress: /progress)"
+    log "Metrics exporter started on port ${METRICS_PORT} (pid ${METRICS_PID})"
+}
+
+stop_metrics_exporter() {
+    if [[ -n "${METRICS_PID}" ]]; then
+        kill "${METRICS_PID}" 2>/dev/null || true
+        wait "${METRICS_PID}" 2>/dev/null || true
+        METRICS_PID=""
+    fi
+    [[ -n "${PROGRESS_FILE}" ]] && rm -f "${PROGRESS_FILE}"
+    return 0
+}
+
+# Describe the model under test (digest, parameters, quantization; cached by digest).
+# The CPU/GPU memory split is only known once the model is loaded, so this is
+# repeated after each test until /api/ps has reported it.
+capture_model_metadata() {
+    local model="$1"
+    local metadata
+    if metadata=$(trace_run "model-metadata" spawn python3 "${MODEL_METADATA_SCRIPT}" show --model "${model}" 2>/dev/null) && [[ -n "${metadata}" ]]; then
+        MODEL_METADATA="${metadata}"
+    fi
+}
+
+# Tuned generation options (num_thread, num_batch, ...) saved for the model by option_sweep.py
+load_runtime_options() {
+    local model="$1"
+    local options
+    if options=$(trace_run "runtime-profile" spawn python3 "${OPTION_SWEEP}" profile --model "${model}") && [[ -n "${options}" ]]; then
+        RUNTIME_OPTIONS="${options}"
+    fi
+}
+
+# Cold vs warm load times for the model; unloads every resident model first
+run_load_benchmark() {
+    local model="$1"
+    local benchmark_file="${REPORTS_DIR}/load_benchmark_${TIMESTAMP}.json"
+    
+    echo -e "${BLUE}[INFO]${NC} Benchmarking cold and warm model loads (${LOAD_BENCHMARK_REPEATS} repetitions)..."
+    log "Running load benchmark with ${LOAD_BENCHMARK_REPEATS} repetitions"
+    
+    if trace_run "load-benchmark" spawn python3 "${LOAD_BENCHMARK_SCRIPT}" run --model "${model}" --repeats "${LOAD_BENCHMARK_REPEATS}" --output "${benchmark_file}" > /dev/null; then
+        local summary=$(jq -r '.models[0].summary | "cold load \(.cold.load_duration_ms.mean // "?") ms, warm load \(.warm.load_duration_ms.mean // "?") ms, cold TTFT penalty \(.cold_penalty_ms // "?") ms"' "${benchmark_file}")
+        echo -e "${GREEN}[SUCCESS]${NC} Load benchmark: ${summary}"
+        log "Load benchmark: ${summary}"
+    else
+        echo -e "${YELLOW}[WARNING]${NC} Load benchmark failed, continuing with tests"
+        log "WARNING: Load benchmark failed"
+    fi
+    echo ""
+}
+
+# Stop the sampler; it takes a final sample and writes its time series on SIGTERM
+stop_telemetry() {
+    local telemetry_pid="$1"
+    if [[ -n "${telemetry_pid}" ]]; then
+        kill -TERM "${telemetry_pid}" 2>/dev/null || true
+        wait "${telemetry_pid}" 2>/dev/null || true
+    fi
+}
+
 # Test execution function with timing
 run_test() {
     local test_id="$1"
@@ -221,31 +430,82 @@ run_test() {
     local description="$4"
     local prompt="$5"
     local timeout="$6"
+    local budget_file="$7"
+    local limits="$8"
     local output_file="${OUTPUT_DIR}/${test_id}_${TIMESTAMP}.out"
+    local metrics_file="${RESULTS_DIR}/.generation_${test_id}_${TIMESTAMP}.json"
+    local telemetry_file="${RESULTS_DIR}/.telemetry_${test_id}_${TIMESTAMP}.json"
+    
+    # Pin num_ctx only when it was configured or the prompt was trimmed to fit it;
+    # otherwise the server keeps the model's own context size
+    local num_ctx=""
+    if [[ -n "${budget_file}" && -f "${budget_file}" ]]; then
+        num_ctx=$(jq -r 'select(.num_ctx_explicit or (.trimmed | length > 0)) | .num_ctx' "${budget_file}" 2>/dev/null)
+    fi
+    
+    # Generation options: the tuned runtime profile plus the test's output limits
+    local options=""
+    local early_stop=""
+    if [[ -n "${RUNTIME_OPTIONS}" || ( -n "${limits}" && "${limits}" != "{}" ) ]]; then
+        options=$(jq -nc --argjson profile "${RUNTIME_OPTIONS:-null}" --argjson limits "${limits:-null}" \
+            '($profile // {}) + ($limits // {} | del(.early_stop)) | select(length > 0)')
+        early_stop=$(jq -r '.early_stop // empty' <<< "${limits:-null}")
+    fi
     
     echo -e "${BLUE}[INFO]${NC} Starting test ${test_id}: ${description}"
     log "Starting test ${test_id} with model ${model} in category ${category}"
     
+    TEST_SEQUENCE=$((TEST_SEQUENCE + 1))
+    emit_progress test_start --arg test_id "${test_id}" --arg model "${model}" --arg category "${category}"
+    start_telemetry "${telemetry_file}"
+    local telemetry_pid="${TELEMETRY_PID}"
     local start_time=$(date +%s.%N)
     
-    # Execute the ollama command
-    if timeout "${timeout}s" ollama run "${model}" "${prompt}" > "${output_file}" 2>&1; then
-        local end_time=$(date +%s.%N)
-        local duration=$(echo "${end_time} - ${start_time}" | bc -l)
+    # Stream the response through the Ollama API (records server-side token counts and timings).
+    # The test timeout is a deadline in the client, which cancels the request and keeps the partial output.
+    local status=0
+    printf '%s' "${prompt}" | trace_run "ollama-client:${test_id}" spawn \
+        timeout --kill-after=10s "$((timeout + CLIENT_KILL_GRACE))s" python3 "${OLLAMA_CLIENT}" generate \
+            --model "${model}" --output "${output_file}" --metrics "${metrics_file}" \
+            --timeout "${timeout}" --deadline "${timeout}" ${num_ctx:+--num-ctx "${num_ctx}"} \
+            ${options:+--options "${options}"} ${early_stop:+--early-stop "${early_stop}"} \
+            2>> "${output_file}" || status=$?
+    local end_time=$(date +%s.%N)
+    local duration=$(echo "${end_time} - ${start_time}" | bc -l)
+    trace_run "telemetry-stop:${test_id}" framework stop_telemetry "${telemetry_pid}"
+    
+    local result="pass"
+    if [[ ${status} -eq 0 ]]; then
         echo -e "${GREEN}[PASS]${NC} Test ${test_id} completed in ${duration}s"
         log "Test ${test_id} completed successfully in ${duration}s"
-        
-        # Generate test result JSON
-        generate_test_result "${test_id}" "${model}" "${category}" "${description}" "${prompt}" "${output_file}" "${duration}" "pass"
+        local truncation=$(jq -r '.truncation_reason // empty' "${metrics_file}" 2>/dev/null)
+        if [[ -n "${truncation}" ]]; then
+            echo -e "${YELLOW}[INFO]${NC} Output of ${test_id} truncated: ${truncation}"
+            log "Output of ${test_id} truncated: ${truncation}"
+        fi
+    elif [[ ${status} -eq ${CLIENT_TIMEOUT_EXIT} && "$(jq -r '.status // empty' "${metrics_file}" 2>/dev/null)" == "timeout" ]]; then
+        # Slow but working: record how far the model got
+        result="timeout"
+        local received=$(jq -r 'if (.output_tokens // 0) > 0
+            then "\(.output_tokens) tokens received, TTFT \(.ttft_ms) ms, \(.decode_tokens_per_second // "n/a") tok/s"
+            else "no tokens received" end' "${metrics_file}" 2>/dev/null)
+        echo -e "${YELLOW}[TIMEOUT]${NC} Test ${test_id} reached its ${timeout}s deadline (${received:-no response})"
+        log "Test ${test_id} timed out after ${duration}s: ${received:-no response}"
+    elif [[ ${status} -eq 124 || ${status} -eq 137 ]]; then
+        # The client ignored its own deadline and had to be killed by the outer timeout
+        result="fail"
+        echo -e "${RED}[FAIL]${NC} Test ${test_id}: client hung past its ${timeout}s deadline and was killed after ${duration}s"
+        log "Test ${test_id} failed: client killed by the outer timeout (exit ${status}) after ${duration}s"
     else
-        local end_time=$(date +%s.%N)
-        local duration=$(echo "${end_time} - ${start_time}" | bc -l)
-        echo -e "${RED}[FAIL]${NC} Test ${test_id} failed or timed out after ${duration}s"
-        log "Test ${test_id} failed or timed out after ${duration}s"
-        
-        # Generate test result JSON for failure
-        generate_test_result "${test_id}" "${model}" "${category}" "${description}" "${prompt}" "${output_file}" "${duration}" "fail"
+        result="fail"
+        echo -e "${RED}[FAIL]${NC} Test ${test_id} failed after ${duration}s"
+        log "Test ${test_id} failed after ${duration}s"
     fi
+    
+    # Generate test result JSON
+    trace_run "write-result:${test_id}" framework generate_test_result "${test_id}" "${model}" "${category}" "${description}" "${prompt}" "${output_file}" "${duration}" "${result}" "${budget_file}" "${metrics_file}" "${telemetry_file}"
+    emit_progress test_end --arg test_id "${test_id}" --arg status "${result}" \
+        --arg result "${RESULTS_DIR}/${test_id}_${TIMESTAMP}.json"
 }
 
 # Generate test result JSON
@@ -258,8 +518,22 @@ generate_test_result() {
     local output_file="$6"
     local duration="$7"
     local result="$8"
+    local budget_file="$9"
+    local metrics_file="${10}"
+    local telemetry_file="${11}"
     
     local result_file="${RESULTS_DIR}/${test_id}_${TIMESTAMP}.json"
+    local prompt_budget="null"
+    local generation="null"
+    
+    if [[ -n "${budget_file}" && -f "${budget_file}" ]]; then
+        prompt_budget=$(jq -c . "${budget_file}" 2>/dev/null || echo "null")
+        rm -f "${budget_file}"
+    fi
+    if [[ -n "${metrics_file}" && -f "${metrics_file}" ]]; then
+        generation=$(jq -c . "${metrics_file}" 2>/dev/null || echo "null")
+        rm -f "${metrics_file}"
+    fi
     local output_content=""
     local output_token_count=0
     
@@ -269,12 +543,30 @@ generate_test_result() {
     fi
     
     local input_token_count=$(echo "${prompt}" | wc -w | xargs)
-    local total_tokens=$((input_token_count + output_token_count))
+    local token_count_method="word_count"
     local tokens_per_second=0
     
     if (( $(echo "${duration} > 0" | bc -l) )); then
         tokens_per_second=$(echo "scale=2; ${output_token_count} / ${duration}" | bc -l)
     fi
+    
+    # Prefer the server's token counts and decode rate over word counts
+    if [[ "$(jq -r '.prompt_tokens // empty' <<< "${generation}")" =~ ^[0-9]+$ ]]; then
+        input_token_count=$(jq -r '.prompt_tokens' <<< "${generation}")
+        output_token_count=$(jq -r '.output_tokens // 0' <<< "${generation}")
+        tokens_per_second=$(jq -r '.decode_tokens_per_second // 0' <<< "${generation}")
+        token_count_method="ollama"
+    elif [[ "$(jq -r '.output_tokens // empty' <<< "${generation}")" =~ ^[0-9]+$ ]]; then
+        # Cut short before the final message: tokens and rate counted from the stream
+        output_token_count=$(jq -r '.output_tokens' <<< "${generation}")
+        tokens_per_second=$(jq -r '.decode_tokens_per_second // 0' <<< "${generation}")
+        token_count_method="stream_chunks"
+    fi
+    local total_tokens=$((input_token_count + output_token_count))
+    
+    if [[ -z "$(jq -r '.runtime // empty' <<< "${MODEL_METADATA}" 2>/dev/null)" ]]; then
+        capture_model_metadata "${model}"
+    fi
 
 cat > "${result_file}" << EOF
 {
@@ -289,11 +581,14 @@ cat > "${result_file}" << EOF
     "id": "${test_id}",
     "title": "${description}",
     "description": "${description}",
-    "category": "${category}"
+    "category": "${category}",
+    "sequence": ${TEST_SEQUENCE}
   },
   "input": {
     "prompt": $(echo "${prompt}" | jq -Rs .),
-    "token_count": ${input_token_count}
+    "prompt_layout": "${PROMPT_LAYOUT}",
+    "token_count": ${input_token_count},
+    "prompt_budget": ${prompt_budget}
   },
   "output": {
     "content": ${output_content},
@@ -321,6 +616,51 @@ cat > "${result_file}" << EOF
   "notes": "Generic test execution completed. Manual evaluation required for qualitative metrics."
 }
 EOF
+    
+    # Embed server-side generation metrics (TTFT, prefill/decode rates, load time)
+    if [[ "${generation}" != "null" ]]; then
+        jq --argjson g "${generation}" --arg method "${token_count_method}" \
+            '.generation = $g
+             | .input.token_count_method = $method
+             | .output.truncated = ($g.truncated // false)
+             | .output.truncation_reason = $g.truncation_reason
+             | .metrics.quantitative += {ttft_ms: $g.ttft_ms,
+                                         prefill_tokens_per_second: $g.prefill_tokens_per_second,
+                                         decode_tokens_per_second: $g.decode_tokens_per_second,
+                                         load_duration_ms: $g.load_duration_ms}' \
+            "${result_file}" > "${result_file}.tmp" && mv "${result_file}.tmp" "${result_file}"
+    fi
+
+    # Embed the model build so throughput can be normalized by size and quantization
+    if [[ "${MODEL_METADATA}" != "null" ]]; then
+        jq --argjson m "${MODEL_METADATA}" \
+            '.model.version = ($m.digest // "" | sub("^sha256:"; "") | .[0:12])
+             | .model.metadata = ($m | del(.name))' \
+            "${result_file}" > "${result_file}.tmp" && mv "${result_file}.tmp" "${result_file}"
+    fi
+
+    # Embed the resource time series and its summary (peak memory, swap, CPU)
+    if [[ -n "${telemetry_file}" && -f "${telemetry_file}" ]]; then
+        jq --slurpfile t "${telemetry_file}" \
+            '.metrics.resources = $t[0].summary | .telemetry = ($t[0] | del(.summary))' \
+            "${result_file}" > "${result_file}.tmp" && mv "${result_file}.tmp" "${result_file}"
+        rm -f "${telemetry_file}"
+        
+        # Cost of the test: CPU-seconds and memory GB-seconds of the Ollama server
+        # (the whole host when the server process was not visible to the sampler)
+        jq '.metrics.resources as $r
+            | select(($r.samples // 0) > 0)
+            | (if ($r.ollama_rss_peak_mb // 0) > 0
+               then {source: "ollama", cpu_seconds: $r.ollama_cpu_seconds, memory_gb_seconds: $r.ollama_rss_gb_seconds}
+               else {source: "host", cpu_seconds: $r.host_cpu_seconds, memory_gb_seconds: $r.mem_used_gb_seconds}
+               end) as $e
+            | .output.token_count as $n
+            | .metrics.efficiency = $e + {
+                tokens_per_cpu_second: (if ($e.cpu_seconds // 0) > 0 then ($n / $e.cpu_seconds * 100 | round / 100) else null end),
+                tokens_per_gb_second: (if ($e.memory_gb_seconds // 0) > 0 then ($n / $e.memory_gb_seconds * 100 | round / 100) else null end)}' \
+            "${result_file}" > "${result_file}.tmp" && [[ -s "${result_file}.tmp" ]] && mv "${result_file}.tmp" "${result_file}"
+        rm -f "${result_file}.tmp"
+    fi
 }
 
 # Execute tests for a category
@@ -332,15 +672,19 @@ run_category_tests() {
     echo ""
     
     # Load category configuration
-    local category_config=$(python3 "${CONFIG_LOADER}" load-category "${category}" 2>/dev/null)
+    local category_config=$(trace_run "load-category:${category}" spawn python3 "${CONFIG_LOADER}" load-category "${category}" 2>/dev/null)
     
     if [[ $? -ne 0 || -z "$category_config" ]]; then
         echo -e "${RED}[ERROR]${NC} Failed to load category configuration for: ${category}"
         return 1
     fi
     
-    # Extract test IDs from configuration
-    local test_ids=($(echo "$category_config" | python3 -c "
+    # Extract test IDs from configuration (shared_prefix: ordered to maximize common prompt prefixes)
+    local test_ids
+    if [[ "${PROMPT_LAYOUT}" == "shared_prefix" ]]; then
+        test_ids=($(trace_run "order-tests:${category}" spawn python3 "${CONFIG_LOADER}" order-tests "${category}" 2>/dev/null))
+    else
+        test_ids=($(echo "$category_config" | python3 -c "
 import json, sys
 try:
     data = json.load(sys.stdin)
@@ -350,16 +694,24 @@ except Exception as e:
     print(f'Error: {e}', file=sys.stderr)
     sys.exit(1)
 "))
+    fi
     
     if [[ ${#test_ids[@]} -eq 0 ]]; then
         echo -e "${RED}[ERROR]${NC} No tests found in category: ${category}"
         return 1
     fi
+    emit_progress queue --arg category "${category}" --argjson tests "${#test_ids[@]}"
+    
+    # Build every prompt of the category in one process, fitted to the model's context window
+    # (a tuned num_ctx overrides models.yaml), so data source connections are opened once per run
+    trace_run "build-prompts:${category}" spawn python3 "${CONFIG_LOADER}" build-prompts "${category}" --out-dir "${RESULTS_DIR}" --suffix "${TIMESTAMP}" --model "${model}" ${RUNTIME_NUM_CTX:+--num-ctx "${RUNTIME_NUM_CTX}"} --layout "${PROMPT_LAYOUT}" > /dev/null 2>&1 || true
     
     # Execute each test
     for test_id in "${test_ids[@]}"; do
+        trace_begin
+        
         # Get test details
-        local test_info=$(echo "$category_config" | python3 -c "
+        local test_info=$(echo "$category_config" | trace_run "test-info:${test_id}" spawn python3 -c "
 import json, sys
 try:
     data = json.load(sys.stdin)
@@ -374,22 +726,46 @@ except Exception as e:
         
         if [[ -z "$test_info" ]]; then
             echo -e "${RED}[ERROR]${NC} Failed to get test info for: ${test_id}"
+            rm -f "${RESULTS_DIR}/.prompt_${test_id}_${TIMESTAMP}.txt" "${RESULTS_DIR}/.prompt_budget_${test_id}_${TIMESTAMP}.json"
+            emit_progress test_skip --arg test_id "${test_id}"
+            trace_end "skipped:${test_id}"
             continue
         fi
         
         local test_title=$(echo "$test_info" | cut -d'|' -f1)
         local test_timeout=$(echo "$test_info" | cut -d'|' -f2)
         
-        # Build prompt for this test
-        local prompt=$(python3 "${CONFIG_LOADER}" build-prompt "${category}" "${test_id}" 2>/dev/null)
+        # Output limits from the test definition (max_output_tokens -> num_predict, stop, early_stop)
+        local test_limits=$(jq -c --arg id "${test_id}" '.tests[] | select(.id == $id)
+            | {num_predict: .max_output_tokens, stop: .stop, early_stop: .early_stop}
+            | with_entries(select(.value != null))' <<< "$category_config" 2>/dev/null)
+        
+        # Prompt and budget report written by build-prompts above
+        local budget_file="${RESULTS_DIR}/.prompt_budget_${test_id}_${TIMESTAMP}.json"
+        local prompt_file="${RESULTS_DIR}/.prompt_${test_id}_${TIMESTAMP}.txt"
+        local prompt=""
+        if [[ -f "${prompt_file}" ]]; then
+            prompt=$(< "${prompt_file}")
+            rm -f "${prompt_file}"
+        fi
         
-        if [[ $? -ne 0 || -z "$prompt" ]]; then
+        if [[ -z "$prompt" ]]; then
             echo -e "${RED}[ERROR]${NC} Failed to build prompt for test: ${test_id}"
+            rm -f "${budget_file}"
+            emit_progress test_skip --arg test_id "${test_id}"
+            trace_end "skipped:${test_id}"
             continue
         fi
         
+        local trimmed=$(jq -r '.trimmed | map("\(.source) (\(.kept_ratio * 100 | floor)% kept)") | join(", ")' "${budget_file}" 2>/dev/null)
+        if [[ -n "$trimmed" ]]; then
+            echo -e "${YELLOW}[WARNING]${NC} Prompt for ${test_id} trimmed to fit the context window: ${trimmed}"
+            log "Prompt for ${test_id} trimmed to fit the context window: ${trimmed}"
+        fi
+        
         # Execute the test
-        run_test "${test_id}" "${model}" "${category}" "${test_title}" "${prompt}" "${test_timeout}"
+        run_test "${test_id}" "${model}" "${category}" "${test_title}" "${prompt}" "${test_timeout}" "${budget_file}" "${test_limits}"
+        trace_end "test:${test_id}" test
     done
 }
 
@@ -412,7 +788,7 @@ main() {
     echo -e "${BLUE}[INFO]${NC} Capturing hardware profile..."
     log "Capturing hardware profile"
     
-    if python3 scripts/hardware-profile.py --format json --output "${RESULTS_DIR}/hardware_profile_${TIMESTAMP}.json"; then
+    if trace_run "hardware-profile" spawn python3 scripts/hardware-profile.py --format json --output "${RESULTS_DIR}/hardware_profile_${TIMESTAMP}.json"; then
         echo -e "${GREEN}[SUCCESS]${NC} Hardware profile captured"
         log "Hardware profile captured successfully"
     else
@@ -428,9 +804,23 @@ main() {
         exit 1
     fi
 
-    # Interactive model selection
-    local selected_model=$(select_model)
-    local selected_category=$(select_test_category)
+    # Model and category from the command line, or chosen interactively
+    local selected_model="${MODEL}"
+    if [[ -z "${selected_model}" ]]; then
+        selected_model=$(select_model)
+    elif [[ " $(get_available_models) " != *" ${selected_model} "* ]]; then
+        echo -e "${RED}[ERROR]${NC} Model not found in \`ollama list\`: ${selected_model}"
+        log "ERROR: Model not found: ${selected_model}"
+        exit 1
+    fi
+    local selected_category="${CATEGORY}"
+    if [[ -z "${selected_category}" ]]; then
+        selected_category=$(select_test_category)
+    elif [[ "${selected_category}" != "all" && " $(get_available_categories | xargs) " != *" ${selected_category} "* ]]; then
+        echo -e "${RED}[ERROR]${NC} Unknown test category: ${selected_category}"
+        log "ERROR: Unknown test category: ${selected_category}"
+        exit 1
+    fi
     
     # Set test run ID with model and category info
     TEST_RUN_ID="config_driven_${selected_model//[^a-zA-Z0-9]/_}_${selected_category}_${TIMESTAMP}"
@@ -439,15 +829,44 @@ main() {
     echo -e "${YELLOW}=== Test Configuration ===${NC}"
     echo "Model: ${selected_model}"
     echo "Category: ${selected_category}"
+    if [[ "${PROMPT_LAYOUT}" != "template" ]]; then
+        echo "Prompt Layout: ${PROMPT_LAYOUT}"
+    fi
     echo "Test Run ID: ${TEST_RUN_ID}"
     echo "Timestamp: $(date)"
     echo ""
     
     log "Configuration: Model=${selected_model}, Category=${selected_category}"
     
+    start_metrics_exporter
+    emit_progress run_start --arg run_id "${TEST_RUN_ID}" --arg model "${selected_model}" --arg category "${selected_category}"
+    
+    capture_model_metadata "${selected_model}"
+    if [[ "${MODEL_METADATA}" != "null" ]]; then
+        log "Model metadata: $(jq -r '"\(.parameter_size // "?") parameters, \(.quantization_level // "?"), digest \(.digest // "?")"' <<< "${MODEL_METADATA}")"
+    else
+        echo -e "${YELLOW}[WARNING]${NC} Could not read model metadata from the Ollama API"
+        log "WARNING: Model metadata unavailable"
+    fi
+    
+    if [[ "${RUNTIME_PROFILE}" == true ]]; then
+        load_runtime_options "${selected_model}"
+    fi
+    if [[ -n "${RUNTIME_OPTIONS}" ]]; then
+        RUNTIME_NUM_CTX=$(jq -r '.num_ctx // empty' <<< "${RUNTIME_OPTIONS}")
+        echo -e "${BLUE}[INFO]${NC} Using tuned runtime options: ${RUNTIME_OPTIONS}"
+        log "Runtime options from test-configs/runtime-profiles.yaml: ${RUNTIME_OPTIONS}"
+    fi
+    
+    if [[ -n "${LOAD_BENCHMARK_REPEATS}" ]]; then
+        run_load_benchmark "${selected_model}"
+    fi
+    
     # Execute tests based on category selection
+    trace_begin
     if [[ "$selected_category" == "all" ]]; then
-        local available_categories=($(get_available_categories))
+        # Benchmark categories measure performance only; run them explicitly
+        local available_categories=($(python3 "${CONFIG_LOADER}" list-categories --exclude-benchmarks | grep "^  - " | sed 's/^  - //'))
         for category in "${available_categories[@]}"; do
             run_category_tests "${selected_model}" "${category}"
             echo ""
@@ -455,6 +874,7 @@ main() {
     else
         run_category_tests "${selected_model}" "${selected_category}"
     fi
+    trace_end "tests" run
     
     echo ""
     echo -e "${GREEN}=== Test Execution Complete ===${NC}"
@@ -463,6 +883,7 @@ main() {
     echo -e "${BLUE}Log File: ${LOG_FILE}${NC}"
 
     log "Test execution completed successfully"
+    emit_progress run_end
 
     # Generate summary report
     local summary_file="${RESULTS_DIR}/test_summary_${TIMESTAMP}.txt"
@@ -490,7 +911,7 @@ main() {
     echo -e "${BLUE}[INFO]${NC} Cleaning output files..."
     log "Cleaning output files with timestamp ${TIMESTAMP}"
     
-    if ./scripts/clean-outputs.sh "${TIMESTAMP}" 2>/dev/null; then
+    if trace_run "clean-outputs" spawn ./scripts/clean-outputs.sh "${TIMESTAMP}" 2>/dev/null; then
         echo -e "${GREEN}[SUCCESS]${NC} Output files cleaned and available in outputs_clean/"
         log "Output cleaning completed successfully"
     else
@@ -504,7 +925,7 @@ main() {
     log "Running automated analysis"
     
     # Run the analysis script and capture the report file path
-    if ./scripts/analyze-results.sh 2>/dev/null; then
+    if trace_run "analyze-results" spawn ./scripts/analyze-results.sh 2>/dev/null; then
         # Find the most recent analysis report
         local latest_analysis=$(ls -t "${REPORTS_DIR}"/analysis_*.md 2>/dev/null | head -n 1)
         if [[ -f "$latest_analysis" ]]; then
@@ -525,6 +946,18 @@ main() {
         echo -e "${YELLOW}[WARNING]${NC} Analysis script encountered issues"
         echo -e "Manual analysis: ${CYAN}./scripts/analyze-results.sh${NC}"
     fi
+    
+    # Export the framework overhead trace
+    if [[ -n "${OLLAMA_TRACE_FILE:-}" && -f "${OLLAMA_TRACE_FILE}" ]]; then
+        local trace_json="${REPORTS_DIR}/trace_${TIMESTAMP}.json"
+        if python3 scripts/tracing.py export --spans "${OLLAMA_TRACE_FILE}" --output "${trace_json}" 2>/dev/null; then
+            echo ""
+            echo -e "${YELLOW}⏱  Framework Trace:${NC} ${CYAN}${trace_json}${NC} (open in https://ui.perfetto.dev)"
+            python3 scripts/tracing.py summary --spans "${OLLAMA_TRACE_FILE}" | jq -r '.totals
+                | "Framework overhead: \(.framework_ms) ms of \(.wall_ms) ms test time (\(.framework_percent)%), \(.framework_ms_per_test) ms per test"' || true
+            log "Trace exported to ${trace_json}"
+        fi
+    fi
 }
 
 # Run main function
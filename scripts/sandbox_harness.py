@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Child process for automated code checks.
+
+Executed by code_checker.py in isolated mode (`python -I`) with stdin closed
+and a temporary working directory. There is no filesystem or network isolation.
+Reads job.json from the working directory, applies the resource limits it
+carries before running any candidate code, runs the requested reference suite
+against the extracted code blocks and writes result.json. Candidate code that
+calls sys.exit() or unittest.main() is recorded as an error, never ends the
+harness. Intentionally self-contained: it must not import project modules.
+"""
+
+import ast
+import contextlib
+import inspect
+import io
+import json
+import random
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Resource limits are POSIX-only
+    resource = None
+
+FILE_SIZE_LIMIT = 10 * 1024 * 1024
+
+
+def apply_limits(limits: Dict[str, Any]) -> None:
+    """Limit this process (and anything it starts) before candidate code runs.
+
+    Applied here rather than through subprocess's preexec_fn, which is unsafe
+    in the multithreaded checker.
+    """
+    if resource is None:
+        return
+    cpu = limits.get("cpu_seconds")
+    memory = limits.get("memory_mb")
+    settings = [(resource.RLIMIT_FSIZE, (FILE_SIZE_LIMIT,) * 2), (resource.RLIMIT_CORE, (0, 0))]
+    if cpu:
+        settings.append((resource.RLIMIT_CPU, (cpu, cpu + 1)))
+    if memory:
+        settings.append((resource.RLIMIT_AS, (memory * 1024 * 1024,) * 2))
+    for limit, value in settings:
+        try:
+            resource.setrlimit(limit, value)
+        except (ValueError, OSError):
+            pass  # e.g. RLIMIT_AS is not enforceable on macOS
+
+
+def load_blocks(code_blocks: List[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Execute code blocks in a shared namespace, tracking what each one defines."""
+    namespace: Dict[str, Any] = {"__name__": "candidate"}
+    block_reports = []
+    definitions = []
+
+    for index, code in enumerate(code_blocks):
+        report = {"index": index, "status": "ok"}
+        try:
+            compiled = compile(code, f"<block {index}>", "exec")
+        except SyntaxError as e:
+            report["status"] = "syntax_error"
+            report["error"] = f"{e.msg} (line {e.lineno})"
+            block_reports.append(report)
+            continue
+
+        before = dict(namespace)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                exec(compiled, namespace)
+        except BaseException as e:  # Example usage frequently fails or calls sys.exit()/unittest.main()
+            report["status"] = "runtime_error"
+            report["error"] = f"{type(e).__name__}: {e}"
+
+        for name, value in namespace.items():
+            if before.get(name) is value or name.startswith("__"):
+                continue
+            if inspect.isfunction(value) or inspect.isclass(value):
+                definitions.append({"name": name, "block": index, "object": value, "source": code})
+        block_reports.append(report)
+
+    return namespace, block_reports, definitions
+
+
+def function_ast(source: str, name: str) -> Optional[str]:
+    """AST dump of a named top-level function (docstrings included), or None."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == name:
+            return ast.dump(node)
+    return None
+
+
+def positional_arity(func: Callable) -> Optional[int]:
+    """Number of required positional parameters, or None if not introspectable."""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    return sum(1 for p in params
+               if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) and p.default is p.empty)
+
+
+def run_case(func: Callable, *args) -> Tuple[str, Any]:
+    """Call func, returning ("ok", value) or ("raised", exception type name)."""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return "ok", func(*args)
+    except BaseException as e:  # SystemExit from candidate code must not end the harness
+        return "raised", type(e).__name__
+
+
+def pick_function(definitions: List[Dict[str, Any]], preferred: List[str], arity: int) -> Optional[Dict[str, Any]]:
+    """Select the last definition matching a preferred name, else by arity."""
+    functions = [d for d in definitions if inspect.isfunction(d["object"])]
+    for name in preferred:
+        matches = [d for d in functions if name in d["name"].lower()]
+        if matches:
+            return matches[-1]
+    matches = [d for d in functions if positional_arity(d["object"]) == arity]
+    return matches[-1] if matches else None
+
+
+def suite_binary_search(job: Dict[str, Any], definitions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reference tests for ct01: index of target in a sorted list, -1 if absent."""
+    candidate = pick_function(definitions, ["binary_search", "search"], 2)
+    if not candidate:
+        return {"status": "no_candidate", "cases_passed": 0, "cases_total": 0}
+
+    rng = random.Random(job.get("seed", 0))
+    large = sorted(rng.sample(range(100000), 5000))
+    cases = [
+        ([1, 3, 5, 7, 9], 7), ([1, 3, 5, 7, 9], 1), ([1, 3, 5, 7, 9], 9),
+        ([1, 3, 5, 7, 9], 4), ([], 1), ([5], 5), ([5], 3),
+        ([-10, -3, 0, 4, 12], -3), ([1, 2], 3), ([1, 2], 0),
+        (large, large[1234]), (large, -1), (large, large[-1]),
+    ]
+
+    failures = []
+    for arr, target in cases:
+        status, value = run_case(candidate["object"], list(arr), target)
+        expected_found = target in arr
+        if status != "ok":
+            ok = False
+        elif expected_found:
+            ok = isinstance(value, int) and 0 <= value < len(arr) and arr[value] == target
+        else:
+            ok = value == -1
+        if not ok:
+            failures.append({"input_size": len(arr), "target": target, "got": repr(value)[:80]})
+
+    return {
+        "status": "checked",
+        "candidate": candidate["name"],
+        "cases_total": len(cases),
+        "cases_passed": len(cases) - len(failures),
+        "failures": failures[:5],
+    }
+
+
+def suite_stack(job: Dict[str, Any], definitions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reference tests for ct03: a corrected LIFO stack."""
+    classes = [d for d in definitions if inspect.isclass(d["object"])
+               and all(hasattr(d["object"], m) for m in ("push", "pop", "peek", "is_empty"))]
+    if not classes:
+        return {"status": "no_candidate", "cases_passed": 0, "cases_total": 0}
+    candidate = classes[-1]
+    cls = candidate["object"]
+
+    def fresh():
+        return cls()
+
+    def lifo_order():
+        s = fresh()
+        for i in (1, 2, 3):
+            s.push(i)
+        return [s.pop(), s.pop(), s.pop()] == [3, 2, 1]
+
+    def peek_top():
+        s = fresh()
+        s.push("a")
+        s.push("b")
+        return s.peek() == "b" and s.pop() == "b"
+
+    def empty_new():
+        return bool(fresh().is_empty())
+
+    def not_empty_after_push():
+        s = fresh()
+        s.push(1)
+        return not s.is_empty()
+
+    def empty_after_drain():
+        s = fresh()
+        s.push(1)
+        s.pop()
+        return bool(s.is_empty())
+
+    def pop_empty_raises():
+        status, _ = run_case(fresh().pop)
+        return status == "raised"
+
+    def peek_empty_raises():
+        status, _ = run_case(fresh().peek)
+        return status == "raised"
+
+    checks = [
+        ("lifo_order", lifo_order), ("peek_top", peek_top), ("empty_new", empty_new),
+        ("not_empty_after_push", not_empty_after_push), ("empty_after_drain", empty_after_drain),
+        ("pop_empty_raises", pop_empty_raises), ("peek_empty_raises", peek_empty_raises),
+    ]
+
+    failures = []
+    for name, check in checks:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                ok = bool(check())
+        except BaseException as e:
+            ok = False
+            name = f"{name} ({type(e).__name__})"
+        if not ok:
+            failures.append(name)
+
+    return {
+        "status": "checked",
+        "candidate": candidate["name"],
+        "cases_total": len(checks),
+        "cases_passed": len(checks) - len(failures),
+        "failures": failures,
+    }
+
+
+def best_time(func: Callable, args: Tuple, repeats: int, budget_s: float) -> float:
+    """Minimum wall time over several calls, stopping early once the budget is spent."""
+    best = float("inf")
+    spent = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        if spent > budget_s:
+            break
+    return best
+
+
+def suite_optimization(job: Dict[str, Any], definitions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reference tests for ct02: equivalence with the original plus a speedup benchmark."""
+    reference_ns: Dict[str, Any] = {}
+    exec(compile(job["reference_code"], "<reference>", "exec"), reference_ns)
+    entry_point = job.get("entry_point", "slow_search")
+    reference = reference_ns[entry_point]
+    reference_ast = function_ast(job["reference_code"], entry_point)
+    arity = positional_arity(reference)
+
+    candidates = []
+    for d in definitions:
+        func = d["object"]
+        if not inspect.isfunction(func) or positional_arity(func) != arity:
+            continue
+        if function_ast(d["source"], d["name"]) == reference_ast:
+            continue  # Model restated the original verbatim
+        candidates.append(d)
+
+    if not candidates:
+        return {"status": "no_candidate", "cases_passed": 0, "cases_total": 0}
+
+    rng = random.Random(job.get("seed", 0))
+    cases = [([], 1), ([1], 1), ([2, 2, 2], 2), ([1, 2, 3, 2, 1], 2), ([1, 2, 3], 4)]
+    cases += [([rng.randrange(20) for _ in range(300)], rng.randrange(20)) for _ in range(5)]
+
+    sizes = job.get("sizes", [200, 1000, 3000])
+    repeats = job.get("repeats", 5)
+    bench_inputs = {n: ([rng.randrange(max(n // 10, 2)) for _ in range(n)], 1) for n in sizes}
+    reference_times = {n: best_time(reference, (list(a), t), repeats, 2.0) for n, (a, t) in bench_inputs.items()}
+
+    reports = []
+    for d in candidates:
+        func = d["object"]
+        passed = 0
+        for arr, target in cases:
+            status, value = run_case(func, list(arr), target)
+            if status == "ok" and _iterable(value) and list(value) == reference(list(arr), target):
+                passed += 1
+        report = {"candidate": d["name"], "block": d["block"], "cases_passed": passed, "cases_total": len(cases)}
+        if passed == len(cases):
+            timings = []
+            for n, (arr, target) in bench_inputs.items():
+                candidate_time = best_time(func, (list(arr), target), repeats, 2.0)
+                ratio = reference_times[n] / candidate_time if candidate_time > 0 else None
+                timings.append({
+                    "size": n,
+                    "reference_ms": round(reference_times[n] * 1000, 4),
+                    "candidate_ms": round(candidate_time * 1000, 4),
+                    "speedup": round(ratio, 2) if ratio else None,
+                })
+            report["benchmarks"] = timings
+            report["speedup"] = timings[-1]["speedup"]
+        reports.append(report)
+
+    correct = [r for r in reports if r["cases_passed"] == r["cases_total"]]
+    best = max(correct, key=lambda r: r.get("speedup") or 0) if correct else max(reports, key=lambda r: r["cases_passed"])
+    return {
+        "status": "checked",
+        "candidate": best["candidate"],
+        "cases_total": best["cases_total"],
+        "cases_passed": best["cases_passed"],
+        "speedup": best.get("speedup"),
+        "benchmarks": best.get("benchmarks", []),
+        "candidates": [{k: v for k, v in r.items() if k != "benchmarks"} for r in reports],
+    }
+
+
+def _iterable(value: Any) -> bool:
+    try:
+        iter(value)
+    except TypeError:
+        return False
+    return True
+
+
+SUITES = {
+    "binary_search": suite_binary_search,
+    "stack": suite_stack,
+    "optimization": suite_optimization,
+}
+
+
+def main():
+    with open("job.json", "r", encoding="utf-8") as f:
+        job = json.load(f)
+    apply_limits(job.get("limits", {}))
+
+    try:
+        _, block_reports, definitions = load_blocks(job.get("code_blocks", []))
+        suite = SUITES[job["suite"]]
+        result = suite(job, definitions)
+        result["blocks"] = block_reports
+    except BaseException as e:  # Always leave a result.json, even if candidate code exits
+        result = {
+            "status": "harness_error",
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(limit=3),
+        }
+
+    with open("result.json", "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(5000)
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Prompt-length scaling curves from benchmark results.
+
+Collects results of the `scaling` category (synthetic prompts from ~1k to ~32k
+tokens) and reports, per model, how TTFT, prefill rate and decode rate change
+with the prompt length actually evaluated by the server. Uses only the Python
+standard library.
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from result_utils import NON_TEST_PREFIXES, iter_result_files, load_result
+
+SCALING_CATEGORY = "scaling"
+
+
+def collect_points(results_dir: str, timestamp: Optional[str] = None,
+                   category: str = SCALING_CATEGORY) -> Dict[str, List[Dict[str, Any]]]:
+    """Scaling data points grouped by model, sorted by prompt tokens."""
+    if timestamp:
+        paths = iter_result_files(results_dir, timestamp)
+    else:
+        paths = (p for p in sorted(Path(results_dir).glob("*.json")) if not p.name.startswith(NON_TEST_PREFIXES))
+
+    curves: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for path in paths:
+        try:
+            result = load_result(path)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if result.get("test_case", {}).get("category") != category:
+            continue
+        generation = result.get("generation") or {}
+        if not generation.get("prompt_tokens"):
+            continue  # Run without the streaming client: no server-side counters
+        curves[result.get("model", {}).get("name", "unknown")].append({
+            "test_id": result["test_case"]["id"],
+            "timestamp": result.get("timestamp"),
+            "prompt_tokens": generation["prompt_tokens"],
+            "ttft_ms": generation.get("ttft_ms"),
+            "prefill_tokens_per_second": generation.get("prefill_tokens_per_second"),
+            "decode_tokens_per_second": generation.get("decode_tokens_per_second"),
+            "status": result.get("overall_result"),
+        })
+
+    for points in curves.values():
+        points.sort(key=lambda p: p["prompt_tokens"])
+        base = points[0]["prefill_tokens_per_second"]
+        for point in points:
+            rate = point["prefill_tokens_per_second"]
+            point["prefill_relative"] = round(rate / base, 3) if base and rate else None
+    return dict(curves)
+
+
+def _fmt(value: Any, suffix: str = "") -> str:
+    return f"{value}{suffix}" if value is not None else "-"
+
+
+def format_for_report(curves: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Format scaling curves for inclusion in markdown reports."""
+    lines = [
+        "## Prompt Length Scaling",
+        "*Server-reported prefill and decode rates as prompt length grows (synthetic data)*",
+        "",
+    ]
+    if not curves:
+        lines.append("*No scaling benchmark results with server-side token counts found.*")
+        return "\n".join(lines)
+
+    for model in sorted(curves):
+        lines += [
+            f"### {model}",
+            "",
+            "| Test ID | Prompt Tokens | TTFT (ms) | Prefill tok/s | Prefill vs Shortest | Decode tok/s | Status |",
+            "|---------|---------------|-----------|---------------|---------------------|--------------|--------|",
+        ]
+        for p in curves[model]:
+            relative = f"{p['prefill_relative']:.2f}x" if p["prefill_relative"] else "-"
+            lines.append(
+                f"| {p['test_id']} | {p['prompt_tokens']} | {_fmt(p['ttft_ms'])} | "
+                f"{_fmt(p['prefill_tokens_per_second'])} | {relative} | "
+                f"{_fmt(p['decode_tokens_per_second'])} | {p['status']} |")
+        lines.append("")
+    return "\n".join(lines).rstrip("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prompt-length scaling curves from benchmark results')
+    parser.add_argument('--timestamp', help='Only this test run (default: every run in the results directory)')
+    parser.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+    parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                        help='Output format (default: json)')
+
+    args = parser.parse_args()
+    curves = collect_points(args.results_dir, args.timestamp)
+
+    if args.format == 'markdown':
+        print(format_for_report(curves))
+    else:
+        print(json.dumps(curves, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Compiled validators for the YAML JSON Schemas in test-configs/schemas/.
+
+A schema is compiled once into a tree of small check functions (regular
+expressions compiled, enums turned into sets, child schemas compiled ahead of
+time), so validating many documents against it only runs the checks. Covers
+the draft-07 keywords the framework's schemas use: type, enum, const,
+pattern, minLength/maxLength, minimum/maximum, exclusiveMinimum/Maximum,
+minItems/maxItems, items, required, properties, additionalProperties,
+allOf/anyOf/oneOf. Unknown keywords (title, description, default, ...) are
+ignored. Needs only PyYAML (already required by the config loader).
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import yaml
+
+# check(instance, path, errors) appends "path: message" strings to errors
+Check = Callable[[Any, str, List[str]], None]
+
+TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool))
+                         or (isinstance(v, float) and v.is_integer()),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+def _child(path: str, key: Any) -> str:
+    return f"{path}.{key}" if isinstance(key, str) else f"{path}[{key}]"
+
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """Compile a schema (sub)tree into a single check function."""
+    checks: List[Check] = []
+
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        type_checks = [TYPE_CHECKS[name] for name in names]
+        expected = " or ".join(names)
+
+        def check_type(value, path, errors):
+            if not any(t(value) for t in type_checks):
+                errors.append(f"{path}: expected {expected}, got {type(value).__name__}")
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+        hashable = all(isinstance(v, (str, int, float, bool, type(None))) for v in allowed)
+        allowed_set = set(allowed) if hashable else None
+
+        def check_enum(value, path, errors):
+            try:
+                ok = value in allowed_set if allowed_set is not None else value in allowed
+            except TypeError:
+                ok = False
+            if not ok:
+                errors.append(f"{path}: {value!r} is not one of {allowed}")
+        checks.append(check_enum)
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append(f"{path}: expected {const!r}")
+        checks.append(check_const)
+
+    checks += _string_checks(schema)
+    checks += _number_checks(schema)
+    checks += _array_checks(schema)
+    checks += _object_checks(schema)
+    checks += _combinator_checks(schema)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+    return check_all
+
+
+def _string_checks(schema: Dict[str, Any]) -> List[Check]:
+    checks: List[Check] = []
+    if "pattern" in schema:
+        regex = re.compile(schema["pattern"])
+
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not regex.search(value):
+                errors.append(f"{path}: {value!r} does not match {regex.pattern!r}")
+        checks.append(check_pattern)
+    if "minLength" in schema or "maxLength" in schema:
+        low, high = schema.get("minLength", 0), schema.get("maxLength", float("inf"))
+
+        def check_length(value, path, errors):
+            if isinstance(value, str) and not low <= len(value) <= high:
+                errors.append(f"{path}: length {len(value)} outside [{low}, {high}]")
+        checks.append(check_length)
+    return checks
+
+
+def _number_checks(schema: Dict[str, Any]) -> List[Check]:
+    bounds: List[Tuple[str, Callable[[float, float], bool], float]] = []
+    for keyword, ok in (("minimum", lambda v, b: v >= b), ("maximum", lambda v, b: v <= b),
+                        ("exclusiveMinimum", lambda v, b: v > b), ("exclusiveMaximum", lambda v, b: v < b)):
+        if keyword in schema:
+            bounds.append((keyword, ok, schema[keyword]))
+    if not bounds:
+        return []
+
+    def check_bounds(value, path, errors):
+        if not TYPE_CHECKS["number"](value):
+            return
+        for keyword, ok, bound in bounds:
+            if not ok(value, bound):
+                errors.append(f"{path}: {value} violates {keyword} {bound}")
+    return [check_bounds]
+
+
+def _array_checks(schema: Dict[str, Any]) -> List[Check]:
+    checks: List[Check] = []
+    if "minItems" in schema or "maxItems" in schema:
+        low, high = schema.get("minItems", 0), schema.get("maxItems", float("inf"))
+
+        def check_size(value, path, errors):
+            if isinstance(value, list) and not low <= len(value) <= high:
+                errors.append(f"{path}: {len(value)} items outside [{low}, {high}]")
+        checks.append(check_size)
+    if isinstance(schema.get("items"), dict):
+        item_check = compile_schema(schema["items"])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    item_check(item, _child(path, index), errors)
+        checks.append(check_items)
+    return checks
+
+
+def _object_checks(schema: Dict[str, Any]) -> List[Check]:
+    checks: List[Check] = []
+    required = schema.get("required", [])
+    if required:
+        def check_required(value, path, errors):
+            if isinstance(value, dict):
+                for name in required:
+                    if name not in value:
+                        errors.append(f"{path}: missing required field '{name}'")
+        checks.append(check_required)
+
+    properties = {name: compile_schema(sub) for name, sub in schema.get("properties", {}).items()}
+    additional = schema.get("additionalProperties", True)
+    additional_check = compile_schema(additional) if isinstance(additional, dict) else None
+    if properties or additional is not True:
+        def check_properties(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item, _child(path, name), errors)
+                elif additional is False:
+                    errors.append(f"{path}: unexpected field '{name}'")
+                elif additional_check is not None:
+                    additional_check(item, _child(path, name), errors)
+        checks.append(check_properties)
+    return checks
+
+
+def _combinator_checks(schema: Dict[str, Any]) -> List[Check]:
+    checks: List[Check] = []
+    for sub in schema.get("allOf", []):
+        checks.append(compile_schema(sub))
+    for keyword in ("anyOf", "oneOf"):
+        if keyword not in schema:
+            continue
+        options = [compile_schema(sub) for sub in schema[keyword]]
+        exactly_one = keyword == "oneOf"
+
+        def check_options(value, path, errors, options=options, exactly_one=exactly_one, keyword=keyword):
+            matches = 0
+            for option in options:
+                option_errors: List[str] = []
+                option(value, path, option_errors)
+                matches += not option_errors
+            if matches == 0 or (exactly_one and matches > 1):
+                errors.append(f"{path}: matches {matches} of the {keyword} alternatives")
+        checks.append(check_options)
+    return checks
+
+
+class SchemaValidator:
+    """A compiled schema; validate() returns a list of error messages."""
+
+    def __init__(self, schema: Dict[str, Any], name: str = "schema"):
+        self.name = name
+        self._check = compile_schema(schema)
+
+    def validate(self, instance: Any, path: str = "$") -> List[str]:
+        errors: List[str] = []
+        self._check(instance, path, errors)
+        return errors
+
+
+_validators: Dict[Tuple[str, int], SchemaValidator] = {}
+_validators_lock = threading.Lock()
+
+
+def load_validator(path: Path) -> SchemaValidator:
+    """Compiled validator for a schema file, compiled once per process (and per file version)."""
+    key = (str(Path(path).resolve()), Path(path).stat().st_mtime_ns)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                validator = SchemaValidator(yaml.safe_load(f), Path(path).name)
+            _validators[key] = validator
+        return validator
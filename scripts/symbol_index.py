@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Parsed-file cache and AST symbol index for Python code sources.
+
+Each Python file is read and parsed once per process; its top-level functions,
+classes and methods are indexed by qualified name ("slow_search",
+"BuggyStack", "BuggyStack.pop") with their line spans, decorators included.
+The `symbol` extract method then slices a definition by name with a dictionary
+lookup instead of scanning text, so names mentioned in comments or strings are
+never matched. Span indexes are also stored in the content cache, invalidated
+when the file changes, so later processes skip parsing. Uses only the Python
+standard library.
+"""
+
+import ast
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from content_cache import ContentCache, file_dependency
+
+INDEX_CACHE_VERSION = 1
+INDEX_TTL = 7 * 24 * 3600
+
+
+def build_spans(source: str, filename: str = "<source>") -> Dict[str, Tuple[int, int]]:
+    """Map qualified symbol names to 1-based inclusive (start, end) line spans."""
+    tree = ast.parse(source, filename=filename)
+    spans: Dict[str, Tuple[int, int]] = {}
+
+    def visit(nodes: List[ast.stmt], prefix: str) -> None:
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([d.lineno for d in node.decorator_list] + [node.lineno])
+                name = f"{prefix}{node.name}"
+                spans[name] = (start, node.end_lineno)
+                if isinstance(node, ast.ClassDef):
+                    visit(node.body, f"{name}.")
+
+    visit(tree.body, "")
+    return spans
+
+
+class SymbolIndex:
+    """Source lines and symbol spans of one Python file."""
+
+    def __init__(self, path: Path, lines: List[str], spans: Dict[str, Tuple[int, int]]):
+        self.path = path
+        self.lines = lines
+        self.spans = spans
+
+    def symbols(self) -> List[str]:
+        return sorted(self.spans)
+
+    def extract(self, names: Union[str, List[str]]) -> str:
+        """Source of one or more symbols, separated by blank lines."""
+        if isinstance(names, str):
+            names = [names]
+        blocks = []
+        for name in names:
+            span = self.spans.get(name)
+            if span is None:
+                raise KeyError(f"Symbol not found in {self.path}: {name}")
+            start, end = span
+            blocks.append("".join(self.lines[start - 1:end]).rstrip("\n"))
+        return "\n\n".join(blocks)
+
+
+class SymbolIndexCache:
+    """Per-process cache of SymbolIndex objects, keyed by file path and stat."""
+
+    def __init__(self, content_cache: Optional[ContentCache] = None):
+        self.content_cache = content_cache
+        self._indexes: Dict[str, Tuple[Tuple[int, int], SymbolIndex]] = {}
+        self._lock = threading.Lock()
+        self.parses = 0
+
+    def get(self, path: Path) -> SymbolIndex:
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = str(path.resolve())
+        with self._lock:
+            cached = self._indexes.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+            spans = self._load_spans(key) or self._parse(path, source, key)
+            index = SymbolIndex(path, source.splitlines(keepends=True), spans)
+            self._indexes[key] = (signature, index)
+            return index
+
+    def _load_spans(self, key: str) -> Optional[Dict[str, Tuple[int, int]]]:
+        if self.content_cache is None:
+            return None
+        cached = self.content_cache.get(f"symbols:v{INDEX_CACHE_VERSION}:{key}")
+        return {name: tuple(span) for name, span in json.loads(cached).items()} if cached else None
+
+    def _parse(self, path: Path, source: str, key: str) -> Dict[str, Tuple[int, int]]:
+        spans = build_spans(source, str(path))
+        self.parses += 1
+        if self.content_cache is not None:
+            dependency = file_dependency(path)
+            if dependency:
+                self.content_cache.put(f"symbols:v{INDEX_CACHE_VERSION}:{key}", json.dumps(spans),
+                                       INDEX_TTL, [dependency])
+        return spans
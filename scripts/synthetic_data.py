@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic datasets for long-context benchmarking.
+
+Generates orders and customers CSVs (same columns as test-data/sample-csv/) and
+customer-service email corpora at a configurable size: an exact number of
+rows, or enough rows to reach a target token count. Output depends only on the
+generator name, size and seed, so every run - and every machine - sees the same
+prompt for the same configuration. Uses only the Python standard library.
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from prompt_budget import CHARS_PER_TOKEN
+
+FIRST_NAMES = ["John", "Sarah", "Mike", "Emily", "Robert", "Lisa", "David", "Jennifer", "Thomas", "Maria",
+               "James", "Linda", "Daniel", "Karen", "Paul", "Nancy", "Mark", "Laura", "Steven", "Angela"]
+LAST_NAMES = ["Smith", "Johnson", "Chen", "Davis", "Wilson", "Garcia", "Miller", "Brown", "Anderson", "Lopez",
+              "Taylor", "Moore", "Martin", "Lee", "Clark", "Lewis", "Walker", "Hall", "Young", "King"]
+DOMAINS = ["email.com", "company.com", "startup.io", "design.com", "corp.net", "mail.org"]
+PRODUCTS = [("Wireless Headphones", 89.99), ("Laptop Stand", 45.50), ("USB-C Hub", 25.99),
+            ("Mechanical Keyboard", 159.99), ("Webcam HD", 79.00), ("Wireless Mouse", 29.99),
+            ("Monitor Arm", 89.95), ("Desk Lamp", 19.99), ("Phone Charger", 34.99), ("Bluetooth Speaker", 64.50)]
+STATUSES = ["shipped"] * 5 + ["delivered"] * 3 + ["processing"] * 2 + ["cancelled"]
+CITIES = [("Boston", "MA", "021"), ("Seattle", "WA", "981"), ("Denver", "CO", "802"), ("Austin", "TX", "733"),
+          ("Chicago", "IL", "606"), ("Portland", "OR", "972"), ("Miami", "FL", "331"), ("Phoenix", "AZ", "850")]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Elm St", "Maple Dr", "Cedar Ln", "Birch Way", "Lake Blvd"]
+TIERS = ["Bronze", "Silver", "Gold", "Platinum"]
+EMAIL_TOPICS = [
+    ("Order {order} delayed", "My order {order} ({product}) was supposed to arrive on {day} but tracking "
+     "has not updated in three days. Can you tell me where it is?"),
+    ("Refund request for {order}", "The {product} from order {order} stopped working after a week. "
+     "I would like a refund of ${amount} to my original payment method."),
+    ("Cancel order {order}", "Please cancel order {order}. I found the {product} cheaper elsewhere and "
+     "would rather not wait for it to ship."),
+    ("Wrong item in {order}", "I ordered {quantity} x {product} (order {order}) but received a different "
+     "item. Please send a return label and the correct product."),
+    ("Question about {product}", "Before I place another order: does the {product} come with a warranty, "
+     "and is there a discount for ordering {quantity} or more?"),
+]
+START_DATE = date(2024, 1, 1)
+
+
+def _person(rng: random.Random) -> tuple:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    email = f"{first.lower()}.{last.lower()}{rng.randrange(100)}@{rng.choice(DOMAINS)}"
+    return f"{first} {last}", email
+
+
+def generate_orders(rng: random.Random) -> Iterator[str]:
+    index = 0
+    while True:
+        index += 1
+        name, email = _person(rng)
+        product, price = rng.choice(PRODUCTS)
+        city, state, zip_prefix = rng.choice(CITIES)
+        address = f"{rng.randrange(100, 9999)} {rng.choice(STREETS)}, {city} {state} {zip_prefix}{rng.randrange(10, 99)}"
+        ordered = START_DATE + timedelta(days=rng.randrange(365))
+        yield (f"ORD-{index:07d},{name},{email},{product},{rng.randint(1, 5)},{price:.2f},"
+               f"{ordered.isoformat()},{rng.choice(STATUSES)},\"{address}\"\n")
+
+
+def generate_customers(rng: random.Random) -> Iterator[str]:
+    index = 0
+    while True:
+        index += 1
+        name, email = _person(rng)
+        orders = rng.randint(1, 40)
+        spent = orders * rng.uniform(20, 160)
+        signed_up = START_DATE - timedelta(days=rng.randrange(900))
+        tier = TIERS[min(int(spent // 1000), len(TIERS) - 1)]
+        yield (f"CUST-{index:06d},{name},{email},555-{rng.randrange(10000):04d},{signed_up.isoformat()},"
+               f"{orders},{spent:.2f},{tier}\n")
+
+
+def generate_emails(rng: random.Random) -> Iterator[str]:
+    while True:
+        name, email = _person(rng)
+        product, price = rng.choice(PRODUCTS)
+        quantity = rng.randint(1, 5)
+        order = f"ORD-{rng.randrange(1, 10 ** 6):07d}"
+        sent = START_DATE + timedelta(days=rng.randrange(365))
+        subject, body = rng.choice(EMAIL_TOPICS)
+        fields = {"order": order, "product": product, "quantity": quantity,
+                  "amount": f"{price * quantity:.2f}", "day": (sent + timedelta(days=3)).isoformat()}
+        yield (f"Subject: {subject.format(**fields)}\nFrom: {email}\nTo: support@techstore.com\n"
+               f"Date: {sent.isoformat()}\n\nHello,\n\n{body.format(**fields)}\n\nThanks,\n{name}\n\n---\n\n")
+
+
+# Generator name -> (header line, record generator)
+GENERATORS: Dict[str, Tuple[str, Callable[[random.Random], Iterator[str]]]] = {
+    "orders": ("order_id,customer_name,customer_email,product_name,quantity,unit_price,order_date,status,"
+               "shipping_address\n", generate_orders),
+    "customers": ("customer_id,customer_name,email,phone,signup_date,total_orders,total_spent,loyalty_tier\n",
+                  generate_customers),
+    "emails": ("", generate_emails),
+}
+
+
+def generate(generator: str, rows: int = 0, target_tokens: int = 0, seed: int = 0) -> str:
+    """Generate a dataset with `rows` records, or enough records to reach `target_tokens`."""
+    if generator not in GENERATORS:
+        raise ValueError(f"Unknown synthetic generator: {generator} (expected one of {', '.join(GENERATORS)})")
+    if not rows and not target_tokens:
+        raise ValueError("Synthetic sources need rows or target_tokens")
+
+    header, records = GENERATORS[generator]
+    parts = [header]
+    size = len(header)
+    target_chars = target_tokens * CHARS_PER_TOKEN
+    for count, record in enumerate(records(random.Random(f"{generator}:{seed}"))):
+        if rows and count >= rows:
+            break
+        if target_tokens and size + len(record) > target_chars:
+            break
+        parts.append(record)
+        size += len(record)
+    return "".join(parts)
+
+
+def generate_source(config: Dict[str, Any]) -> str:
+    """Content for a `synthetic` data source definition."""
+    return generate(config["generator"], int(config.get("rows", 0)),
+                    int(config.get("target_tokens", 0)), int(config.get("seed", 0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate deterministic synthetic datasets')
+    parser.add_argument('generator', choices=sorted(GENERATORS), help='Dataset to generate')
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument('--rows', type=int, help='Number of records')
+    size.add_argument('--target-tokens', type=int, help='Approximate size in tokens')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+
+    args = parser.parse_args()
+    print(generate(args.generator, args.rows or 0, args.target_tokens or 0, args.seed), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Resource telemetry sampler for test execution.
+
+The runner starts one sampler per test in the background and stops it with
+SIGTERM when the test ends. At a fixed interval it records system CPU%,
+per-core utilization, RAM and swap usage, swap-in/out traffic, CPU frequency,
+and the resident memory and CPU time of the Ollama server and its model
+runners. Samples are kept in typed arrays (one column per metric) and written
+as a compact columnar time series plus a summary: peak memory, swap activity,
+average CPU, flags for memory thrashing and CPU throttling, and the resources
+consumed (CPU-seconds and memory GB-seconds, integrated over the samples).
+
+The `report` command renders the per-test summaries of a run for the analysis
+report, and ranks models by generated tokens per CPU-second and per GB-second.
+"""
+
+import argparse
+import json
+import math
+import signal
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import psutil
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from result_utils import NON_TEST_PREFIXES, iter_result_files, load_result
+
+TELEMETRY_VERSION = 1
+DEFAULT_INTERVAL = 1.0
+MB = 1024 * 1024
+# Swap traffic during one test above this suggests the model does not fit in RAM
+THRASH_SWAP_MB = 64
+# Average clock below this fraction of the rated maximum suggests throttling
+THROTTLE_RATIO = 0.8
+# How often (in samples) to look for an Ollama server that was not running yet
+SERVER_RESCAN_SAMPLES = 10
+
+FIELDS = ["cpu_percent", "mem_used_mb", "mem_available_mb", "swap_used_mb", "swap_in_mb", "swap_out_mb",
+          "cpu_freq_mhz", "ollama_rss_mb", "ollama_cpu_seconds"]
+
+
+def _is_ollama_server(proc: psutil.Process) -> bool:
+    name = (proc.info.get("name") or "").lower()
+    cmdline = proc.info.get("cmdline") or []
+    return name.startswith("ollama") and "serve" in cmdline[1:2]
+
+
+def find_ollama_server() -> Optional[psutil.Process]:
+    """The local `ollama serve` process, if any."""
+    for proc in psutil.process_iter(["name", "cmdline"]):
+        try:
+            if _is_ollama_server(proc):
+                return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return None
+
+
+class TelemetrySampler:
+    """Samples system and Ollama process metrics into typed arrays."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.cpu_count = psutil.cpu_count() or 1
+        freq = psutil.cpu_freq()
+        self.cpu_freq_max = freq.max if freq and freq.max else None
+        self.t = array("d")
+        self.columns: Dict[str, array] = {field: array("f") for field in FIELDS}
+        # Per-core utilization, flattened: sample i, core c at [i * cpu_count + c]
+        self.per_core = array("f")
+        self.started_at = datetime.now().astimezone().isoformat(timespec="seconds")
+        self._start = time.monotonic()
+        self._start_wall = time.time()
+        self._stop = threading.Event()
+        self._server: Optional[psutil.Process] = None
+        self._server_checked = -SERVER_RESCAN_SAMPLES
+        self._cpu_baseline: Dict[int, float] = {}
+        self._cpu_latest: Dict[int, float] = {}
+
+        swap = psutil.swap_memory()
+        self._swap_in0, self._swap_out0 = swap.sin, swap.sout
+        # Prime the counters: the first cpu_percent(None) call always returns 0.0
+        psutil.cpu_percent(None)
+        psutil.cpu_percent(None, percpu=True)
+
+    def stop(self, *_args) -> None:
+        self._stop.set()
+
+    def _ollama_processes(self) -> List[psutil.Process]:
+        if self._server is not None and not self._server.is_running():
+            self._server = None
+        samples = len(self.t)
+        if self._server is None and samples - self._server_checked >= SERVER_RESCAN_SAMPLES:
+            self._server_checked = samples
+            self._server = find_ollama_server()
+        if self._server is None:
+            return []
+        try:
+            # Model runners are child processes started when a model loads
+            return [self._server] + self._server.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return [self._server]
+
+    def _sample_ollama(self) -> tuple:
+        rss = 0
+        for proc in self._ollama_processes():
+            try:
+                with proc.oneshot():
+                    rss += proc.memory_info().rss
+                    times = proc.cpu_times()
+                    cpu = times.user + times.system
+                    if proc.pid not in self._cpu_baseline:
+                        # Processes started during the test count from zero
+                        started_during = proc.create_time() >= self._start_wall
+                        self._cpu_baseline[proc.pid] = 0.0 if started_during else cpu
+                    self._cpu_latest[proc.pid] = cpu
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        # CPU time of exited runners is kept at its last observed value
+        cpu_seconds = sum(self._cpu_latest[pid] - base for pid, base in self._cpu_baseline.items())
+        return rss / MB, cpu_seconds
+
+    def sample(self) -> None:
+        self.t.append(time.monotonic() - self._start)
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        freq = psutil.cpu_freq()
+        rss_mb, cpu_seconds = self._sample_ollama()
+        values = {
+            "cpu_percent": psutil.cpu_percent(None),
+            "mem_used_mb": (memory.total - memory.available) / MB,
+            "mem_available_mb": memory.available / MB,
+            "swap_used_mb": swap.used / MB,
+            "swap_in_mb": (swap.sin - self._swap_in0) / MB,
+            "swap_out_mb": (swap.sout - self._swap_out0) / MB,
+            "cpu_freq_mhz": freq.current if freq and freq.current else math.nan,
+            "ollama_rss_mb": rss_mb,
+            "ollama_cpu_seconds": cpu_seconds,
+        }
+        for field in FIELDS:
+            self.columns[field].append(values[field])
+        per_core = psutil.cpu_percent(None, percpu=True)
+        self.per_core.extend(per_core[:self.cpu_count] + [0.0] * (self.cpu_count - len(per_core)))
+
+    def run(self) -> None:
+        """Sample until stop() is called; the final sample is taken on stop."""
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+        self.sample()
+
+    def to_dict(self) -> Dict[str, Any]:
+        def column(values: Iterable[float]) -> List[Optional[float]]:
+            return [None if math.isnan(v) else round(v, 1) for v in values]
+
+        samples = len(self.t)
+        return {
+            "version": TELEMETRY_VERSION,
+            "started_at": self.started_at,
+            "interval_s": self.interval,
+            "cpu_count": self.cpu_count,
+            "cpu_freq_max_mhz": self.cpu_freq_max,
+            "summary": summarize(self),
+            "series": dict({"t": [round(v, 2) for v in self.t]},
+                           **{field: column(self.columns[field]) for field in FIELDS}),
+            "per_core_percent": [column(self.per_core[core::self.cpu_count]) for core in range(self.cpu_count)]
+            if samples else [],
+        }
+
+
+def summarize(sampler: TelemetrySampler) -> Dict[str, Any]:
+    """Peak memory, swap activity, CPU and Ollama usage over the sampled period."""
+    samples = len(sampler.t)
+    if not samples:
+        return {"samples": 0}
+    columns = sampler.columns
+
+    def mean(values: Iterable[float]) -> Optional[float]:
+        values = [v for v in values if not math.isnan(v)]
+        return round(sum(values) / len(values), 1) if values else None
+
+    def interval_sum(values: Iterable[float]) -> float:
+        # cpu_percent is the average since the previous sample: weight by interval length
+        return sum(v * (t1 - t0) for v, t0, t1 in zip(list(values)[1:], sampler.t, sampler.t[1:]))
+
+    def integral(values: Iterable[float]) -> float:
+        # Point samples (memory): trapezoidal rule
+        values = list(values)
+        return sum((v0 + v1) / 2 * (t1 - t0)
+                   for v0, v1, t0, t1 in zip(values, values[1:], sampler.t, sampler.t[1:]))
+
+    cores = sampler.cpu_count
+    core_means = [mean(sampler.per_core[core::cores]) or 0.0 for core in range(cores)]
+    freqs = [v for v in columns["cpu_freq_mhz"] if not math.isnan(v)]
+    swap_traffic = columns["swap_in_mb"][-1] + columns["swap_out_mb"][-1]
+    avg_freq = mean(freqs)
+
+    summary = {
+        "samples": samples,
+        "duration_s": round(sampler.t[-1], 2),
+        "cpu_percent_avg": mean(columns["cpu_percent"]),
+        "cpu_percent_max": round(max(columns["cpu_percent"]), 1),
+        "busiest_core_percent_avg": round(max(core_means), 1),
+        "mem_used_peak_mb": round(max(columns["mem_used_mb"]), 1),
+        "mem_available_min_mb": round(min(columns["mem_available_mb"]), 1),
+        "swap_used_peak_mb": round(max(columns["swap_used_mb"]), 1),
+        "swap_used_delta_mb": round(columns["swap_used_mb"][-1] - columns["swap_used_mb"][0], 1),
+        "swap_in_mb": round(columns["swap_in_mb"][-1], 1),
+        "swap_out_mb": round(columns["swap_out_mb"][-1], 1),
+        "cpu_freq_avg_mhz": avg_freq,
+        "cpu_freq_min_mhz": round(min(freqs), 1) if freqs else None,
+        "ollama_rss_peak_mb": round(max(columns["ollama_rss_mb"]), 1),
+        "ollama_cpu_seconds": round(columns["ollama_cpu_seconds"][-1], 2),
+        "ollama_rss_gb_seconds": round(integral(columns["ollama_rss_mb"]) / 1024, 3),
+        "host_cpu_seconds": round(interval_sum(columns["cpu_percent"]) / 100 * cores, 2),
+        "mem_used_gb_seconds": round(integral(columns["mem_used_mb"]) / 1024, 3),
+        "thrashing": swap_traffic > THRASH_SWAP_MB,
+        "throttled": bool(avg_freq and sampler.cpu_freq_max and avg_freq < THROTTLE_RATIO * sampler.cpu_freq_max),
+    }
+    return summary
+
+
+def record(interval: float, output: str) -> None:
+    """Sample until SIGTERM/SIGINT, then write the time series to output."""
+    sampler = TelemetrySampler(interval)
+    signal.signal(signal.SIGTERM, sampler.stop)
+    signal.signal(signal.SIGINT, sampler.stop)
+    sampler.run()
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(sampler.to_dict(), f, separators=(",", ":"))
+
+
+def collect_summaries(results_dir: str, timestamp: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Per-test resource summaries of a run (or of every run), in file order."""
+    if timestamp:
+        paths = iter_result_files(results_dir, timestamp)
+    else:
+        paths = (p for p in sorted(Path(results_dir).glob("*.json")) if not p.name.startswith(NON_TEST_PREFIXES))
+
+    rows = []
+    for path in paths:
+        try:
+            result = load_result(path)
+        except (OSError, json.JSONDecodeError):
+            continue
+        metrics = result.get("metrics", {})
+        resources = metrics.get("resources")
+        if resources and resources.get("samples"):
+            rows.append(dict(resources,
+                             test_id=result.get("test_case", {}).get("id", path.stem),
+                             model=result.get("model", {}).get("name", "unknown"),
+                             output_tokens=result.get("output", {}).get("token_count") or 0,
+                             efficiency=metrics.get("efficiency")))
+    return rows
+
+
+def efficiency_by_model(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Resources consumed and tokens generated per model, best tokens per CPU-second first."""
+    totals: Dict[str, Dict[str, Any]] = defaultdict(
+        lambda: {"tests": 0, "output_tokens": 0, "cpu_seconds": 0.0, "memory_gb_seconds": 0.0, "sources": set()})
+    for row in rows:
+        efficiency = row.get("efficiency")
+        if not efficiency or efficiency.get("cpu_seconds") is None:
+            continue
+        total = totals[row["model"]]
+        total["tests"] += 1
+        total["output_tokens"] += row["output_tokens"]
+        total["cpu_seconds"] += efficiency["cpu_seconds"]
+        total["memory_gb_seconds"] += efficiency.get("memory_gb_seconds") or 0.0
+        total["sources"].add(efficiency.get("source"))
+
+    ranked = []
+    for model, total in totals.items():
+        cpu, gb = total["cpu_seconds"], total["memory_gb_seconds"]
+        ranked.append({
+            "model": model,
+            "tests": total["tests"],
+            "output_tokens": total["output_tokens"],
+            "cpu_seconds": round(cpu, 2),
+            "memory_gb_seconds": round(gb, 3),
+            "tokens_per_cpu_second": round(total["output_tokens"] / cpu, 2) if cpu > 0 else None,
+            "tokens_per_gb_second": round(total["output_tokens"] / gb, 2) if gb > 0 else None,
+            "source": "/".join(sorted(s for s in total["sources"] if s)),
+        })
+    ranked.sort(key=lambda m: m["tokens_per_cpu_second"] or 0.0, reverse=True)
+    return ranked
+
+
+def _fmt(value: Any, digits: int = 0) -> str:
+    if value is None:
+        return "-"
+    return f"{value:,.{digits}f}"
+
+
+def format_for_report(rows: List[Dict[str, Any]]) -> str:
+    """Format per-test resource summaries for inclusion in markdown reports."""
+    lines = [
+        "## Resource Usage",
+        "*Sampled during each test; memory in MB*",
+        "",
+    ]
+    if not rows:
+        lines.append("*No resource telemetry recorded for this run.*")
+        return "\n".join(lines)
+
+    lines += [
+        "| Test ID | Avg CPU % | Busiest Core % | Peak RAM Used | Min RAM Free | Swap In/Out | Avg Clock (MHz) | Ollama Peak RSS | Ollama CPU-s | Flags |",
+        "|---------|-----------|----------------|---------------|--------------|-------------|-----------------|-----------------|--------------|-------|",
+    ]
+    for row in rows:
+        flags = [name for name in ("thrashing", "throttled") if row.get(name)]
+        lines.append(
+            f"| {row['test_id']} | {_fmt(row.get('cpu_percent_avg'), 1)} | {_fmt(row.get('busiest_core_percent_avg'), 1)} | "
+            f"{_fmt(row.get('mem_used_peak_mb'))} | {_fmt(row.get('mem_available_min_mb'))} | "
+            f"{_fmt(row.get('swap_in_mb'))}/{_fmt(row.get('swap_out_mb'))} | {_fmt(row.get('cpu_freq_avg_mhz'))} | "
+            f"{_fmt(row.get('ollama_rss_peak_mb'))} | {_fmt(row.get('ollama_cpu_seconds'), 1)} | "
+            f"{', '.join(flags) or '-'} |")
+
+    thrashing = [row["test_id"] for row in rows if row.get("thrashing")]
+    throttled = [row["test_id"] for row in rows if row.get("throttled")]
+    if thrashing or throttled:
+        lines.append("")
+    if thrashing:
+        lines.append(f"- **Memory pressure:** more than {THRASH_SWAP_MB} MB swapped during {', '.join(thrashing)}; "
+                     "the model likely does not fit in RAM alongside its context")
+    if throttled:
+        lines.append(f"- **CPU throttling:** average clock below {THROTTLE_RATIO:.0%} of the rated maximum during "
+                     f"{', '.join(throttled)}")
+
+    models = efficiency_by_model(rows)
+    if models:
+        lines += [
+            "",
+            "### Compute Efficiency by Model",
+            "*Generated tokens per CPU-second and per memory GB-second consumed by the Ollama server "
+            "(whole host where the server process was not visible)*",
+            "",
+            "| Model | Tests | Output Tokens | CPU-s | Memory GB-s | Tokens/CPU-s | Tokens/GB-s | Measured |",
+            "|-------|-------|---------------|-------|-------------|--------------|-------------|----------|",
+        ]
+        for m in models:
+            lines.append(
+                f"| {m['model']} | {m['tests']} | {m['output_tokens']:,} | {_fmt(m['cpu_seconds'], 1)} | "
+                f"{_fmt(m['memory_gb_seconds'], 2)} | {_fmt(m['tokens_per_cpu_second'], 2)} | "
+                f"{_fmt(m['tokens_per_gb_second'], 2)} | {m['source'] or '-'} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resource telemetry sampler for test execution')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Sample until SIGTERM, then write the time series')
+    record_parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                               help=f'Seconds between samples (default: {DEFAULT_INTERVAL})')
+    record_parser.add_argument('--output', required=True, help='File the time series JSON is written to')
+
+    report_parser = subparsers.add_parser('report', help='Summarize resource usage of a test run')
+    report_parser.add_argument('--timestamp', help='Test run timestamp, e.g. 20250612_143022 (default: every run)')
+    report_parser.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+    report_parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                               help='Output format (default: json)')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        if args.interval <= 0:
+            parser.error("--interval must be positive")
+        record(args.interval, args.output)
+    else:
+        rows = collect_summaries(args.results_dir, args.timestamp)
+        if args.format == 'markdown':
+            print(format_for_report(rows))
+        else:
+            print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
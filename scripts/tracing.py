@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Span tracing of framework overhead.
+
+When OLLAMA_TRACE_FILE is set (run-tests.sh --trace sets it for the whole
+run), the runner, the analyzer and the Python scripts they start append spans
+to that file, one Chrome trace "complete" event per line. Timestamps are wall
+clock microseconds, so spans written by bash ($EPOCHREALTIME) and by Python
+line up. When the variable is unset, span() returns a shared no-op object and
+traced() leaves functions undecorated.
+
+  export   Convert the span file to Chrome/Perfetto trace JSON
+           (open in chrome://tracing or https://ui.perfetto.dev)
+  summary  Framework time vs model time per test and per run, and where the
+           framework time goes; --max-overhead-ms fails when the mean
+           per-test overhead exceeds a budget
+
+Span categories: "model" is time spent in Ollama requests, "test" spans cover
+one test end to end, "external" is third-party API time (the qualitative
+evaluator), and everything else ("framework", "spawn") is harness overhead.
+Uses only the Python standard library.
+"""
+
+import argparse
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_ENV = "OLLAMA_TRACE_FILE"
+# Trailing ":<test id>" and similar qualifiers are dropped when aggregating span names
+NAME_QUALIFIER_RE = re.compile(r':[^:]*$')
+
+
+class _NullSpan:
+    """Span used while tracing is disabled: does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def set(self, **_args) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _TraceWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def write(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._fd is None:
+                # O_APPEND keeps lines from concurrent processes intact
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                name = " ".join([Path(sys.argv[0]).name] + sys.argv[1:2])
+                process = {"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": name}}
+                line = json.dumps(process, separators=(",", ":")) + "\n" + line
+            os.write(self._fd, line.encode("utf-8"))
+
+
+_writer = _TraceWriter(os.environ[TRACE_ENV]) if os.environ.get(TRACE_ENV) else None
+
+
+def enabled() -> bool:
+    return _writer is not None
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.time_ns() // 1000
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb):
+        end = time.time_ns() // 1000
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {"name": self.name, "cat": self.cat, "ph": "X", "ts": self.start, "dur": end - self.start,
+                 "pid": os.getpid(), "tid": threading.get_native_id()}
+        if self.args:
+            event["args"] = self.args
+        _writer.write(event)
+        return False
+
+    def set(self, **args) -> None:
+        """Attach arguments known only once the span is running (e.g. a cache hit)."""
+        self.args.update(args)
+
+
+def span(name: str, cat: str = "framework", **args):
+    """Context manager timing a block; a shared no-op while tracing is disabled."""
+    if _writer is None:
+        return NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name: Optional[str] = None, cat: str = "framework",
+           describe: Optional[Callable[..., Dict[str, Any]]] = None):
+    """Decorator form of span(); returns the function unchanged while tracing is disabled.
+
+    describe(*args, **kwargs) may return span arguments derived from the call.
+    """
+    def decorate(func):
+        if _writer is None:
+            return func
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name, cat, describe(*args, **kwargs) if describe else {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def load_events(path: str) -> List[Dict[str, Any]]:
+    """Events from a span file; lines cut short by a killed process are skipped."""
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events
+
+
+def export_chrome_trace(events: List[Dict[str, Any]], output: str) -> None:
+    """Write Chrome trace JSON (also read by Perfetto)."""
+    spans = sorted((e for e in events if e.get("ph") == "X"), key=lambda e: e["ts"])
+    metadata = [e for e in events if e.get("ph") == "M"]
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": metadata + spans, "displayTimeUnit": "ms"}, f)
+
+
+def summarize(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Framework vs model time per test and for the run, plus framework time by span name."""
+    spans = [e for e in events if e.get("ph") == "X"]
+    model_spans = [e for e in spans if e.get("cat") == "model"]
+
+    tests = []
+    for test in sorted((e for e in spans if e.get("cat") == "test"), key=lambda e: e["ts"]):
+        start, end = test["ts"], test["ts"] + test["dur"]
+        model_us = sum(m["dur"] for m in model_spans if start <= m["ts"] and m["ts"] + m["dur"] <= end)
+        tests.append({
+            "test_id": test["name"].split(":", 1)[-1],
+            "wall_ms": round(test["dur"] / 1000, 1),
+            "model_ms": round(model_us / 1000, 1),
+            "framework_ms": round((test["dur"] - model_us) / 1000, 1),
+        })
+
+    by_name: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "total_ms": 0.0})
+    for e in spans:
+        if e.get("cat") in ("model", "test", "run", "external"):
+            continue
+        entry = by_name[NAME_QUALIFIER_RE.sub("", e["name"])]
+        entry["count"] += 1
+        entry["total_ms"] += e["dur"] / 1000
+    breakdown = sorted(({"name": name, "count": int(v["count"]), "total_ms": round(v["total_ms"], 1),
+                         "mean_ms": round(v["total_ms"] / v["count"], 1)} for name, v in by_name.items()),
+                       key=lambda row: row["total_ms"], reverse=True)
+
+    wall = sum(t["wall_ms"] for t in tests)
+    model = sum(t["model_ms"] for t in tests)
+    return {
+        "tests": tests,
+        "totals": {
+            "tests": len(tests),
+            "wall_ms": round(wall, 1),
+            "model_ms": round(model, 1),
+            "framework_ms": round(wall - model, 1),
+            "framework_percent": round((wall - model) / wall * 100, 1) if wall else None,
+            "framework_ms_per_test": round((wall - model) / len(tests), 1) if tests else None,
+        },
+        "breakdown": breakdown,
+    }
+
+
+def format_for_report(summary: Dict[str, Any], top: int = 15) -> str:
+    """Format the overhead summary for inclusion in markdown reports."""
+    totals = summary["totals"]
+    lines = [
+        "## Framework Overhead",
+        "*From span tracing (run-tests.sh --trace): time outside Ollama requests within each test*",
+        "",
+    ]
+    if not totals["tests"]:
+        lines.append("*No traced tests found.*")
+        return "\n".join(lines)
+
+    lines += [
+        f"- **Framework time:** {totals['framework_ms'] / 1000:.2f}s of {totals['wall_ms'] / 1000:.2f}s "
+        f"({totals['framework_percent']}%), {totals['framework_ms_per_test']:.0f} ms per test",
+        f"- **Model time:** {totals['model_ms'] / 1000:.2f}s",
+        "",
+        "| Test ID | Wall (ms) | Model (ms) | Framework (ms) |",
+        "|---------|-----------|------------|----------------|",
+    ]
+    for t in summary["tests"]:
+        lines.append(f"| {t['test_id']} | {t['wall_ms']:,.0f} | {t['model_ms']:,.0f} | {t['framework_ms']:,.0f} |")
+
+    lines += [
+        "",
+        "### Where Framework Time Goes",
+        "*Inclusive time per span name; nested spans are counted in their parents too*",
+        "",
+        "| Span | Count | Total (ms) | Mean (ms) |",
+        "|------|-------|------------|-----------|",
+    ]
+    for row in summary["breakdown"][:top]:
+        lines.append(f"| {row['name']} | {row['count']} | {row['total_ms']:,.1f} | {row['mean_ms']:,.1f} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Span tracing of framework overhead')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export = subparsers.add_parser('export', help='Write Chrome/Perfetto trace JSON')
+    export.add_argument('--spans', required=True, help='Span file (the OLLAMA_TRACE_FILE of a run)')
+    export.add_argument('--output', required=True, help='Trace JSON file to write')
+
+    summary_parser = subparsers.add_parser('summary', help='Framework vs model time')
+    summary_parser.add_argument('--spans', required=True, help='Span file (the OLLAMA_TRACE_FILE of a run)')
+    summary_parser.add_argument('--format', choices=['json', 'markdown'], default='json',
+                                help='Output format (default: json)')
+    summary_parser.add_argument('--max-overhead-ms', type=float,
+                                help='Exit with status 2 if mean framework time per test exceeds this')
+
+    args = parser.parse_args()
+
+    try:
+        events = load_events(args.spans)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'export':
+        export_chrome_trace(events, args.output)
+        print(f"Trace written to {args.output}", file=sys.stderr)
+        return
+
+    summary = summarize(events)
+    if args.format == 'markdown':
+        print(format_for_report(summary))
+    else:
+        print(json.dumps(summary, indent=2))
+
+    per_test = summary["totals"]["framework_ms_per_test"]
+    if args.max_overhead_ms is not None and per_test is not None and per_test > args.max_overhead_ms:
+        print(f"Framework overhead {per_test:.0f} ms per test exceeds budget of {args.max_overhead_ms:.0f} ms",
+              file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/bin/bash
+
+# Span tracing helpers shared by run-tests.sh and analyze-results.sh (see scripts/tracing.py).
+# Spans are appended to $OLLAMA_TRACE_FILE as Chrome trace events; when it is
+# unset every helper returns immediately.
+
+TRACE_STARTS=()
+
+# Wall clock in microseconds; $EPOCHREALTIME (bash 5+) avoids forking date
+_trace_clock() {
+    if [[ -n "${EPOCHREALTIME:-}" ]]; then
+        TRACE_CLOCK="${EPOCHREALTIME/[.,]/}"
+    else
+        TRACE_CLOCK="$(date +%s)000000"
+    fi
+}
+
+# Name this script's process in the trace viewer
+trace_init() {
+    [[ -n "${OLLAMA_TRACE_FILE:-}" ]] || return 0
+    printf '{"name":"process_name","ph":"M","pid":%s,"args":{"name":"%s"}}\n' "$$" "$1" >> "${OLLAMA_TRACE_FILE}"
+}
+
+# Open a span; spans nest and are closed in reverse order by trace_end
+trace_begin() {
+    [[ -n "${OLLAMA_TRACE_FILE:-}" ]] || return 0
+    _trace_clock
+    TRACE_STARTS+=("${TRACE_CLOCK}")
+}
+
+# Close the innermost span: trace_end NAME [CATEGORY]
+trace_end() {
+    [[ -n "${OLLAMA_TRACE_FILE:-}" ]] || return 0
+    local depth=${#TRACE_STARTS[@]}
+    (( depth > 0 )) || return 0
+    local start="${TRACE_STARTS[$((depth - 1))]}"
+    unset "TRACE_STARTS[$((depth - 1))]"
+    _trace_clock
+    printf '{"name":"%s","cat":"%s","ph":"X","ts":%s,"dur":%s,"pid":%s,"tid":%s}\n' \
+        "$1" "${2:-framework}" "${start}" "$((TRACE_CLOCK - start))" "$$" "$$" >> "${OLLAMA_TRACE_FILE}"
+}
+
+# Run a command inside a span, keeping its exit status: trace_run NAME CATEGORY COMMAND [ARGS...]
+trace_run() {
+    local name="$1"
+    local category="$2"
+    shift 2
+    trace_begin
+    local status=0
+    "$@" || status=$?
+    trace_end "${name}" "${category}"
+    return ${status}
+}
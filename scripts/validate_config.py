@@ -1,119 +1,268 @@
 #!/usr/bin/env python3
 """
 Configuration validation tool for the new architecture.
-Validates all YAML configurations and tests data source processing.
+Validates all YAML configurations against the schemas in test-configs/schemas/
+and tests data source processing and prompt building.
+
+Schemas are compiled once. Every data source referenced by any test is
+resolved exactly once, and sources and prompts are processed on a worker
+pool. The optional JSON report lists each test's prompt size and estimated
+token count against its context budget.
 """
 
+import argparse
+import json
 import sys
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 # Add scripts directory to path for imports
 script_dir = Path(__file__).parent
 sys.path.insert(0, str(script_dir))
 
-from config_loader import ConfigLoader, DataSourceProcessor, PromptBuilder
+from config_loader import MODELS_FILE, ConfigLoader, DataSourceProcessor, PromptBuilder
+from prompt_budget import BudgetPolicy, estimate_tokens
+from schema_validator import load_validator
 
-def validate_all_configurations():
-    """Validate all configurations and test data source processing."""
-    
+DEFAULT_WORKERS = 8
+TEST_SCHEMA = "test-definition.schema.yaml"
+SOURCE_SCHEMA = "data-source.schema.yaml"
+# Content markers data sources return instead of raising
+ERROR_MARKERS = ("[FILE NOT FOUND", "[ERROR", "[DATA_SOURCE_NOT_FOUND")
+
+
+def _source_id(source_ref: Any) -> str:
+    return source_ref if isinstance(source_ref, str) else source_ref.get("id", "")
+
+
+def _duplicates(ids: List[str]) -> List[str]:
+    seen, duplicates = set(), []
+    for item in ids:
+        if item in seen and item not in duplicates:
+            duplicates.append(item)
+        seen.add(item)
+    return duplicates
+
+
+def validate_schemas(loader: ConfigLoader) -> Dict[str, List[str]]:
+    """Schema and structural errors per configuration file name."""
+    registry = loader.registry
+    test_schema = load_validator(loader.schemas_dir / TEST_SCHEMA)
+    source_schema = load_validator(loader.schemas_dir / SOURCE_SCHEMA)
+    errors: Dict[str, List[str]] = {}
+
+    if registry.models_error:
+        errors[MODELS_FILE] = [f"invalid YAML: {registry.models_error}"]
+    for name, error in registry.category_errors.items():
+        errors[name] = [f"invalid YAML: {error}"]
+    for category_id, config in registry.categories.items():
+        name = Path(registry.category_files[category_id]).name
+        problems = test_schema.validate(config)
+        tests = (config or {}).get("tests") if isinstance(config, dict) else None
+        if isinstance(tests, list):
+            problems += [f"duplicate test id '{test_id}'" for test_id in
+                         _duplicates([t.get("id") for t in tests if isinstance(t, dict)])]
+        if problems:
+            errors[name] = problems
+
+    for name, error in registry.source_file_errors.items():
+        errors[name] = [f"invalid YAML: {error}"]
+    for name, config in registry.source_files.items():
+        problems = source_schema.validate(config)
+        sources = (config or {}).get("data_sources") if isinstance(config, dict) else None
+        if isinstance(sources, list):
+            problems += [f"duplicate data source id '{source_id}'" for source_id in
+                         _duplicates([s.get("id") for s in sources if isinstance(s, dict)])]
+        if problems:
+            errors[name] = problems
+    return errors
+
+
+def resolve_sources(loader: ConfigLoader, data_processor: DataSourceProcessor,
+                    tests: List[Tuple[str, Dict[str, Any]]], workers: int) -> Dict[str, Dict[str, Any]]:
+    """Resolve every referenced data source once; return size and error per source ID."""
+    refs: Dict[str, Any] = {}
+    for _, test in tests:
+        for source_ref in test.get("data_sources", []) or []:
+            refs.setdefault(_source_id(source_ref), source_ref)
+
+    def resolve(source_id: str) -> Dict[str, Any]:
+        ref = refs[source_id]
+        source_config = loader.registry.get_data_source(source_id) or (ref if isinstance(ref, dict) else None)
+        if not source_config:
+            return {"chars": 0, "estimated_tokens": 0, "error": "not found in common sources"}
+        try:
+            content = data_processor.process_data_source(source_config)
+        except Exception as e:
+            return {"chars": 0, "estimated_tokens": 0, "error": f"failed: {e}"}
+        error = content.splitlines()[0] if content.startswith(ERROR_MARKERS) else None
+        return {"type": source_config.get("type"), "chars": len(content),
+                "estimated_tokens": estimate_tokens(content), "error": error}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(refs, pool.map(resolve, refs)))
+
+
+def validate_test(prompt_builder: PromptBuilder, models_config: Dict[str, Any], category_id: str,
+                  test: Dict[str, Any], sources: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Build one test's prompt from already-resolved sources and check it."""
+    result: Dict[str, Any] = {
+        "category": category_id,
+        "id": test.get("id"),
+        "title": test.get("title"),
+        "errors": [],
+        "warnings": [],
+        "sources": {},
+    }
+    for field in ("id", "title", "timeout", "prompt_template"):
+        if field not in test:
+            result["errors"].append(f"Missing required field: {field}")
+    if "prompt_template" not in test:
+        return result
+
+    data_sources = test.get("data_sources", []) or []
+    for source_ref in data_sources:
+        source_id = _source_id(source_ref)
+        source = sources[source_id]
+        result["sources"][source_id] = source
+        if source["error"]:
+            result["errors"].append(f"Data source '{source_id}' {source['error']}")
+        elif not source["chars"]:
+            result["warnings"].append(f"Data source '{source_id}': empty content")
+
+    try:
+        budget = BudgetPolicy.resolve(models_config, test_config=test)
+        prompt, issues, report = prompt_builder.build(test["prompt_template"], data_sources, budget)
+    except Exception as e:
+        result["errors"].append(f"Prompt building failed: {e}")
+        return result
+
+    result.update({
+        "prompt_chars": len(prompt),
+        "estimated_tokens": estimate_tokens(prompt),
+        "num_ctx": report["num_ctx"],
+        "fits": report["fits"],
+        "trimmed": [t["source"] for t in report["trimmed"]],
+    })
+    if not prompt:
+        result["warnings"].append("Prompt is empty")
+    for source_id in issues["unknown"]:
+        result["errors"].append(f"Template placeholder {{data_sources.{source_id}}} has no matching data source")
+    for source_id in issues["unused"]:
+        result["warnings"].append(f"Data source '{source_id}' is never referenced in the template")
+    if report["trimmed"]:
+        result["warnings"].append(f"Prompt exceeds num_ctx {report['num_ctx']}; trimmed: {', '.join(result['trimmed'])}")
+    if test.get("max_output_tokens", 0) > report["reserve_output_tokens"]:
+        result["warnings"].append(f"max_output_tokens {test['max_output_tokens']} exceeds the "
+                                  f"{report['reserve_output_tokens']} tokens reserved for output")
+    return result
+
+
+def run_validation(workers: int = DEFAULT_WORKERS) -> Dict[str, Any]:
+    """Validate all configurations; return the machine-readable report."""
+    start = time.perf_counter()
     loader = ConfigLoader()
-    data_processor = DataSourceProcessor()
-    prompt_builder = PromptBuilder(data_processor)
-    
+    data_processor = DataSourceProcessor(registry=loader.registry)
+    # Sources are resolved up front, so per-test builds need no inner pool
+    prompt_builder = PromptBuilder(data_processor, max_workers=1)
+
+    categories = loader.get_available_categories()
+    schema_errors = validate_schemas(loader)
+    tests = [(category_id, test)
+             for category_id in categories
+             for test in ((loader.registry.categories.get(category_id) or {}).get("tests") or [])
+             if isinstance(test, dict)]
+
+    sources = resolve_sources(loader, data_processor, tests, workers)
+    models_config = loader.registry.models
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(
+            lambda item: validate_test(prompt_builder, models_config, item[0], item[1], sources), tests))
+
+    errors = sum(len(r["errors"]) for r in results) + sum(len(e) for e in schema_errors.values())
+    return {
+        "valid": bool(categories) and errors == 0,
+        "categories": {
+            category_id: {
+                "name": ((loader.registry.categories.get(category_id) or {}).get("category") or {}).get("name"),
+                "tests": sum(1 for c, _ in tests if c == category_id),
+            }
+            for category_id in categories
+        },
+        "schema_errors": schema_errors,
+        "sources": sources,
+        "tests": results,
+        "summary": {
+            "categories": len(categories),
+            "tests": len(results),
+            "sources": len(sources),
+            "errors": errors,
+            "warnings": sum(len(r["warnings"]) for r in results),
+            "estimated_tokens": sum(r.get("estimated_tokens", 0) for r in results),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "workers": workers,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Human-readable validation report."""
     print("🔍 Configuration Validation Report")
     print("=" * 50)
-    
-    # Test category discovery
-    categories = loader.get_available_categories()
+
+    categories = report["categories"]
     print(f"📂 Found {len(categories)} test categories: {', '.join(categories)}")
-    
     if not categories:
         print("❌ ERROR: No test categories found!")
-        return False
-    
-    success = True
-    
-    # Validate each category
-    for category_id in categories:
+        return
+
+    if report["schema_errors"]:
+        print("\n📐 Schema validation")
+        for name, problems in sorted(report["schema_errors"].items()):
+            for problem in problems:
+                print(f"  ❌ {name}: {problem}")
+    else:
+        print("📐 All configuration files match their schemas")
+
+    for category_id, info in categories.items():
         print(f"\n🧪 Validating category: {category_id}")
-        
-        try:
-            # Load category configuration
-            config = loader.load_test_category(category_id)
-            print(f"  ✅ Configuration loaded successfully")
-            print(f"  📋 Category: {config['category']['name']}")
-            print(f"  🎯 Tests: {len(config['tests'])}")
-            
-            # Validate each test in the category
-            for test in config['tests']:
-                test_id = test['id']
-                print(f"    🔬 Validating test {test_id}: {test['title']}")
-                
-                # Check required fields
-                required_fields = ['id', 'title', 'timeout', 'prompt_template']
-                for field in required_fields:
-                    if field not in test:
-                        print(f"      ❌ Missing required field: {field}")
-                        success = False
-                        continue
-                
-                # Test data source processing if present
-                if 'data_sources' in test:
-                    # Load common sources config (like PromptBuilder does)
-                    try:
-                        common_sources_config = loader.load_data_sources()
-                        common_sources = common_sources_config.get("data_sources", [])
-                    except Exception as e:
-                        print(f"      ⚠️  Could not load common sources: {e}")
-                        common_sources = []
-                    
-                    for ds in test['data_sources']:
-                        # Handle both string IDs and dict formats
-                        if isinstance(ds, str):
-                            source_id = ds
-                        else:
-                            source_id = ds['id']
-                        
-                        # Find the full source config by ID (like PromptBuilder does)
-                        source_config = None
-                        for src in common_sources:
-                            if src["id"] == source_id:
-                                source_config = src
-                                break
-                        
-                        if source_config:
-                            try:
-                                content = data_processor.process_data_source(source_config)
-                                if content:
-                                    print(f"      ✅ Data source '{source_id}': {len(content)} chars")
-                                else:
-                                    print(f"      ⚠️  Data source '{source_id}': empty content")
-                            except Exception as e:
-                                print(f"      ❌ Data source '{source_id}' failed: {e}")
-                                success = False
-                        else:
-                            print(f"      ❌ Data source '{source_id}' not found in common sources")
-                            success = False
-                
-                # Test prompt building
-                try:
-                    data_sources = test.get('data_sources', [])
-                    prompt = prompt_builder.build_prompt(test['prompt_template'], data_sources)
-                    if prompt:
-                        print(f"      ✅ Prompt built: {len(prompt)} chars")
-                    else:
-                        print(f"      ⚠️  Prompt is empty")
-                except Exception as e:
-                    print(f"      ❌ Prompt building failed: {e}")
-                    success = False
-                    
-        except Exception as e:
-            print(f"  ❌ Failed to validate category {category_id}: {e}")
-            success = False
-    
-    print(f"\n{'🎉 All validations passed!' if success else '❌ Some validations failed!'}")
-    return success
+        print(f"  📋 Category: {info['name']}")
+        print(f"  🎯 Tests: {info['tests']}")
+        for result in report["tests"]:
+            if result["category"] != category_id:
+                continue
+            print(f"    🔬 Validating test {result['id']}: {result['title']}")
+            for source_id, source in result["sources"].items():
+                if not source["error"] and source["chars"]:
+                    print(f"      ✅ Data source '{source_id}': {source['chars']} chars")
+            if "prompt_chars" in result:
+                print(f"      ✅ Prompt built: {result['prompt_chars']} chars, "
+                      f"~{result['estimated_tokens']} tokens (num_ctx {result['num_ctx']})")
+            for error in result["errors"]:
+                print(f"      ❌ {error}")
+            for warning in result["warnings"]:
+                print(f"      ⚠️  {warning}")
+
+    summary = report["summary"]
+    print(f"\n⏱️  Validated {summary['tests']} tests and {summary['sources']} data sources "
+          f"in {summary['duration_ms']:.0f} ms ({summary['workers']} workers)")
+    print(f"\n{'🎉 All validations passed!' if report['valid'] else '❌ Some validations failed!'}")
+
+
+def validate_all_configurations(workers: int = DEFAULT_WORKERS, report_file: Optional[str] = None,
+                                output_format: str = "text") -> bool:
+    """Validate all configurations and test data source processing."""
+    report = run_validation(workers)
+    if report_file:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if output_format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return report["valid"]
 
 def test_specific_prompt(category_id: str, test_id: str):
     """Test building a specific prompt."""
@@ -126,14 +275,10 @@ def test_specific_prompt(category_id: str, test_id: str):
     print("=" * 50)
     
     try:
-        config = loader.load_test_category(category_id)
+        loader.load_test_category(category_id)
         
         # Find the test
-        test_config = None
-        for test in config['tests']:
-            if test['id'] == test_id:
-                test_config = test
-                break
+        test_config = loader.get_test(category_id, test_id)
         
         if not test_config:
             print(f"❌ Test {test_id} not found in category {category_id}")
@@ -147,8 +292,13 @@ def test_specific_prompt(category_id: str, test_id: str):
         if data_sources:
             print(f"📊 Data sources: {len(data_sources)}")
             for ds in data_sources:
-                content = data_processor.process_data_source(ds)
-                print(f"  - {ds['id']}: {len(content)} chars")
+                source_id = _source_id(ds)
+                source_config = loader.registry.get_data_source(source_id) or (ds if isinstance(ds, dict) else None)
+                if not source_config:
+                    print(f"  - {source_id}: not found in common sources")
+                    continue
+                content = data_processor.process_data_source(source_config)
+                print(f"  - {source_id}: {len(content)} chars")
         
         # Build prompt
         prompt = prompt_builder.build_prompt(test_config['prompt_template'], data_sources)
@@ -165,26 +315,33 @@ def test_specific_prompt(category_id: str, test_id: str):
         return False
 
 def main():
-    if len(sys.argv) == 1:
+    parser = argparse.ArgumentParser(
+        description='Validate all configurations, or build one test prompt',
+        epilog='Examples:\n  python validate_config.py\n  python validate_config.py --report validation.json\n'
+               '  python validate_config.py coding ct02',
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('target', nargs='*', metavar='category test', help='Test a specific prompt')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Worker threads for sources and prompts (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--report', help='Also write the JSON validation report to this file')
+    parser.add_argument('--format', choices=['text', 'json'], default='text',
+                        help='Output format (default: text)')
+
+    args = parser.parse_args()
+
+    if not args.target:
         # Run full validation
-        success = validate_all_configurations()
+        success = validate_all_configurations(args.workers, args.report, args.format)
         sys.exit(0 if success else 1)
-    
-    elif len(sys.argv) == 3:
+
+    elif len(args.target) == 2:
         # Test specific prompt
-        category_id = sys.argv[1]
-        test_id = sys.argv[2]
+        category_id, test_id = args.target
         success = test_specific_prompt(category_id, test_id)
         sys.exit(0 if success else 1)
-    
+
     else:
-        print("Usage:")
-        print("  python validate_config.py                    # Validate all configurations")
-        print("  python validate_config.py <category> <test>  # Test specific prompt")
-        print("")
-        print("Examples:")
-        print("  python validate_config.py")
-        print("  python validate_config.py coding ct02")
+        parser.print_help()
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Quantization variant comparison: quality vs speed vs memory Pareto frontier.
+
+Picking between the q4_K_M, q5, q8 and fp16 tags of one model family trades
+answer quality against speed and memory. This script runs the test suite once
+per variant (run-tests.sh --model TAG --category CATEGORY) and joins, per
+variant:
+
+  quality  automated check scores (code execution pass rate, data fact
+           accuracy) and evaluator scores from reports/qualitative_<ts>.json
+           scaled to 0-1. Averaged over the test/score pairs every variant
+           has, so variants are judged on the same evidence
+  speed    mean decode tokens/sec. Mean latency is shown too, but it also
+           depends on how long each variant's answers are
+  memory   resident size of the loaded model from /api/ps, or the weights
+           size if the runtime size was not captured
+
+A variant is dominated when another variant is at least as good on all three
+and strictly better on at least one. Dominated variants can be dropped from
+the fleet. The frontier is computed with NumPy.
+
+  run     Run the suite for each variant, then compare
+  report  Compare runs already on disk, by timestamp or saved comparison
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add scripts directory to path for imports
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from ollama_client import OllamaClient
+from result_utils import iter_result_files, load_result, write_json_atomic
+
+RUNNER = script_dir / "run-tests.sh"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+# (name, label, maximize); memory is minimized
+OBJECTIVES = (
+    ("quality", "quality", True),
+    ("decode_tokens_per_second", "decode tok/s", True),
+    ("memory_bytes", "memory", False),
+)
+
+
+def family_tags(client: OllamaClient, family: str) -> List[str]:
+    """Local tags of a model family, e.g. qwen2.5-coder -> qwen2.5-coder:7b-q4_K_M, ..."""
+    names = [m.get("name") or m.get("model") for m in client.request_json("/api/tags").get("models") or []]
+    return sorted(name for name in names if name and name.split(":")[0] == family)
+
+
+def run_variant(model: str, category: str, runner_args: List[str], previous: Optional[str]) -> Dict[str, Any]:
+    """Run the suite for one variant as its own test run; return its timestamp and exit code."""
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    while timestamp == previous:
+        # Result files are keyed by timestamp, so runs must not share one
+        time.sleep(0.2)
+        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    print(f"=== {model}: run {timestamp} ===", file=sys.stderr)
+    completed = subprocess.run(["bash", str(RUNNER), "--model", model, "--category", category, *runner_args],
+                               env=dict(os.environ, OLLAMA_TEST_TIMESTAMP=timestamp),
+                               stdin=subprocess.DEVNULL, stdout=sys.stderr)
+    return {"model": model, "timestamp": timestamp, "exit_code": completed.returncode}
+
+
+def _evaluator_scores(reports_dir: str, timestamp: str) -> Dict[str, float]:
+    """Mean evaluator score per test (correctness, completeness, quality; 0-10 scaled to 0-1)."""
+    path = Path(reports_dir) / f"qualitative_{timestamp}.json"
+    try:
+        evaluations = load_result(path).get("qualitative_evaluations") or {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+    scores = {}
+    for test_id, evaluation in evaluations.items():
+        values = [evaluation.get(k, {}).get("score") for k in ("correctness", "completeness", "quality")
+                  if isinstance(evaluation.get(k), dict)]
+        values = [v for v in values if isinstance(v, (int, float))]
+        if values:
+            scores[test_id] = mean(values) / 10
+    return scores
+
+
+def load_variant(results_dir: str, reports_dir: str, timestamp: str) -> Dict[str, Any]:
+    """Join throughput, latency, memory and correctness scores for one variant's run."""
+    model = None
+    metadata: Dict[str, Any] = {}
+    decode, latency = [], []
+    outcomes: Counter = Counter()
+    scores: Dict[Tuple[str, str], float] = {}
+    for path in iter_result_files(results_dir, timestamp):
+        try:
+            result = load_result(path)
+        except (OSError, json.JSONDecodeError):
+            continue
+        test_id = result.get("test_case", {}).get("id")
+        model = model or result.get("model", {}).get("name")
+        meta = result.get("model", {}).get("metadata") or {}
+        if meta and not metadata.get("runtime"):
+            metadata = meta
+        outcomes[result.get("overall_result", "unknown")] += 1
+        rate = (result.get("generation") or {}).get("decode_tokens_per_second")
+        if rate:
+            decode.append(rate)
+        latency_ms = result.get("metrics", {}).get("quantitative", {}).get("latency_ms")
+        if latency_ms is not None:
+            latency.append(float(latency_ms) / 1000)
+        automated = result.get("metrics", {}).get("automated") or {}
+        if "pass_rate" in (automated.get("code_execution") or {}):
+            scores[(test_id, "code_execution")] = automated["code_execution"]["pass_rate"]
+        if "accuracy" in (automated.get("data_facts") or {}):
+            scores[(test_id, "data_facts")] = automated["data_facts"]["accuracy"]
+    for test_id, score in _evaluator_scores(reports_dir, timestamp).items():
+        scores[(test_id, "evaluator")] = score
+
+    runtime = metadata.get("runtime") or {}
+    memory = runtime.get("memory_bytes") or metadata.get("size_bytes")
+    return {
+        "model": model,
+        "timestamp": timestamp,
+        "quantization_level": metadata.get("quantization_level"),
+        "parameter_size": metadata.get("parameter_size"),
+        "bits_per_weight": metadata.get("bits_per_weight"),
+        "memory_bytes": memory,
+        "memory_source": "api_ps" if runtime.get("memory_bytes") else ("weights" if memory else None),
+        "decode_tokens_per_second": round(mean(decode), 2) if decode else None,
+        "mean_latency_s": round(mean(latency), 2) if latency else None,
+        "outcomes": dict(outcomes),
+        "scores": scores,
+    }
+
+
+def dominance_matrix(points: np.ndarray) -> np.ndarray:
+    """dominators[j, i] is True when row j dominates row i (every column is maximized)."""
+    at_least = (points[:, None, :] >= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] > points[None, :, :]).any(axis=2)
+    return at_least & better
+
+
+def compare(variants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score quality on shared evidence and mark the variants off the Pareto frontier."""
+    # Only scores every variant has are comparable; without any, quality is left out
+    shared = set.intersection(*(set(v["scores"]) for v in variants)) if variants else set()
+    for variant in variants:
+        variant["quality"] = round(mean(variant["scores"][k] for k in shared), 3) if shared else None
+        variant["quality_evidence"] = len(shared)
+
+    # Objectives some variant lacks cannot rank the others
+    objectives = [(name, label, maximize) for name, label, maximize in OBJECTIVES
+                  if all(v.get(name) is not None for v in variants)]
+    compared = {name for name, _, _ in objectives}
+    skipped = [label for name, label, _ in OBJECTIVES if name not in compared]
+    if variants and objectives:
+        points = np.array([[v[name] if maximize else -v[name] for name, _, maximize in objectives]
+                           for v in variants], dtype=float)
+        dominators = dominance_matrix(points)
+        for i, variant in enumerate(variants):
+            variant["dominated_by"] = [variants[j]["model"] for j in np.flatnonzero(dominators[:, i])]
+            variant["pareto_optimal"] = not variant["dominated_by"]
+    else:
+        for variant in variants:
+            variant["dominated_by"] = []
+            variant["pareto_optimal"] = None
+    return {
+        "objectives": [label for _, label, _ in objectives],
+        "skipped_objectives": skipped,
+        "shared_quality_evidence": len(shared),
+        "frontier": [v["model"] for v in variants if v["pareto_optimal"]],
+        "dominated": [v["model"] for v in variants if v["pareto_optimal"] is False],
+    }
+
+
+def build_comparison(runs: List[Dict[str, Any]], results_dir: str, reports_dir: str,
+                     category: Optional[str] = None) -> Dict[str, Any]:
+    variants = [load_variant(results_dir, reports_dir, run["timestamp"]) for run in runs]
+    variants = [v for v in variants if v["model"]]
+    summary = compare(variants)
+    for variant in variants:
+        # Tuple keys do not survive JSON
+        variant["scores"] = [{"test_id": test_id, "source": source, "score": round(score, 3)}
+                             for (test_id, source), score in sorted(variant["scores"].items())]
+    return {"category": category, "runs": runs, "variants": variants, "summary": summary}
+
+
+def _fmt(value: Any, spec: str = "") -> str:
+    return "N/A" if value is None else format(value, spec)
+
+
+def format_for_report(comparison: Dict[str, Any]) -> str:
+    """Format the variant comparison for inclusion in markdown reports."""
+    summary = comparison["summary"]
+    variants = comparison["variants"]
+    lines = [
+        "## Quantization Variant Comparison",
+        f"*Pareto frontier over {', '.join(summary['objectives']) or 'no complete objective'}; "
+        f"quality is the mean of {summary['shared_quality_evidence']} test scores every variant has "
+        f"(automated checks and evaluator, 0-1)*",
+        "",
+        "| Variant | Quantization | Bits/Weight | Memory (GB) | Decode tok/s | Mean Latency (s) | Quality "
+        "| Results | Pareto |",
+        "|---------|--------------|-------------|-------------|--------------|------------------|---------"
+        "|---------|--------|",
+    ]
+    for v in sorted(variants, key=lambda v: -(v.get("memory_bytes") or 0)):
+        memory = _fmt(v["memory_bytes"] / 1e9 if v["memory_bytes"] else None, ".1f")
+        if v["memory_source"] == "weights":
+            memory += " (weights)"
+        outcomes = ", ".join(f"{n} {status}" for status, n in sorted(v["outcomes"].items()))
+        if v["pareto_optimal"]:
+            pareto = "✅ frontier"
+        elif v["pareto_optimal"] is False:
+            pareto = f"dominated by {', '.join(v['dominated_by'])}"
+        else:
+            pareto = "N/A"
+        lines.append(f"| {v['model']} | {_fmt(v['quantization_level'])} | {_fmt(v['bits_per_weight'])} | "
+                     f"{memory} | {_fmt(v['decode_tokens_per_second'])} | {_fmt(v['mean_latency_s'])} | "
+                     f"{_fmt(v['quality'], '.3f')} | {outcomes} | {pareto} |")
+    lines.append("")
+    if summary["dominated"]:
+        lines.append(f"- **Drop candidates:** {', '.join(summary['dominated'])} "
+                     f"(another variant is at least as good on every objective and better on one)")
+    elif summary["frontier"]:
+        lines.append("- **No dominated variants:** each one is the best choice for some trade-off")
+    if summary["skipped_objectives"]:
+        lines.append(f"- **Not compared:** {', '.join(summary['skipped_objectives'])} "
+                     f"(missing for at least one variant, or not comparable across them)")
+    if variants and not summary["shared_quality_evidence"]:
+        lines.append("- **Quality:** no test scores shared by all variants, so it is not compared; "
+                     "run the same tests on every variant")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare quantization variants of a model family')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Run the suite for each variant and compare')
+    run.add_argument('--model', action='append', default=[],
+                     help='Variant tag as shown by `ollama list` (repeatable)')
+    run.add_argument('--family', help='Compare every local tag of this model family, e.g. qwen2.5-coder')
+    run.add_argument('--category', default='all', help='Test category to run (default: all)')
+    run.add_argument('--runner-arg', action='append', default=[], metavar='ARG',
+                     help='Extra run-tests.sh argument (repeatable), e.g. --runner-arg=--no-runtime-profile')
+
+    report = subparsers.add_parser('report', help='Compare runs already on disk')
+    report.add_argument('--timestamp', action='append', default=[],
+                        help='Timestamp of one variant\'s run (repeatable)')
+    report.add_argument('--comparison', type=Path, help='Saved comparison JSON from `run`')
+
+    for sub in (run, report):
+        sub.add_argument('--results-dir', default='results', help='Directory containing result JSON files')
+        sub.add_argument('--reports-dir', default='reports', help='Directory containing qualitative_*.json')
+        sub.add_argument('--output', help='Write the comparison JSON to this file (run default: '
+                                          'reports/variant_comparison_<first run>.json)')
+        sub.add_argument('--format', choices=['json', 'markdown'], default='markdown',
+                         help='Output format (default: markdown)')
+
+    args = parser.parse_args()
+
+    category = None
+    if args.command == 'run':
+        models = list(args.model)
+        if args.family:
+            try:
+                models += [tag for tag in family_tags(OllamaClient(timeout=30), args.family) if tag not in models]
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        if len(models) < 2:
+            print("Error: need at least two variants (--model, --family)", file=sys.stderr)
+            sys.exit(1)
+        category = args.category
+        runs = []
+        for model in models:
+            runs.append(run_variant(model, category, args.runner_arg, runs[-1]["timestamp"] if runs else None))
+            if runs[-1]["exit_code"] != 0:
+                print(f"Warning: run for {model} exited with {runs[-1]['exit_code']}", file=sys.stderr)
+        output = args.output or Path(args.reports_dir) / f"variant_comparison_{runs[0]['timestamp']}.json"
+    else:
+        runs = [{"timestamp": ts} for ts in args.timestamp]
+        if args.comparison:
+            try:
+                saved = load_result(args.comparison)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            runs = saved["runs"] + runs
+            category = saved.get("category")
+        if not runs:
+            print("Error: give --timestamp for each variant's run, or --comparison", file=sys.stderr)
+            sys.exit(1)
+        output = args.output
+
+    comparison = build_comparison(runs, args.results_dir, args.reports_dir, category)
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(Path(output), comparison)
+
+    if args.format == 'markdown':
+        print(format_for_report(comparison))
+    else:
+        print(json.dumps(comparison, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Code checks survive candidate code that exits or leaves processes behind."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from code_checker import CodeChecker, SandboxLimits  # noqa: E402
+
+BINARY_SEARCH = '''
+def binary_search(arr, target):
+    lo, hi = 0, len(arr) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if arr[mid] == target:
+            return mid
+        if arr[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return -1
+'''
+
+
+def checker(wall_timeout=30.0):
+    checker = CodeChecker.__new__(CodeChecker)
+    checker.limits = SandboxLimits(cpu_seconds=10, memory_mb=1024, wall_timeout=wall_timeout)
+    return checker
+
+
+def test_unittest_main_block_is_a_runtime_error():
+    report = checker().run_job({"suite": "binary_search",
+                                "code_blocks": [BINARY_SEARCH, "import unittest\nunittest.main()\n"]})
+
+    assert report["status"] == "checked"
+    assert report["cases_passed"] == report["cases_total"] > 0
+    assert report["blocks"][1]["status"] == "runtime_error"
+    assert report["blocks"][1]["error"].startswith("SystemExit")
+
+
+def test_timeout_kills_background_processes():
+    marker = "sleep 417"
+    report = checker(wall_timeout=2).run_job({
+        "suite": "binary_search",
+        "code_blocks": [f"import subprocess\nsubprocess.Popen({marker.split()!r})\nwhile True:\n    pass\n"],
+    })
+
+    assert report["status"] == "timeout"
+    survivors = subprocess.run(["pgrep", "-fx", marker], capture_output=True, text=True).stdout
+    assert survivors == ""
@@ -0,0 +1,79 @@
+"""Resume behaviour of the qualitative evaluator's checkpoint."""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_google_genai")
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+spec = importlib.util.spec_from_file_location("qualitative_evaluator", SCRIPTS / "qualitative-evaluator.py")
+qualitative_evaluator = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(qualitative_evaluator)
+
+
+def judgement(score):
+    return {name: {'score': score, 'reasoning': 'ok'} for name in ('correctness', 'completeness', 'quality')}
+
+
+class ScriptedEvaluator(qualitative_evaluator.QualitativeEvaluator):
+    """Evaluator that records which tests it judged instead of calling the API."""
+
+    def __init__(self):
+        self.judged = []
+
+    def evaluate_output(self, test_info, output_content):
+        self.judged.append(output_content)
+        return judgement(8)
+
+
+def test_resume_retries_failed_evaluations(tmp_path):
+    results_file = tmp_path / "results.ndjson"
+    lines = [{'test_session': {'model': 'm'}, 'summary': {}}]
+    for test_id in ('ok_test', 'failed_test'):
+        lines.append({'test_id': test_id, 'output': test_id, 'test_config': {'type': 'code'}})
+    results_file.write_text(''.join(json.dumps(line) + '\n' for line in lines))
+
+    output_file = tmp_path / "qualitative.json"
+    failed = judgement(0)
+    failed['_metadata'] = {'error': 'quota exceeded'}
+    checkpoint = Path(f"{output_file}.partial.ndjson")
+    checkpoint.write_text(
+        json.dumps({'test_id': 'ok_test', 'evaluation': judgement(6)}) + '\n'
+        + json.dumps({'test_id': 'failed_test', 'evaluation': failed}) + '\n')
+
+    evaluator = ScriptedEvaluator()
+    summary = evaluator.evaluate_test_results(str(results_file), str(output_file))
+
+    assert evaluator.judged == ['failed_test']
+    assert summary['qualitative_summary']['total_tests_evaluated'] == 2
+    assert summary['qualitative_summary']['avg_correctness'] == 7.0
+    assert summary['qualitative_summary']['failed_evaluations'] == 0
+    report = json.loads(output_file.read_text())
+    assert report['qualitative_evaluations']['failed_test']['correctness']['score'] == 8
+    assert not checkpoint.exists()
+
+
+def test_failed_evaluations_keep_checkpoint_and_skip_averages(tmp_path):
+    results_file = tmp_path / "results.ndjson"
+    results_file.write_text(
+        json.dumps({'test_session': {}, 'summary': {}}) + '\n'
+        + json.dumps({'test_id': 'flaky', 'output': 'x', 'test_config': {}}) + '\n')
+    output_file = tmp_path / "qualitative.json"
+
+    evaluator = ScriptedEvaluator()
+    evaluator.evaluate_output = lambda test_info, output: {**judgement(5), '_metadata': {'error': 'bad JSON'}}
+    summary = evaluator.evaluate_test_results(str(results_file), str(output_file))
+
+    assert summary['qualitative_summary']['total_tests_evaluated'] == 0
+    assert summary['qualitative_summary']['failed_evaluations'] == 1
+    assert Path(f"{output_file}.partial.ndjson").exists()
+    report = json.loads(output_file.read_text())
+    assert report['qualitative_evaluations']['flaky']['_metadata']['error'] == 'bad JSON'
@@ -0,0 +1,115 @@
+"""Connection reuse and conditional requests in remote_sources."""
+
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from content_cache import ContentCache  # noqa: E402
+from remote_sources import HttpClient, get_pool, run_database_query  # noqa: E402
+
+ETAG = '"inventory-v1"'
+BODY = '{"data": {"items": [1, 2, 3]}}'
+
+
+class InventoryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append((self.client_address[1], self.headers.get("If-None-Match")))
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = BODY.encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    InventoryHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), InventoryHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/inventory"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_http_client_reuses_keep_alive_connection(server, tmp_path):
+    client = HttpClient(ContentCache(tmp_path / "cache.sqlite3"))
+    config = {"url": server, "json_path": "data.items"}
+
+    assert client.fetch(config) == client.fetch(config)
+    client.close()
+
+    assert client.connections_opened == 1
+    assert len({port for port, _ in InventoryHandler.requests}) == 1
+
+
+def test_etag_revalidation_survives_a_new_process(server, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    config = {"url": server}
+
+    first = HttpClient(ContentCache(cache_path))
+    assert first.fetch(config) == BODY
+    first.close()
+
+    # A later process starts with a fresh client but the same on-disk cache
+    second = HttpClient(ContentCache(cache_path))
+    assert second.fetch(config) == BODY
+    second.close()
+
+    assert [etag for _, etag in InventoryHandler.requests] == [None, ETAG]
+
+
+def test_concurrent_fetches_do_not_serialize(server):
+    client = HttpClient()
+    config = {"url": server.replace("/inventory", "/slow")}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        bodies = list(pool.map(lambda _: client.fetch(config), range(4)))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    assert bodies == [BODY] * 4
+    assert elapsed < 1.5  # Four 0.5 s requests one after another would take 2 s
+    assert client.connections_opened == 4
+
+
+def test_database_pool_reuses_connections(tmp_path):
+    database = tmp_path / "sales.db"
+    with sqlite3.connect(database) as conn:
+        conn.execute("CREATE TABLE orders (customer TEXT, total REAL)")
+        conn.executemany("INSERT INTO orders VALUES (?, ?)", [("acme", 10.0), ("globex", 5.5)])
+    conn.close()
+
+    config = {"database": {"path": "sales.db"}, "query": "SELECT customer, total FROM orders ORDER BY customer"}
+    results = [run_database_query(config, tmp_path) for _ in range(3)]
+
+    pool = get_pool(config["database"], tmp_path)
+    assert results[0] == "customer,total\nacme,10.0\nglobex,5.5"
+    assert len(set(results)) == 1
+    assert pool.opened == 1
+    pool.close()